@@ -19,7 +19,9 @@ from .models import (
 	Credit,
 	InventoryItem,
 	ShortTermLiability,
-	ClientDebtRepayment
+	ClientDebtRepayment,
+	LedgerSummary,
+	BranchDebt
 )
 
 
@@ -41,4 +43,6 @@ admin.site.register(MonthlyCapital)
 admin.site.register(Credit)
 admin.site.register(InventoryItem)
 admin.site.register(ShortTermLiability)
-admin.site.register(ClientDebtRepayment)
\ No newline at end of file
+admin.site.register(ClientDebtRepayment)
+admin.site.register(LedgerSummary)
+admin.site.register(BranchDebt)
\ No newline at end of file
@@ -6,6 +6,12 @@ class MainConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "main"
 
+    def ready(self):
+        from . import schemas, signals  # noqa: F401
+
+        # Схемы колонок таблиц строятся один раз на процесс
+        schemas.build()
+
     # def ready(self):
     #     def create_initial_data(sender, **kwargs):
     #         apps = kwargs["apps"]
@@ -0,0 +1,161 @@
+"""
+Колоночный JSON строк списков (параметр format=columns).
+
+Вместо готового HTML строк ответ содержит схему колонок один раз и по
+одному массиву значений на колонку: числа — числами JSON (дробные Decimal —
+текстом со своей точностью), даты — текстом как в таблице, флажки —
+true/false. Строки по этим данным собирает TableManager.buildRowsHTML в
+static/js/table.js с той же разметкой, что у components/table_row.html,
+поэтому ответ меньше и не зависит от вёрстки.
+
+Вид колонки (kind) повторяет ветки table_row.html, тип (column_type) —
+data-column-type заголовка components/table.html.
+"""
+from decimal import Decimal, InvalidOperation
+
+from users.templatetags.custom_filters import format_date
+
+from .row_cache import render_cached_rows
+from .row_renderer import field_value, type_display
+
+PARAM = "format"
+COLUMNS = "columns"
+
+# Знаков после запятой у сумм, выводимых через floatformat:2
+FLOAT_PLACES = 2
+
+
+def wants_columns(request):
+    return request.GET.get(PARAM) == COLUMNS
+
+
+def column_kind(field):
+    """Ветка table_row.html, по которой выводится ячейка колонки"""
+    if field.get("is_date"):
+        return "date"
+    if field.get("is_boolean"):
+        return "boolean"
+    if field.get("is_type_sign"):
+        return "sign"
+    if field.get("is_enum_field"):
+        return "enum"
+    if field.get("is_currency"):
+        return "currency"
+    if field.get("is_percent"):
+        return "percent"
+    if field.get("is_number"):
+        if field.get("is_float"):
+            return "float"
+        if field.get("is_integer"):
+            return "integer"
+        return "number"
+    return "text"
+
+
+def column_type(field):
+    """data-column-type заголовка колонки, как в components/table.html"""
+    if field.get("is_boolean"):
+        return "checkbox"
+    if field.get("is_relation") or field.get("is_enum_field") or field.get("is_type_sign"):
+        return "select"
+    if field.get("is_amount"):
+        return "amount"
+    if field.get("is_date"):
+        return "date"
+    if field.get("is_percent"):
+        return "percent"
+    if field.get("is_number"):
+        return "number"
+    return "text"
+
+
+def _is_number(value):
+    return isinstance(value, (int, float, Decimal)) and not isinstance(value, bool)
+
+
+def _number(value):
+    """Число JSON из Decimal, int, float или числовой строки; прочее — текстом"""
+    if isinstance(value, bool):
+        return int(value)
+    if isinstance(value, (int, float)):
+        return value
+    try:
+        value = Decimal(value)
+    except (InvalidOperation, TypeError, ValueError):
+        return str(value)
+    return int(value) if value == value.to_integral() and value.as_tuple().exponent >= 0 else float(value)
+
+
+def _scaled(value):
+    """
+    Число со своей точностью: Decimal с копейками или долями — текстом как
+    в шаблоне ("10,5", "10,50"), прочее — как _number. Одна точность на всю
+    колонку не подходит: в колонке бывают значения с разным числом знаков.
+    """
+    if isinstance(value, Decimal) and value.is_finite() and value.as_tuple().exponent < 0:
+        return format(value, "f").replace(".", ",")
+    return _number(value)
+
+
+def _text(value):
+    return "" if value is None else str(value)
+
+
+def _values(kind, name, items):
+    """Значения колонки и число знаков после запятой для сумм (floatformat:2)"""
+    if kind == "date":
+        return [_text(format_date(field_value(item, name)) or "") for item in items], None
+    if kind == "boolean":
+        values = []
+        for item in items:
+            value = field_value(item, name)
+            values.append(bool(value) and value != "false" and value != "False")
+        return values, None
+    if kind in ("sign", "enum"):
+        return [_text(type_display(item)) for item in items], None
+
+    raw = [field_value(item, name) for item in items]
+    if kind == "currency":
+        return [_number(value or 0) for value in raw], FLOAT_PLACES
+    if kind == "float":
+        return [None if value is None else _number(value or 0) for value in raw], FLOAT_PLACES
+
+    if kind == "percent":
+        return [_scaled(value or 0) for value in raw], None
+    if kind == "integer":
+        return [_scaled(value) if value else None for value in raw], None
+    if kind == "number":
+        return [None if value is None else _scaled(value) for value in raw], None
+    # Текст (value|default:""): числа (суммы is_amount) остаются числами, прочее — строкой
+    return [
+        "" if not value else _scaled(value) if _is_number(value) else _text(value)
+        for value in raw
+    ], None
+
+
+def table_columns(fields, items):
+    """{"fields": схема колонок, "columns": массив значений на колонку, "count": строк}"""
+    items = list(items)
+    schema = []
+    columns = []
+    for field in fields:
+        kind = column_kind(field)
+        values, places = _values(kind, field.get("name", ""), items)
+        column = {
+            "name": field.get("name", ""),
+            "verbose_name": str(field.get("verbose_name", "")),
+            "kind": kind,
+            "column_type": column_type(field),
+        }
+        if places is not None:
+            column["places"] = places
+        schema.append(column)
+        columns.append(values)
+    return {"fields": schema, "columns": columns, "count": len(items)}
+
+
+def page_rows(request, fields, items):
+    """Строки страницы списка: {"columns": ...} при format=columns, иначе {"html": ...}"""
+    if wants_columns(request):
+        return {"columns": table_columns(fields, items)}
+    return {"html": render_cached_rows(request, fields, items)}
@@ -0,0 +1,94 @@
+"""
+Кэш числа строк для постраничных таблиц.
+
+total_pages требует COUNT(*) с полным набором фильтров на каждый запрос
+страницы. Число кэшируется по ключу (таблица, нормализованные фильтры,
+версии данных TableVersion): любая запись в таблицы увеличивает версию,
+и следующий запрос считает заново, а листание неизменных данных обходится
+без COUNT.
+
+При APPROXIMATE_TABLE_COUNTS = True число строк таблицы без фильтров сразу
+берётся из оценки СУБД (information_schema в MySQL), а точное значение
+считается в фоновом потоке и кладётся в кэш для следующих запросов.
+"""
+import hashlib
+import threading
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+
+from .models import TableVersion
+
+COUNT_TIMEOUT = 60 * 10
+PENDING_TIMEOUT = 60
+
+# Параметры запроса, не влияющие на число строк
+NON_FILTER_PARAMS = ("page", "cursor", "sort", "order")
+
+
+def filter_signature(params, exclude=NON_FILTER_PARAMS):
+    """Фильтры запроса без пустых значений и параметров страницы, в постоянном порядке"""
+    items = sorted(
+        (name, value.strip())
+        for name, values in params.lists() if name not in exclude
+        for value in values if value.strip()
+    )
+    return urlencode(items)
+
+
+def _key(table, signature, versions):
+    digest = hashlib.sha1(signature.encode()).hexdigest()
+    version = ".".join(str(TableVersion.current(name)) for name in versions)
+    return f"count:{table}:{version}:{digest}"
+
+
+def approximate_count(model):
+    """Оценка числа строк таблицы без COUNT(*) или None, если СУБД её не даёт"""
+    if connection.vendor != "mysql":
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT TABLE_ROWS FROM information_schema.TABLES "
+            "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s",
+            [model._meta.db_table],
+        )
+        row = cursor.fetchone()
+    return int(row[0]) if row and row[0] is not None else None
+
+
+def _count_later(key, rows):
+    """Точное число строк в фоне; одновременно считается не больше одного раза"""
+    if not cache.add(f"{key}:pending", True, PENDING_TIMEOUT):
+        return
+
+    def run():
+        try:
+            cache.set(key, rows.count(), COUNT_TIMEOUT)
+        finally:
+            cache.delete(f"{key}:pending")
+            connection.close()
+
+    threading.Thread(target=run, daemon=True).start()
+
+
+def cached_count(table, rows, signature="", versions=(TableVersion.TRANSACTIONS,), model=None):
+    """
+    Число строк запроса rows из кэша. model — таблица для оценки числа строк,
+    если фильтров нет и включены приблизительные счётчики.
+    """
+    key = _key(table, signature, versions)
+    count = cache.get(key)
+    if count is not None:
+        return count
+
+    if model is not None and not signature and getattr(settings, "APPROXIMATE_TABLE_COUNTS", False):
+        estimate = approximate_count(model)
+        if estimate is not None:
+            _count_later(key, rows)
+            return estimate
+
+    count = rows.count()
+    cache.set(key, count, COUNT_TIMEOUT)
+    return count
@@ -0,0 +1,284 @@
+"""
+Списки панели должников (debtor_details) порциями.
+
+Каждый список — запрос к БД, который по хранимым долгам stored_* сразу
+отбирает только строки с ненулевым долгом нужного вида: «Выдачи клиентам»,
+«Бонусы», «Инвесторам» (сделки и движения ДС одним UNION ALL), «ДТ» и
+сделки филиала. Ответ содержит одну порцию строк (page, per_page), а
+клиент догружает остальные порции, поэтому панель открывается быстро при
+любой длине истории.
+"""
+from decimal import Decimal
+from types import SimpleNamespace
+
+from django.core.paginator import Paginator
+from django.db.models import CharField, DecimalField, ExpressionWrapper, F, IntegerField, Sum, Value
+from django.db.models.functions import Coalesce
+from django.template.loader import render_to_string
+from django.utils import timezone
+
+from .columns import table_columns
+from .models import Client, LedgerSummary, SupplierDebtRepayment, Transaction
+from .pagination import UnionAll, order_expression
+from .row_renderer import render_rows
+
+DEFAULT_PER_PAGE = 200
+MAX_PER_PAGE = 1000
+
+CLIENT_PAYOUT_FIELDS = [
+    {"name": "created_at", "verbose_name": "Дата", "is_date": True},
+    {"name": "client", "verbose_name": "Клиент", "is_relation": True},
+    {"name": "amount", "verbose_name": "Сумма сделки", "is_amount": True},
+    {"name": "client_debt_paid", "verbose_name": "Выдать", "is_amount": True},
+]
+
+BONUS_FIELDS = [
+    {"name": "created_at", "verbose_name": "Дата", "is_date": True},
+    {"name": "client", "verbose_name": "Клиент"},
+    {"name": "bonus_percentage", "verbose_name": "%", "is_percent": True},
+    {"name": "bonus_debt", "verbose_name": "Бонус", "is_amount": True},
+]
+
+INVESTOR_PROFIT_FIELDS = [
+    {"name": "created_at", "verbose_name": "Дата", "is_date": True},
+    {"name": "client", "verbose_name": "Клиент"},
+    {"name": "amount", "verbose_name": "Сумма", "is_amount": True},
+    {"name": "profit", "verbose_name": "Прибыль", "is_amount": True},
+]
+
+BRANCH_TRANSACTION_FIELDS = [
+    {"name": "created_at", "verbose_name": "Дата", "is_date": True},
+    {"name": "supplier", "verbose_name": "Поставщик"},
+    {"name": "amount", "verbose_name": "Сумма сделки", "is_amount": True},
+    {"name": "supplier_percentage", "verbose_name": "%", "is_percent": True},
+    {"name": "supplier_debt", "verbose_name": "Сумма", "is_amount": True},
+]
+
+BRANCH_REPAYMENT_FIELDS = [
+    {"name": "created_at", "verbose_name": "Дата", "is_date": True},
+    {"name": "amount", "verbose_name": "Сумма", "is_amount": True},
+    {"name": "comment", "verbose_name": "Комментарий"}
+]
+
+# Строки UNION ALL списка «Инвесторам»: сделки, затем движения ДС
+TRANSACTION = 0
+CASH_FLOW = 1
+INVESTOR_PROFIT_COLUMNS = ("source", "row_pk", "dt", "client_name", "amount_value", "profit_value")
+INVESTOR_PROFIT_ORDERING = [("source", False), ("row_pk", False)]
+AMOUNT_PLACES = Decimal(1)
+DEBT_PLACES = Decimal("0.01")
+
+
+def _date(value):
+    return timezone.localtime(value).strftime("%d.%m.%Y") if value else ""
+
+
+def _date_time(value):
+    return timezone.localtime(value).strftime("%d.%m.%Y %H:%M") if value else ""
+
+
+def client_payout_row(t):
+    return SimpleNamespace(
+        created_at=_date(t.created_at),
+        client=str(t.client) if t.client else "",
+        amount=t.amount,
+        client_debt_paid=t.client_debt_paid,
+    )
+
+
+def bonus_row(t):
+    return SimpleNamespace(
+        created_at=_date(t.created_at),
+        client=str(t.client) if t.client else "",
+        bonus_percentage=t.bonus_percentage,
+        bonus_debt=t.bonus_debt,
+    )
+
+
+def investor_profit_row(row):
+    return SimpleNamespace(
+        created_at=_date(row["dt"]),
+        client=row["client_name"],
+        amount=Decimal(row["amount_value"]).quantize(AMOUNT_PLACES),
+        profit=Decimal(row["profit_value"]).quantize(DEBT_PLACES),
+    )
+
+
+def investor_profit_id(row):
+    """id строки «Инвесторам»: id сделки или cf-<id> движения ДС"""
+    return f"cf-{row['row_pk']}" if row["source"] == CASH_FLOW else row["row_pk"]
+
+
+def branch_transaction_row(t):
+    return SimpleNamespace(
+        created_at=_date(t.created_at),
+        supplier=str(t.supplier) if t.supplier else "",
+        amount=t.amount,
+        supplier_percentage=t.supplier_percentage,
+        supplier_debt=t.supplier_debt,
+    )
+
+
+def repayment_row(r, with_client=False):
+    row = SimpleNamespace(
+        created_at=_date_time(r.created_at),
+        amount=r.amount,
+        comment=r.comment or "",
+    )
+    if with_client:
+        row.client = str(r.client) if r.client else ""
+    return row
+
+
+def client_payout_transactions(excluded_client=LedgerSummary.DT_CLIENT_NAME):
+    """Оплаченные сделки с невыданной клиенту суммой, кроме клиента excluded_client"""
+    return (
+        Transaction.objects.filter(paid_amount__gt=0)
+        .exclude(stored_client_debt_paid=0)
+        .exclude(client__name__iexact=excluded_client)
+        .select_related("client")
+    )
+
+
+def bonus_transactions():
+    """Оплаченные сделки с невыплаченным бонусом"""
+    return (
+        Transaction.objects.filter(paid_amount__gt=0)
+        .exclude(stored_bonus_debt=0)
+        .select_related("client")
+    )
+
+
+def dt_transactions():
+    dt_client = Client.objects.filter(name__iexact=LedgerSummary.DT_CLIENT_NAME).first()
+    if not dt_client:
+        return Transaction.objects.none()
+    return (
+        Transaction.objects.filter(paid_amount__gt=0, client_id=dt_client.id)
+        .exclude(stored_client_debt_paid=0)
+        .select_related("client")
+    )
+
+
+def _money(expression):
+    return ExpressionWrapper(expression, output_field=DecimalField(max_digits=17, decimal_places=2))
+
+
+def investor_transactions():
+    """Оплаченные сделки без долгов по бонусам и клиенту с прибылью — долг инвесторам"""
+    return Transaction.objects.filter(
+        paid_amount__gt=0,
+        stored_bonus_debt=0,
+        stored_client_debt=0,
+        stored_profit__gt=0,
+    )
+
+
+def investor_cashflows():
+    """Движения ДС инвесторам с долгом investor_debt = amount - returned_to_investor"""
+    return LedgerSummary._investor_cashflows().annotate(
+        investor_debt=F("amount") - Coalesce("returned_to_investor", Value(Decimal(0)))
+    )
+
+
+def investor_debt_total():
+    """
+    Долг инвесторам: положительные долги по сделкам и долг по движениям ДС
+    с положительной суммой.
+    """
+    transactions = investor_transactions().filter(stored_investor_debt__gt=0).aggregate(
+        total=Sum("stored_investor_debt")
+    )["total"]
+    cash_flows = investor_cashflows().filter(amount__gt=0).aggregate(
+        total=Sum("investor_debt")
+    )["total"]
+    return (transactions or Decimal(0)) + (cash_flows or Decimal(0))
+
+
+def investor_profit_rows():
+    """
+    Сделки с долгом инвесторам (без долгов по бонусам и клиенту), затем
+    движения ДС инвесторам с положительным долгом.
+    """
+    transactions = investor_transactions().filter(stored_investor_debt__gt=0).annotate(
+        source=Value(TRANSACTION, output_field=IntegerField()),
+        row_pk=F("pk"),
+        dt=F("created_at"),
+        client_name=Coalesce("client__name", Value(""), output_field=CharField()),
+        amount_value=_money(F("amount")),
+        profit_value=_money(F("stored_investor_debt")),
+    )
+    cash_flows = LedgerSummary._investor_cashflows().annotate(
+        source=Value(CASH_FLOW, output_field=IntegerField()),
+        row_pk=F("pk"),
+        dt=F("created_at"),
+        client_name=Coalesce("purpose__name", Value(""), output_field=CharField()),
+        amount_value=_money(F("amount")),
+        profit_value=_money(F("amount") - Coalesce("returned_to_investor", Value(Decimal(0)))),
+    ).filter(profit_value__gt=0)
+    return UnionAll(
+        transactions.values(*INVESTOR_PROFIT_COLUMNS),
+        cash_flows.values(*INVESTOR_PROFIT_COLUMNS),
+    )
+
+
+def branch_transactions(branch):
+    """Оплаченные сделки поставщиков филиала с ненулевым долгом поставщика"""
+    return (
+        Transaction.objects.filter(supplier__branch=branch, paid_amount__gt=0)
+        .exclude(stored_supplier_debt=0)
+        .select_related("supplier")
+    )
+
+
+def branch_debt_total(branch):
+    """Долг по всем сделкам филиала — итог таблицы сделок, а не только загруженных порций"""
+    total = branch_transactions(branch).aggregate(total=Sum("stored_supplier_debt"))["total"]
+    return total or Decimal(0)
+
+
+def branch_repayments(branch):
+    return SupplierDebtRepayment.objects.filter(supplier__branch=branch)
+
+
+# Выдачи филиалу порциями от новых к старым: первая порция — последние выдачи
+BRANCH_REPAYMENT_ORDERING = [('created_at', True), ('id', True)]
+
+
+def per_page(request):
+    try:
+        value = int(request.GET.get("per_page", DEFAULT_PER_PAGE))
+    except (TypeError, ValueError):
+        value = DEFAULT_PER_PAGE
+    return min(value, MAX_PER_PAGE) if value > 0 else DEFAULT_PER_PAGE
+
+
+def chunk(request, rows, ordering, param="page", reverse=False):
+    """
+    (paginator, page) — порция строк списка по номеру из параметра param.
+    С reverse строки внутри порции идут в обратном ordering порядке
+    (порции от новых к старым, а в таблице — по возрастанию даты).
+    """
+    rows = rows.order_by(*[order_expression(key, descending) for key, descending in ordering])
+    paginator = Paginator(rows, per_page(request))
+    page = paginator.get_page(request.GET.get(param, 1))
+    if reverse:
+        page.object_list = list(page.object_list)[::-1]
+    return paginator, page
+
+
+def render_chunk(page, table_id, fields, item, key="html", as_columns=False):
+    """
+    HTML порции: на первой странице — таблица целиком (key), на следующих —
+    только строки (<key>_rows) для добавления в уже выведенную таблицу.
+    С as_columns (format=columns) — колоночный JSON порции под ключом, где
+    html заменено на columns (columns, columns_transactions, ...).
+    """
+    items = [item(row) for row in page.object_list]
+    if as_columns:
+        return {key.replace("html", "columns", 1): table_columns(fields, items)}
+    if page.number == 1:
+        return {key: render_to_string(
+            "components/table.html", {"id": table_id, "fields": fields, "data": items}
+        )}
+    return {f"{key}_rows": render_rows(fields, items)}
@@ -0,0 +1,97 @@
+"""
+Пакетный расчёт долгов по транзакциям.
+
+Колонки забираются из БД одним запросом уже целыми числами: суммы в копейках,
+проценты в десятых долях процента (см. main.money). Все производные значения
+считаются векторно теми же функциями main.money, что и свойства модели
+Transaction, и возвращаются в копейках.
+"""
+from decimal import Decimal
+
+import numpy as np
+from django.db.models import BigIntegerField, F, Value
+from django.db.models.functions import Cast, Coalesce
+
+from . import money
+from .models import Transaction
+
+# Колонка модели -> множитель до целого значения
+COLUMNS = (
+    ("amount", money.KOPECKS),
+    ("client_percentage", money.PERCENT_SCALE),
+    ("bonus_percentage", money.PERCENT_SCALE),
+    ("supplier_percentage", money.PERCENT_SCALE),
+    ("paid_amount", money.KOPECKS),
+    ("returned_by_supplier", money.KOPECKS),
+    ("returned_bonus", money.KOPECKS),
+    ("returned_to_client", money.KOPECKS),
+    ("returned_to_investor", money.KOPECKS),
+)
+
+
+def _integer_columns():
+    return {
+        f"_debt_{name}": Cast(
+            Coalesce(F(name), Value(Decimal(0))) * scale,
+            output_field=BigIntegerField(),
+        )
+        for name, scale in COLUMNS
+    }
+
+
+def load_columns(queryset):
+    """ids и матрица целочисленных колонок (строка на транзакцию) одним SELECT"""
+    columns = _integer_columns()
+    rows = list(queryset.order_by().annotate(**columns).values_list("id", *columns))
+    if not rows:
+        return np.zeros(0, dtype=np.int64), np.zeros((0, len(COLUMNS)), dtype=np.int64)
+    matrix = np.array(rows, dtype=np.int64)
+    return matrix[:, 0], matrix[:, 1:]
+
+
+def calculate(matrix):
+    """Все производные значения по матрице колонок, в копейках: {"supplier_debt": array, ...}"""
+    amount, client_pct, bonus_pct, supplier_pct, paid, returned_by_supplier, \
+        returned_bonus, returned_to_client, returned_to_investor = matrix.T
+
+    client_fee = money.percent_of(amount, client_pct)
+    supplier_fee = money.percent_of(amount, supplier_pct)
+    bonus = money.percent_of(amount, bonus_pct)
+    remaining_amount = money.percent_of(amount, money.WHOLE - client_pct)
+    profit = client_fee - supplier_fee - bonus
+
+    return {
+        "remaining_amount": remaining_amount,
+        "bonus": bonus,
+        "profit": profit,
+        "supplier_debt": paid - supplier_fee - returned_by_supplier,
+        "client_debt": remaining_amount - returned_to_client,
+        "bonus_debt": bonus - returned_bonus,
+        "client_debt_paid": money.percent_of(paid, money.WHOLE - client_pct) - returned_to_client,
+        "investor_debt": profit - returned_to_investor,
+    }
+
+
+def queryset_debts(queryset):
+    """ids и долги по всем транзакциям запроса"""
+    ids, matrix = load_columns(queryset)
+    return ids, calculate(matrix)
+
+
+def transaction_debts(transactions):
+    """Долги для уже загруженных транзакций (например, страницы), в их порядке"""
+    transactions = list(transactions)
+    ids, debts = queryset_debts(Transaction.objects.filter(id__in=[t.id for t in transactions]))
+    positions = {transaction_id: index for index, transaction_id in enumerate(ids.tolist())}
+    order = np.array([positions[t.id] for t in transactions], dtype=np.int64)
+    return {name: values[order] for name, values in debts.items()}
+
+
+def to_rubles(values):
+    """Копейки -> целые рубли с отбрасыванием копеек (как strip_cents)"""
+    return money.truncate_rubles(values).tolist()
+
+
+def total(values):
+    """Сумма в копейках -> Decimal в рублях"""
+    return money.from_kopecks(values.sum())
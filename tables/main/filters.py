@@ -0,0 +1,166 @@
+"""
+Фильтры колонок таблиц по тексту, введённому пользователем.
+
+Дата ищется как подстрока «dd.mm.YYYY HH:MM» в местном времени. Полные
+формы — год, месяц (mm.YYYY), день (dd.mm.YYYY) и минута — дают ту же
+выборку, что и подстрока, поэтому переводятся в диапазон по полю даты и идут
+по индексу; прочие фрагменты сравниваются с датой, отформатированной в БД.
+
+Сумма: «=150», «>1000», «<=500» и «100..500» — точное совпадение или
+диапазон по индексу; прочий текст — подстрока суммы, как раньше.
+
+Период «с — по» (filter_by_period) — диапазон по полю даты от начала
+первой границы до конца второй.
+
+Если у модели есть хранимый текст поля (search_field, см. main.search_text),
+подстрока ищется по нему, а не по значению, отформатированному в запросе.
+"""
+import re
+from datetime import datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+
+from django.db.models import CharField, DateTimeField, ExpressionWrapper, F, Value
+from django.db.models.functions import (
+    Cast,
+    Concat,
+    ExtractDay,
+    ExtractHour,
+    ExtractMinute,
+    ExtractMonth,
+    ExtractYear,
+    LPad,
+)
+from django.utils import timezone
+
+from .search_text import filter_contains
+
+DATE_PATTERNS = (
+    re.compile(r"(?P<year>\d{4})"),
+    re.compile(r"(?P<month>\d{2})\.(?P<year>\d{4})"),
+    re.compile(r"(?P<day>\d{2})\.(?P<month>\d{2})\.(?P<year>\d{4})"),
+    re.compile(r"(?P<day>\d{2})\.(?P<month>\d{2})\.(?P<year>\d{4}) (?P<hour>\d{2}):(?P<minute>\d{2})"),
+)
+
+NUMBER = r"-?\d+(?:\.\d+)?"
+AMOUNT_COMPARISON = re.compile(rf"(?P<op>>=|<=|=|>|<)(?P<value>{NUMBER})")
+AMOUNT_RANGE = re.compile(rf"(?P<low>{NUMBER})\.\.(?P<high>{NUMBER})")
+AMOUNT_LOOKUPS = {"=": "exact", ">": "gt", ">=": "gte", "<": "lt", "<=": "lte"}
+
+
+def _next(parts):
+    """Начало следующего периода той же точности"""
+    year, month, day, hour, minute = parts
+    if minute is not None:
+        return datetime(year, month, day, hour, minute) + timedelta(minutes=1)
+    if day is not None:
+        return datetime(year, month, day) + timedelta(days=1)
+    if month is not None:
+        return datetime(year + month // 12, month % 12 + 1, 1)
+    return datetime(year + 1, 1, 1)
+
+
+def date_range(text):
+    """
+    (начало, конец) в текущем поясе для полной формы даты, None — если текст
+    не полная форма, и (None, None) — если такой даты не бывает.
+    """
+    for pattern in DATE_PATTERNS:
+        match = pattern.fullmatch(text)
+        if not match:
+            continue
+        values = match.groupdict()
+        parts = tuple(
+            int(values[name]) if values.get(name) is not None else None
+            for name in ("year", "month", "day", "hour", "minute")
+        )
+        year, month, day, hour, minute = parts
+        try:
+            start = datetime(year, month or 1, day or 1, hour or 0, minute or 0)
+            end = _next(parts)
+        except (ValueError, OverflowError):
+            return None, None
+        return timezone.make_aware(start), timezone.make_aware(end)
+    return None
+
+
+def local_date_text(field):
+    """
+    Дата поля field в местном времени как в таблицах: dd.mm.YYYY HH:MM.
+    Сдвиг на текущее смещение пояса (у Europe/Moscow постоянное) вместо
+    CONVERT_TZ, которому в MySQL нужны таблицы часовых поясов.
+    """
+    offset = timezone.localtime().utcoffset()
+    local = ExpressionWrapper(F(field) + Value(offset), output_field=DateTimeField())
+
+    def part(extract, width):
+        return LPad(Cast(extract(local, tzinfo=dt_timezone.utc), CharField()), width, Value("0"))
+
+    return Concat(
+        part(ExtractDay, 2), Value("."), part(ExtractMonth, 2), Value("."), part(ExtractYear, 4),
+        Value(" "), part(ExtractHour, 2), Value(":"), part(ExtractMinute, 2),
+        output_field=CharField(),
+    )
+
+
+def filter_by_date(queryset, field, text, search_field=None):
+    text = text.strip()
+    if not text:
+        return queryset
+    bounds = date_range(text)
+    if bounds is None:
+        if search_field:
+            return filter_contains(queryset, search_field, text)
+        alias = f"{field}_local_text"
+        return queryset.alias(**{alias: local_date_text(field)}).filter(**{f"{alias}__contains": text})
+    start, end = bounds
+    if start is None:
+        return queryset.none()
+    return queryset.filter(**{f"{field}__gte": start, f"{field}__lt": end})
+
+
+def normalize_amount(text):
+    """Текст суммы без пробелов и «р.», с точкой вместо запятой"""
+    text = text.replace("\xa0", "").replace(" ", "").replace(",", ".")
+    return re.sub(r"р\.?$", "", text)
+
+
+def filter_by_amount(queryset, field, text, search_field=None):
+    text = normalize_amount(text.strip())
+    if not text:
+        return queryset
+    match = AMOUNT_RANGE.fullmatch(text)
+    if match:
+        return queryset.filter(**{
+            f"{field}__gte": Decimal(match["low"]),
+            f"{field}__lte": Decimal(match["high"]),
+        })
+    match = AMOUNT_COMPARISON.fullmatch(text)
+    if match:
+        return queryset.filter(**{f"{field}__{AMOUNT_LOOKUPS[match['op']]}": Decimal(match["value"])})
+    if search_field:
+        return filter_contains(queryset, search_field, text)
+    alias = f"{field}_text"
+    return queryset.alias(**{alias: Cast(field, CharField())}).filter(**{f"{alias}__contains": text})
+
+
+ISO_DATE = re.compile(r"(?P<year>\d{4})-(?P<month>\d{2})-(?P<day>\d{2})")
+
+
+def filter_by_period(queryset, field, date_from="", date_to=""):
+    """
+    Строки с field от начала периода date_from до конца периода date_to
+    включительно. Границы — полные формы даты (год, mm.YYYY, dd.mm.YYYY)
+    или YYYY-MM-DD из поля type="date"; пустая граница не ограничивает.
+    """
+    for text, bound, lookup in ((date_from, 0, "gte"), (date_to, 1, "lt")):
+        text = text.strip()
+        if not text:
+            continue
+        iso = ISO_DATE.fullmatch(text)
+        if iso:
+            text = "{day}.{month}.{year}".format(**iso.groupdict())
+        bounds = date_range(text)
+        if bounds is None or bounds[bound] is None:
+            return queryset.none()
+        queryset = queryset.filter(**{f"{field}__{lookup}": bounds[bound]})
+    return queryset
@@ -0,0 +1,59 @@
+"""
+Исключение скрытых строк (users.HiddenRows) в запросе списка.
+
+Клиент прячет строки у себя и сохраняет их id в HiddenRows под id таблицы
+на странице. С параметром respect_hidden=1 списки исключают эти строки уже
+в запросе: страница приходит полной, total_pages и курсоры считаются без
+скрытых строк. Хеш списка скрытых id входит в подпись фильтров для кэша
+числа строк и окон, поэтому у каждого набора скрытых строк свой кэш.
+"""
+import hashlib
+
+from users.models import HiddenRows
+
+PARAM = "respect_hidden"
+
+# id таблиц на страницах, под которыми клиент сохраняет скрытые строки
+TRANSACTIONS = "transactions-table"
+CASH_FLOW = "cash_flow-table"
+MONEY_LOGS = "money-logs-table"
+
+
+def hidden_ids(request, table):
+    """
+    Скрытые пользователем id строк таблицы table (строками, по возрастанию)
+    или пустой список, если режим respect_hidden=1 не запрошен.
+    Читается из БД один раз за запрос.
+    """
+    if request.GET.get(PARAM) != "1" or not request.user.is_authenticated:
+        return []
+    loaded = request.__dict__.setdefault("_hidden_rows", {})
+    if table not in loaded:
+        ids = (
+            HiddenRows.objects.filter(user=request.user, table=table)
+            .values_list("hidden_ids", flat=True).first()
+        )
+        loaded[table] = sorted({str(row_id) for row_id in ids or []})
+    return loaded[table]
+
+
+def integer_ids(ids, prefix=""):
+    """Числовые id из строк вида <prefix><id>; прочие строки пропускаются"""
+    return [
+        int(row_id[len(prefix):]) for row_id in ids
+        if row_id.startswith(prefix) and row_id[len(prefix):].isdigit()
+    ]
+
+
+def exclude_hidden(request, table, queryset):
+    """queryset без скрытых строк таблицы table в режиме respect_hidden=1"""
+    ids = integer_ids(hidden_ids(request, table))
+    return queryset.exclude(pk__in=ids) if ids else queryset
+
+
+def hidden_signature(request, table):
+    """Добавка к filter_signature: хеш скрытых id или пустая строка"""
+    ids = hidden_ids(request, table)
+    if not ids:
+        return ""
+    return "&hidden=" + hashlib.sha1(",".join(ids).encode()).hexdigest()[:16]
@@ -0,0 +1,68 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from main.models import BranchDebt, CashFlow, LedgerSummary, Transaction
+from main.snapshot import build_balance_snapshot, scan_balance_snapshot
+
+
+class Command(BaseCommand):
+    help = 'Сравнивает число запросов и проходов по таблицам при построении снимка баланса'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=5,
+            help='Количество повторов каждого варианта',
+        )
+
+    def handle(self, *args, **options):
+        repeat = max(options['repeat'], 1)
+
+        def recompute():
+            # Пересчёт всех цифр отдельными агрегатами, как до нарастающих итогов
+            with transaction.atomic():
+                LedgerSummary.rebuild()
+                BranchDebt.rebuild()
+                snapshot = build_balance_snapshot(with_sheet=True)
+                transaction.set_rollback(True)
+            return snapshot
+
+        variants = [
+            ('Пересчёт агрегатами', recompute),
+            ('Один проход', lambda: scan_balance_snapshot(with_sheet=True)),
+            ('Нарастающие итоги', lambda: build_balance_snapshot(with_sheet=True)),
+        ]
+        tables = {
+            'transaction': Transaction._meta.db_table,
+            'cashflow': CashFlow._meta.db_table,
+        }
+
+        snapshots = {}
+        for name, build in variants:
+            elapsed = 0.0
+            for _ in range(repeat):
+                with CaptureQueriesContext(connection) as queries:
+                    started = time.perf_counter()
+                    snapshots[name] = build()
+                    elapsed += time.perf_counter() - started
+
+            selects = [q['sql'] for q in queries.captured_queries if q['sql'].lstrip().upper().startswith('SELECT')]
+            scans = {
+                label: sum(1 for sql in selects if f'FROM "{table}"' in sql or f'FROM `{table}`' in sql)
+                for label, table in tables.items()
+            }
+            self.stdout.write(
+                f'{name}: запросов {len(queries.captured_queries)}, '
+                f'проходов по транзакциям {scans["transaction"]}, по движениям ДС {scans["cashflow"]}, '
+                f'{elapsed / repeat * 1000:.1f} мс'
+            )
+
+        scanned = snapshots['Один проход']
+        counted = snapshots['Нарастающие итоги']
+        if scanned == counted:
+            self.stdout.write(self.style.SUCCESS('Снимки совпадают'))
+        else:
+            self.stdout.write(self.style.ERROR('Нарастающие итоги расходятся с проходом, выполните rebuild_ledger_summary'))
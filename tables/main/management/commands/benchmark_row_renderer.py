@@ -0,0 +1,80 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.template.loader import render_to_string
+from main.models import CashFlow, Transaction
+from main.money_logs import MoneyLogRow
+from main.row_renderer import compile_row
+from main.views import MONEY_LOG_FIELDS, get_cash_flow_fields, get_transaction_fields, money_log_rows
+
+
+class Command(BaseCommand):
+    help = 'Сравнивает вывод страницы строк шаблоном table_row.html и скомпилированной схемой колонок'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rows',
+            type=int,
+            default=200,
+            help='Количество строк на странице',
+        )
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=5,
+            help='Количество повторов каждого варианта',
+        )
+
+    def handle(self, *args, **options):
+        rows = max(options['rows'], 1)
+        repeat = max(options['repeat'], 1)
+
+        tables = [
+            ('Транзакции', get_transaction_fields(False), list(
+                Transaction.objects.select_related('client', 'supplier', 'account').order_by('-created_at')[:rows]
+            )),
+            ('Транзакции (бухгалтер)', get_transaction_fields(True), list(
+                Transaction.objects.select_related('client', 'supplier', 'account').order_by('-created_at')[:rows]
+            )),
+            ('Движения ДС', get_cash_flow_fields(), list(
+                CashFlow.objects.select_related('account', 'supplier', 'purpose', 'created_by').order_by('-created_at')[:rows]
+            )),
+            ('Журнал операций', MONEY_LOG_FIELDS, [
+                MoneyLogRow(row) for row in money_log_rows().order_by('-dt')[:rows]
+            ]),
+        ]
+
+        mismatched = 0
+        for name, fields, items in tables:
+            def template():
+                return ''.join(
+                    render_to_string('components/table_row.html', {'item': item, 'fields': fields})
+                    for item in items
+                )
+
+            def compiled():
+                return compile_row(fields).render_rows(items)
+
+            timings = {}
+            html = {}
+            for label, render in (('шаблон', template), ('схема', compiled)):
+                elapsed = 0.0
+                for _ in range(repeat):
+                    started = time.perf_counter()
+                    html[label] = render()
+                    elapsed += time.perf_counter() - started
+                timings[label] = elapsed / repeat * 1000
+
+            same = html['шаблон'] == html['схема']
+            mismatched += not same
+            speedup = timings['шаблон'] / timings['схема'] if timings['схема'] else 0
+            self.stdout.write(
+                f'{name}: строк {len(items)}, шаблон {timings["шаблон"]:.1f} мс, '
+                f'схема {timings["схема"]:.1f} мс (x{speedup:.1f}), '
+                f'{"HTML совпадает" if same else "HTML РАСХОДИТСЯ"}'
+            )
+
+        if mismatched:
+            self.stdout.write(self.style.ERROR(f'HTML расходится в таблицах: {mismatched}'))
+        else:
+            self.stdout.write(self.style.SUCCESS('HTML совпадает во всех таблицах'))
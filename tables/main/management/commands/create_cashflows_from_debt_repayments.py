@@ -4,7 +4,8 @@ from django.utils import timezone
 from datetime import timedelta
 from decimal import Decimal
 
-from main.models import SupplierDebtRepayment, ClientDebtRepayment, CashFlow, PaymentPurpose, Account
+from main import search
+from main.models import SupplierDebtRepayment, ClientDebtRepayment, CashFlow, PaymentPurpose, Account, TableVersion
 from users.models import User
 
 class Command(BaseCommand):
@@ -52,6 +53,8 @@ class Command(BaseCommand):
             # Принудительно записываем дату из репликации
             if rep.created_at:
                 CashFlow.objects.filter(pk=cf.pk).update(created_at=rep.created_at)
+                CashFlow.objects.filter(pk=cf.pk).refresh_search_text()
+                search.index_instance(cf)
             created += 1
 
         # ClientDebtRepayment -> purpose "Погашение долга клиента", amount отрицательный (как в коде)
@@ -90,6 +93,11 @@ class Command(BaseCommand):
             )
             if rep.created_at:
                 CashFlow.objects.filter(pk=cf.pk).update(created_at=rep.created_at)
+                CashFlow.objects.filter(pk=cf.pk).refresh_search_text()
+                search.index_instance(cf)
             created += 1
 
+        # update() дат выше не вызывает сигналы
+        TableVersion.bump()
+
         self.stdout.write(self.style.SUCCESS(f"Создано CashFlow: {created}, пропущено (существует/ошибка): {skipped}"))
\ No newline at end of file
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+from main.models import BranchDebt, LedgerSummary
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает итоги по долгам (LedgerSummary) и долги филиалов (BranchDebt) с нуля. Перед этим стоит выполнить sync_transaction_debts'
+
+    def handle(self, *args, **options):
+        summary = LedgerSummary.rebuild()
+        for field in LedgerSummary.TOTAL_FIELDS:
+            verbose_name = LedgerSummary._meta.get_field(field).verbose_name
+            self.stdout.write(f'{verbose_name}: {getattr(summary, field)}')
+
+        BranchDebt.rebuild()
+        for branch_debt in BranchDebt.objects.select_related('branch').order_by('branch__name'):
+            self.stdout.write(f'{branch_debt.branch.name}: {branch_debt.debt}')
+        self.stdout.write(self.style.SUCCESS('Итоги по долгам пересчитаны'))
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+from main import search
+
+
+class Command(BaseCommand):
+    help = 'Перестраивает индекс глобального поиска (SearchToken) по всем документам'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=search.CHUNK_SIZE,
+            help='Количество документов в одной порции',
+        )
+
+    def handle(self, *args, **options):
+        counts = search.rebuild(max(options['chunk_size'], 1))
+        for kind, count in counts.items():
+            self.stdout.write(f'{search.DOCUMENTS[kind].model._meta.verbose_name_plural}: {count}')
+        self.stdout.write(self.style.SUCCESS(f'Проиндексировано документов: {sum(counts.values())}'))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+from main.models import Transaction
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает флаги расхождения процентов сделок с карточками клиентов и поставщиков'
+
+    def handle(self, *args, **options):
+        updated = Transaction.objects.refresh_percentage_drift()
+        drifted = Transaction.objects.filter(
+            Q(client_percentage_changed=True) | Q(supplier_percentage_changed=True)
+        ).count()
+        self.stdout.write(self.style.SUCCESS(f'Проверено транзакций: {updated}, с отличающимися процентами: {drifted}'))
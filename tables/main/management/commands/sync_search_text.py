@@ -0,0 +1,66 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import F, Q
+from main.models import CashFlow, Transaction
+from main.search_text import search_text_fields
+
+
+class Command(BaseCommand):
+    help = 'Заполняет и проверяет хранимый текст дат и сумм (*_search) транзакций и движений ДС порциями'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=1000,
+            help='Количество строк в одной порции',
+        )
+        parser.add_argument(
+            '--verify',
+            action='store_true',
+            help='Только проверить расхождения, ничего не изменяя',
+        )
+
+    def handle(self, *args, **options):
+        chunk_size = max(options['chunk_size'], 1)
+        verify = options['verify']
+        total_mismatched = 0
+
+        for model in (Transaction, CashFlow):
+            fields = search_text_fields(model)
+            expected = {f'{field.name}_expected': field.expression() for field in fields}
+            mismatch = Q()
+            for field in fields:
+                mismatch |= ~Q(**{field.name: F(f'{field.name}_expected')})
+
+            processed = 0
+            mismatched = 0
+            last_id = 0
+
+            while True:
+                ids = list(
+                    model.objects.filter(id__gt=last_id)
+                    .order_by('id')
+                    .values_list('id', flat=True)[:chunk_size]
+                )
+                if not ids:
+                    break
+                last_id = ids[-1]
+
+                chunk = model.objects.filter(id__in=ids)
+                stale_ids = list(chunk.alias(**expected).filter(mismatch).values_list('id', flat=True))
+                mismatched += len(stale_ids)
+
+                if stale_ids and not verify:
+                    with transaction.atomic():
+                        model.objects.filter(id__in=stale_ids).refresh_search_text()
+
+                processed += len(ids)
+                self.stdout.write(f'{model._meta.verbose_name_plural}: обработано {processed}, расхождений: {mismatched}')
+
+            total_mismatched += mismatched
+            action = 'расхождений' if verify else 'обновлено'
+            self.stdout.write(f'{model._meta.verbose_name_plural}: проверено {processed}, {action}: {mismatched}')
+
+        style = self.style.SUCCESS if not verify or total_mismatched == 0 else self.style.ERROR
+        self.stdout.write(style(f'Готово, {"расхождений" if verify else "обновлено"}: {total_mismatched}'))
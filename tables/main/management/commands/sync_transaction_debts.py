@@ -0,0 +1,63 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import F, Q
+from main.models import BranchDebt, LedgerSummary, Transaction
+
+
+class Command(BaseCommand):
+    help = 'Заполняет и проверяет хранимые долги транзакций (stored_*) порциями'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=1000,
+            help='Количество транзакций в одной порции',
+        )
+        parser.add_argument(
+            '--verify',
+            action='store_true',
+            help='Только проверить расхождения, ничего не изменяя',
+        )
+
+    def handle(self, *args, **options):
+        chunk_size = max(options['chunk_size'], 1)
+        verify = options['verify']
+
+        mismatch = Q()
+        for stored, name in Transaction.STORED_DEBT_FIELDS.items():
+            mismatch |= ~Q(**{stored: F(name)})
+
+        processed = 0
+        mismatched = 0
+        last_id = 0
+
+        while True:
+            ids = list(
+                Transaction.objects.filter(id__gt=last_id)
+                .order_by('id')
+                .values_list('id', flat=True)[:chunk_size]
+            )
+            if not ids:
+                break
+            last_id = ids[-1]
+
+            chunk = Transaction.objects.filter(id__in=ids)
+            stale_ids = list(chunk.with_debts().filter(mismatch).values_list('id', flat=True))
+            mismatched += len(stale_ids)
+
+            if stale_ids and not verify:
+                with transaction.atomic():
+                    Transaction.objects.filter(id__in=stale_ids).refresh_stored_debts(rebuild_ledger=False)
+
+            processed += len(ids)
+            self.stdout.write(f'Обработано: {processed}, расхождений: {mismatched}')
+
+        if verify:
+            style = self.style.SUCCESS if mismatched == 0 else self.style.ERROR
+            self.stdout.write(style(f'Проверено транзакций: {processed}, расхождений: {mismatched}'))
+        else:
+            if mismatched:
+                LedgerSummary.rebuild()
+                BranchDebt.rebuild()
+            self.stdout.write(self.style.SUCCESS(f'Проверено транзакций: {processed}, обновлено: {mismatched}'))
@@ -1,6 +1,6 @@
 from django.core.management.base import BaseCommand
 from django.db import transaction
-from main.models import CashFlow, PaymentPurpose
+from main.models import CashFlow, LedgerSummary, PaymentPurpose, TableVersion
 
 class Command(BaseCommand):
     help = "Обновить назначение на 'ДТ' для CashFlow с назначением 'Погашение долга клиента' и комментарием 'Выдача клиенту ДТ'"
@@ -19,4 +19,8 @@ class Command(BaseCommand):
             # Обновить назначение
             updated_count = cashflows.update(purpose=dt_purpose)
 
+            # update() не вызывает сигналы — пересчитываем итоги по долгам
+            LedgerSummary.rebuild()
+            TableVersion.bump()
+
             self.stdout.write(f"Обновлено записей: {updated_count}")
\ No newline at end of file
@@ -0,0 +1,65 @@
+# Generated by Django 5.2.5 on 2026-10-18 03:52
+
+from django.db import migrations, models
+
+from main.models import TransactionQuerySet
+
+# Хранимое поле -> выражение долга (Transaction.STORED_DEBT_FIELDS)
+STORED_DEBT_FIELDS = {
+    "stored_supplier_debt": "supplier_debt",
+    "stored_client_debt": "client_debt",
+    "stored_client_debt_paid": "client_debt_paid",
+    "stored_bonus_debt": "bonus_debt",
+    "stored_investor_debt": "investor_debt",
+    "stored_profit": "profit",
+}
+
+
+def fill_stored_debts(apps, schema_editor):
+    # Те же выражения, что у TransactionQuerySet.refresh_stored_debts, одним UPDATE
+    Transaction = apps.get_model("main", "Transaction")
+    expressions = TransactionQuerySet.debt_expressions()
+    Transaction.objects.using(schema_editor.connection.alias).update(**{
+        stored: expressions[name] for stored, name in STORED_DEBT_FIELDS.items()
+    })
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0014_alter_clientdebtrepayment_cash_flow'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='transaction',
+            name='stored_bonus_debt',
+            field=models.DecimalField(db_index=True, decimal_places=2, default=0, editable=False, max_digits=15, verbose_name='Долг по бонусам'),
+        ),
+        migrations.AddField(
+            model_name='transaction',
+            name='stored_client_debt',
+            field=models.DecimalField(db_index=True, decimal_places=2, default=0, editable=False, max_digits=15, verbose_name='Долг клиенту'),
+        ),
+        migrations.AddField(
+            model_name='transaction',
+            name='stored_client_debt_paid',
+            field=models.DecimalField(db_index=True, decimal_places=2, default=0, editable=False, max_digits=15, verbose_name='Долг клиенту от оплаченного'),
+        ),
+        migrations.AddField(
+            model_name='transaction',
+            name='stored_investor_debt',
+            field=models.DecimalField(db_index=True, decimal_places=2, default=0, editable=False, max_digits=15, verbose_name='Долг инвестору'),
+        ),
+        migrations.AddField(
+            model_name='transaction',
+            name='stored_profit',
+            field=models.DecimalField(db_index=True, decimal_places=2, default=0, editable=False, max_digits=15, verbose_name='Прибыль'),
+        ),
+        migrations.AddField(
+            model_name='transaction',
+            name='stored_supplier_debt',
+            field=models.DecimalField(db_index=True, decimal_places=2, default=0, editable=False, max_digits=15, verbose_name='Долг поставщика'),
+        ),
+        migrations.RunPython(fill_stored_debts, migrations.RunPython.noop),
+    ]
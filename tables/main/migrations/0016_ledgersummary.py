@@ -0,0 +1,31 @@
+# Generated by Django 5.2.5 on 2026-10-18 03:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0015_transaction_stored_debts'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LedgerSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('bonus_debt', models.DecimalField(decimal_places=2, default=0, max_digits=20, verbose_name='Бонусы')),
+                ('client_debt', models.DecimalField(decimal_places=2, default=0, max_digits=20, verbose_name='Долг клиентам')),
+                ('client_debt_paid', models.DecimalField(decimal_places=2, default=0, max_digits=20, verbose_name='Выдачи клиентам')),
+                ('dt_client_debt_paid', models.DecimalField(decimal_places=2, default=0, max_digits=20, verbose_name='Выдачи ДТ')),
+                ('investor_transactions_debt', models.DecimalField(decimal_places=2, default=0, max_digits=20, verbose_name='Инвесторам по сделкам')),
+                ('investor_cashflows_debt', models.DecimalField(decimal_places=2, default=0, max_digits=20, verbose_name='Инвесторам по движениям ДС')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Обновлено')),
+            ],
+            options={
+                'verbose_name': 'Итоги по долгам',
+                'verbose_name_plural': 'Итоги по долгам',
+                'default_permissions': (),
+            },
+        ),
+    ]
@@ -0,0 +1,79 @@
+# Generated by Django 5.2.5 on 2026-10-18 03:57
+
+from decimal import Decimal
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import F, Sum, Value
+from django.db.models.functions import Coalesce
+
+# Как LedgerSummary.DT_CLIENT_NAME и LedgerSummary.INVESTOR_EXCLUDED_PURPOSES
+DT_CLIENT_NAME = "ДТ"
+INVESTOR_EXCLUDED_PURPOSES = ["Оплата", "Внесение инвестора", "Возврат от поставщиков", "Корректировка баланса"]
+
+
+def rebuild_totals(apps, schema_editor):
+    """Итоги LedgerSummary и долги филиалов по заполненным в 0015 долгам, как их rebuild()"""
+    db = schema_editor.connection.alias
+    Branch = apps.get_model("main", "Branch")
+    BranchDebt = apps.get_model("main", "BranchDebt")
+    CashFlow = apps.get_model("main", "CashFlow")
+    LedgerSummary = apps.get_model("main", "LedgerSummary")
+    Transaction = apps.get_model("main", "Transaction")
+
+    paid = Transaction.objects.using(db).filter(paid_amount__gt=0)
+    totals = paid.aggregate(
+        bonus_debt=Sum("stored_bonus_debt"),
+        client_debt=Sum("stored_client_debt"),
+        client_debt_paid=Sum("stored_client_debt_paid"),
+    )
+    totals["dt_client_debt_paid"] = paid.filter(
+        client__name__iexact=DT_CLIENT_NAME
+    ).aggregate(total=Sum("stored_client_debt_paid"))["total"]
+    totals["investor_transactions_debt"] = paid.filter(
+        stored_bonus_debt=0, stored_client_debt=0, stored_profit__gt=0
+    ).aggregate(total=Sum("stored_investor_debt"))["total"]
+    totals["investor_cashflows_debt"] = CashFlow.objects.using(db).filter(
+        purpose__operation_type="income"
+    ).exclude(purpose__name__in=INVESTOR_EXCLUDED_PURPOSES).aggregate(
+        total=Sum(F("amount") - Coalesce(F("returned_to_investor"), Value(Decimal(0))))
+    )["total"]
+    LedgerSummary.objects.using(db).update_or_create(
+        pk=1, defaults={field: value or Decimal(0) for field, value in totals.items()}
+    )
+
+    debts = dict(
+        paid.filter(supplier__branch__isnull=False)
+        .order_by()
+        .values_list("supplier__branch_id")
+        .annotate(total=Sum("stored_supplier_debt"))
+    )
+    for branch_id in Branch.objects.using(db).values_list("id", flat=True):
+        BranchDebt.objects.using(db).update_or_create(
+            branch_id=branch_id, defaults={"debt": debts.get(branch_id) or Decimal(0)}
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0016_ledgersummary'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BranchDebt',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('debt', models.DecimalField(decimal_places=2, default=0, max_digits=20, verbose_name='Долг')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Обновлено')),
+                ('branch', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='debt', to='main.branch', verbose_name='Филиал')),
+            ],
+            options={
+                'verbose_name': 'Долг филиала',
+                'verbose_name_plural': 'Долги филиалов',
+                'default_permissions': (),
+            },
+        ),
+        migrations.RunPython(rebuild_totals, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 5.2.5 on 2026-10-18 04:06
+
+from django.db import migrations, models
+from django.db.models import Exists, OuterRef
+
+
+def fill_percentage_drift(apps, schema_editor):
+    # Те же подзапросы, что у TransactionQuerySet.refresh_percentage_drift
+    db = schema_editor.connection.alias
+    Client = apps.get_model("main", "Client")
+    Supplier = apps.get_model("main", "Supplier")
+    Transaction = apps.get_model("main", "Transaction")
+    Transaction.objects.using(db).update(
+        client_percentage_changed=Exists(
+            Client.objects.filter(pk=OuterRef("client_id")).exclude(percentage=OuterRef("client_percentage"))
+        ),
+        supplier_percentage_changed=Exists(
+            Supplier.objects.filter(pk=OuterRef("supplier_id")).exclude(cost_percentage=OuterRef("supplier_percentage"))
+        ),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0018_tableversion'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='transaction',
+            name='client_percentage_changed',
+            field=models.BooleanField(db_index=True, default=False, editable=False, verbose_name='% клиента отличается от карточки'),
+        ),
+        migrations.AddField(
+            model_name='transaction',
+            name='supplier_percentage_changed',
+            field=models.BooleanField(db_index=True, default=False, editable=False, verbose_name='% поставщика отличается от карточки'),
+        ),
+        migrations.RunPython(fill_percentage_drift, migrations.RunPython.noop),
+    ]
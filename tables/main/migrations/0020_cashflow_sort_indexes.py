@@ -0,0 +1,39 @@
+# Generated by Django 5.2.5 on 2026-10-18 04:28
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0019_transaction_percentage_drift'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='cashflow',
+            index=models.Index(fields=['created_at', 'id'], name='main_cashfl_created_3627e9_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='cashflow',
+            index=models.Index(fields=['account', 'id'], name='main_cashfl_account_590bb5_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='cashflow',
+            index=models.Index(fields=['supplier', 'id'], name='main_cashfl_supplie_91e525_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='cashflow',
+            index=models.Index(fields=['amount', 'id'], name='main_cashfl_amount_8f0789_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='cashflow',
+            index=models.Index(fields=['purpose', 'id'], name='main_cashfl_purpose_b17bfb_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='cashflow',
+            index=models.Index(fields=['created_by', 'id'], name='main_cashfl_created_650074_idx'),
+        ),
+    ]
@@ -0,0 +1,76 @@
+# Generated by Django 5.2.5 on 2026-10-18 05:10
+
+import main.search_text
+from django.db import migrations
+
+FULLTEXT_INDEXES = {
+    "main_transaction": ("created_at_search", "fully_paid_at_search", "amount_search", "paid_amount_search"),
+    "main_cashflow": ("created_at_search", "amount_search"),
+}
+
+
+def fill_search_text(apps, schema_editor):
+    for model_name in ("Transaction", "CashFlow"):
+        model = apps.get_model("main", model_name)
+        main.search_text.refresh_search_text(model.objects.using(schema_editor.connection.alias).all())
+
+
+def add_ngram_indexes(apps, schema_editor):
+    # FULLTEXT-индекс с парсером ngram есть только в MySQL
+    if schema_editor.connection.vendor != "mysql":
+        return
+    for table, columns in FULLTEXT_INDEXES.items():
+        for column in columns:
+            schema_editor.execute(
+                f"ALTER TABLE `{table}` ADD FULLTEXT INDEX `{table}_{column}_ngram` (`{column}`) WITH PARSER ngram"
+            )
+
+
+def drop_ngram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "mysql":
+        return
+    for table, columns in FULLTEXT_INDEXES.items():
+        for column in columns:
+            schema_editor.execute(f"ALTER TABLE `{table}` DROP INDEX `{table}_{column}_ngram`")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0020_cashflow_sort_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cashflow',
+            name='amount_search',
+            field=main.search_text.SearchTextField(blank=True, default='', editable=False, max_length=64, source='amount'),
+        ),
+        migrations.AddField(
+            model_name='cashflow',
+            name='created_at_search',
+            field=main.search_text.SearchTextField(blank=True, default='', editable=False, formats=('%d.%m.%Y %H:%M',), local=True, max_length=64, source='created_at'),
+        ),
+        migrations.AddField(
+            model_name='transaction',
+            name='amount_search',
+            field=main.search_text.SearchTextField(blank=True, default='', editable=False, max_length=64, source='amount'),
+        ),
+        migrations.AddField(
+            model_name='transaction',
+            name='created_at_search',
+            field=main.search_text.SearchTextField(blank=True, default='', editable=False, formats=('%d.%m.%Y %H:%M', '%Y-%m-%d %H:%M', '%d.%m %H:%M'), max_length=64, source='created_at'),
+        ),
+        migrations.AddField(
+            model_name='transaction',
+            name='fully_paid_at_search',
+            field=main.search_text.SearchTextField(blank=True, default='', editable=False, formats=('%d.%m.%Y %H:%M', '%Y-%m-%d %H:%M', '%d.%m %H:%M'), max_length=64, source='fully_paid_at'),
+        ),
+        migrations.AddField(
+            model_name='transaction',
+            name='paid_amount_search',
+            field=main.search_text.SearchTextField(blank=True, default='', editable=False, max_length=64, source='paid_amount'),
+        ),
+        migrations.RunPython(fill_search_text, migrations.RunPython.noop),
+        migrations.RunPython(add_ngram_indexes, drop_ngram_indexes),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.5 on 2026-10-18 05:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0021_search_text'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchToken',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(max_length=32, verbose_name='Тип документа')),
+                ('object_id', models.PositiveBigIntegerField(verbose_name='ID документа')),
+                ('token', models.CharField(max_length=64, verbose_name='Слово')),
+                ('weight', models.PositiveSmallIntegerField(default=1, verbose_name='Вес')),
+            ],
+            options={
+                'verbose_name': 'Слово поискового индекса',
+                'verbose_name_plural': 'Поисковый индекс',
+                'default_permissions': (),
+                'indexes': [models.Index(fields=['token', 'kind', 'object_id'], name='main_search_token_68cebc_idx'), models.Index(fields=['kind', 'object_id'], name='main_search_kind_0f9ee0_idx')],
+            },
+        ),
+    ]
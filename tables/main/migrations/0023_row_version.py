@@ -0,0 +1,23 @@
+# Generated by Django 5.2.5 on 2026-10-18 05:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0022_searchtoken'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cashflow',
+            name='row_version',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Версия строки'),
+        ),
+        migrations.AddField(
+            model_name='transaction',
+            name='row_version',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Версия строки'),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.5 on 2026-10-18 07:40
+
+from django.db import migrations, models
+
+
+def drop_extra_rows(apps, schema_editor):
+    # Итоги пересчитываются при первом обращении, если строки pk=1 нет
+    LedgerSummary = apps.get_model('main', 'LedgerSummary')
+    LedgerSummary.objects.exclude(pk=1).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0023_row_version'),
+    ]
+
+    operations = [
+        migrations.RunPython(drop_extra_rows, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='ledgersummary',
+            constraint=models.CheckConstraint(condition=models.Q(('pk', 1)), name='ledgersummary_singleton'),
+        ),
+    ]
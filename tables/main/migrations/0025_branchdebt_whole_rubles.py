@@ -0,0 +1,18 @@
+# Generated by Django 5.2.5 on 2026-10-18 07:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0024_ledgersummary_singleton'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='branchdebt',
+            name='debt',
+            field=models.DecimalField(decimal_places=0, default=0, max_digits=20, verbose_name='Долг'),
+        ),
+    ]
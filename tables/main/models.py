@@ -1,8 +1,11 @@
 from django.db import models
+from collections import defaultdict
 from decimal import Decimal
-import math
+from . import money
+from .search_text import LOCAL_DATE_FORMATS, TRANSACTION_DATE_FORMATS, SearchTextField, refresh_search_text
 from django.db import models, transaction
-from django.db.models import F
+from django.db.models import Exists, F, OuterRef, Value
+from django.db.models.functions import Coalesce, Floor
 from django.utils import timezone
 
 
@@ -92,6 +95,110 @@ class Supplier(models.Model):
         verbose_name = "Поставщик"
         verbose_name_plural = "Поставщики"
 
+class TransactionQuerySet(models.QuerySet):
+    DEBT_FIELDS = (
+        "remaining_amount", "bonus", "profit", "supplier_debt",
+        "client_debt", "bonus_debt", "client_debt_paid", "investor_debt",
+    )
+
+    def update(self, **kwargs):
+        """UPDATE в обход save() тоже увеличивает версию строк (кэш строк main.row_cache)"""
+        kwargs.setdefault("row_version", F("row_version") + 1)
+        return super().update(**kwargs)
+
+    @staticmethod
+    def debt_expressions():
+        """
+        Долги и прибыль сделки как выражения БД с тем же округлением вниз,
+        что и у одноимённых свойств модели Transaction.
+        """
+        money = models.DecimalField(max_digits=15, decimal_places=2)
+
+        def percent_of(value, percentage):
+            return Floor(value * percentage / 100, output_field=money)
+
+        def zero_if_null(name):
+            return Coalesce(F(name), Value(Decimal(0)), output_field=money)
+
+        amount = F("amount")
+        paid = zero_if_null("paid_amount")
+        remaining_amount = percent_of(amount, 100 - F("client_percentage"))
+        bonus = percent_of(amount, F("bonus_percentage"))
+        profit = (
+            percent_of(amount, F("client_percentage"))
+            - percent_of(amount, F("supplier_percentage"))
+            - bonus
+        )
+
+        return {
+            "remaining_amount": remaining_amount,
+            "bonus": bonus,
+            "profit": profit,
+            "supplier_debt": (
+                paid
+                - percent_of(amount, F("supplier_percentage"))
+                - zero_if_null("returned_by_supplier")
+            ),
+            "client_debt": remaining_amount - zero_if_null("returned_to_client"),
+            "bonus_debt": bonus - zero_if_null("returned_bonus"),
+            "client_debt_paid": (
+                percent_of(paid, 100 - F("client_percentage"))
+                - zero_if_null("returned_to_client")
+            ),
+            "investor_debt": profit - zero_if_null("returned_to_investor"),
+        }
+
+    def with_debts(self):
+        """
+        Добавляет долги как псевдонимы запроса: можно писать
+        filter(supplier_debt__gt=0), order_by("investor_debt") и
+        values("supplier__branch").annotate(Sum("supplier_debt")).
+        Значения на экземплярах по-прежнему дают свойства модели.
+        """
+        return self.alias(**self.debt_expressions())
+
+    def debt_totals(self, *names):
+        """Суммы долгов по запросу одним SQL-запросом: {"bonus_debt": Decimal, ...}"""
+        expressions = self.debt_expressions()
+        names = names or self.DEBT_FIELDS
+        totals = self.aggregate(**{name: models.Sum(expressions[name]) for name in names})
+        return {name: totals[name] or Decimal(0) for name in names}
+
+    def refresh_stored_debts(self, rebuild_ledger=True):
+        """
+        Пересчитывает хранимые долги одним SQL UPDATE (для массовых изменений в обход save()).
+        UPDATE не вызывает сигналы, поэтому итоги LedgerSummary пересчитываются целиком.
+        """
+        expressions = self.debt_expressions()
+        updated = self.update(**{
+            stored: expressions[name]
+            for stored, name in Transaction.STORED_DEBT_FIELDS.items()
+        })
+        if rebuild_ledger:
+            LedgerSummary.rebuild()
+            BranchDebt.rebuild()
+        TableVersion.bump()
+        return updated
+
+    def refresh_percentage_drift(self):
+        """
+        Пересчитывает флаги расхождения процентов сделок с карточками клиента
+        и поставщика одним UPDATE с коррелированными подзапросами.
+        """
+        return self.update(
+            client_percentage_changed=Exists(
+                Client.objects.filter(pk=OuterRef("client_id")).exclude(percentage=OuterRef("client_percentage"))
+            ),
+            supplier_percentage_changed=Exists(
+                Supplier.objects.filter(pk=OuterRef("supplier_id")).exclude(cost_percentage=OuterRef("supplier_percentage"))
+            ),
+        )
+
+    def refresh_search_text(self):
+        """Пересчитывает хранимый текст дат и сумм для фильтров одним UPDATE"""
+        return refresh_search_text(self)
+
+
 class Transaction(models.Model):
     created_at = models.DateTimeField(auto_now_add=True, verbose_name="Дата")
     client = models.ForeignKey(
@@ -197,6 +304,95 @@ class Transaction(models.Model):
 
     created_at = models.DateTimeField(auto_now_add=True, verbose_name="Дата создания")
 
+    # Хранимые копии вычисляемых долгов для индексированных выборок.
+    # Обновляются в save(), массово — через refresh_stored_debts().
+    stored_supplier_debt = models.DecimalField(
+        max_digits=15,
+        decimal_places=2,
+        default=0,
+        db_index=True,
+        editable=False,
+        verbose_name="Долг поставщика"
+    )
+    stored_client_debt = models.DecimalField(
+        max_digits=15,
+        decimal_places=2,
+        default=0,
+        db_index=True,
+        editable=False,
+        verbose_name="Долг клиенту"
+    )
+    stored_client_debt_paid = models.DecimalField(
+        max_digits=15,
+        decimal_places=2,
+        default=0,
+        db_index=True,
+        editable=False,
+        verbose_name="Долг клиенту от оплаченного"
+    )
+    stored_bonus_debt = models.DecimalField(
+        max_digits=15,
+        decimal_places=2,
+        default=0,
+        db_index=True,
+        editable=False,
+        verbose_name="Долг по бонусам"
+    )
+    stored_investor_debt = models.DecimalField(
+        max_digits=15,
+        decimal_places=2,
+        default=0,
+        db_index=True,
+        editable=False,
+        verbose_name="Долг инвестору"
+    )
+    stored_profit = models.DecimalField(
+        max_digits=15,
+        decimal_places=2,
+        default=0,
+        db_index=True,
+        editable=False,
+        verbose_name="Прибыль"
+    )
+
+    client_percentage_changed = models.BooleanField(
+        default=False,
+        db_index=True,
+        editable=False,
+        verbose_name="% клиента отличается от карточки"
+    )
+    supplier_percentage_changed = models.BooleanField(
+        default=False,
+        db_index=True,
+        editable=False,
+        verbose_name="% поставщика отличается от карточки"
+    )
+
+    DRIFT_FIELDS = ("client_percentage_changed", "supplier_percentage_changed")
+
+    # Текст дат и сумм для фильтров колонок по подстроке (main.search_text)
+    created_at_search = SearchTextField(source="created_at", formats=TRANSACTION_DATE_FORMATS)
+    fully_paid_at_search = SearchTextField(source="fully_paid_at", formats=TRANSACTION_DATE_FORMATS)
+    amount_search = SearchTextField(source="amount")
+    paid_amount_search = SearchTextField(source="paid_amount")
+
+    SEARCH_TEXT_FIELDS = ("created_at_search", "fully_paid_at_search", "amount_search", "paid_amount_search")
+
+    # Версия строки для кэша HTML строк таблиц (main.row_cache): растёт при
+    # каждом save() и UPDATE через TransactionQuerySet.update
+    row_version = models.PositiveIntegerField(default=0, editable=False, verbose_name="Версия строки")
+
+    STORED_DEBT_FIELDS = {
+        "stored_supplier_debt": "supplier_debt",
+        "stored_client_debt": "client_debt",
+        "stored_client_debt_paid": "client_debt_paid",
+        "stored_bonus_debt": "bonus_debt",
+        "stored_investor_debt": "investor_debt",
+        "stored_profit": "profit",
+    }
+
+    objects = TransactionQuerySet.as_manager()
+
     def __str__(self):
         return f"Транзакция {self.id} - {self.amount} р., клиент: {self.client.name if self.client else 'N/A'}, поставщик: {self.supplier.name if self.supplier else 'N/A'}, счет: {self.account.name if self.account else 'N/A'}, дата: {self.created_at:%d.%m.%Y}"
 
@@ -208,23 +404,21 @@ class Transaction(models.Model):
     @property
     def remaining_amount(self):
         """Сумма после вычета процента клиента"""
-        result = math.floor(self.amount * (100 - self.client_percentage) / 100)
-        return Decimal(result)
+        return money.floor_percent(self.amount, 100 - self.client_percentage)
 
     @property
     def bonus(self):
         """Бонус в денежном выражении"""
-        result = math.floor(self.amount * self.bonus_percentage / 100)
-        return Decimal(result)
+        return money.floor_percent(self.amount, self.bonus_percentage)
 
     @property
     def profit(self):
         """Прибыль = (процент клиента - процент поставщика - бонус) в деньгах"""
-        client_fee = math.floor(self.amount * self.client_percentage / 100)
-        supplier_fee = math.floor(self.amount * self.supplier_percentage / 100)
-        bonus = math.floor(self.amount * self.bonus_percentage / 100)
-        
-        return Decimal(client_fee - supplier_fee - bonus)
+        client_fee = money.floor_percent(self.amount, self.client_percentage)
+        supplier_fee = money.floor_percent(self.amount, self.supplier_percentage)
+        bonus = money.floor_percent(self.amount, self.bonus_percentage)
+
+        return client_fee - supplier_fee - bonus
 
     @property
     def debt(self):
@@ -242,7 +436,7 @@ class Transaction(models.Model):
         Долг поставщика = оплаченная сумма - сумма по проценту поставщика
         """
         paid = self.paid_amount or Decimal(0)
-        supplier_fee = Decimal(math.floor(float(self.amount) * float(self.supplier_percentage) / 100))
+        supplier_fee = money.floor_percent(self.amount, self.supplier_percentage)
         return paid - supplier_fee - self.returned_by_supplier
     
     @property
@@ -264,8 +458,7 @@ class Transaction(models.Model):
         """
         Долг клиента, рассчитанный от оплаченной суммы
         """
-        result = math.floor(self.paid_amount * (100 - self.client_percentage) / 100)
-        return Decimal(result) - self.returned_to_client
+        return money.floor_percent(self.paid_amount, 100 - self.client_percentage) - self.returned_to_client
     
     @property
     def investor_debt(self):
@@ -274,6 +467,20 @@ class Transaction(models.Model):
         """
         return self.profit - self.returned_to_investor
 
+    def refresh_stored_debts(self):
+        """Копирует вычисляемые долги в хранимые поля"""
+        for stored, name in self.STORED_DEBT_FIELDS.items():
+            setattr(self, stored, getattr(self, name) or Decimal(0))
+
+    def refresh_percentage_drift(self):
+        """Сравнивает проценты сделки с текущими процентами клиента и поставщика"""
+        self.client_percentage_changed = bool(self.client_id) and (
+            money.to_tenths(self.client_percentage) != money.to_tenths(self.client.percentage)
+        )
+        self.supplier_percentage_changed = bool(self.supplier_id) and (
+            money.to_tenths(self.supplier_percentage) != money.to_tenths(self.supplier.cost_percentage)
+        )
+
     def save(self, *args, **kwargs):
         all_debts_closed = (
             (self.paid_amount or 0) >= (self.amount or 0)
@@ -287,7 +494,20 @@ class Transaction(models.Model):
                 self.fully_paid_at = timezone.now()
         else:
             self.fully_paid_at = None
-        super().save(*args, **kwargs)
+
+        self.refresh_stored_debts()
+        self.refresh_percentage_drift()
+        self.row_version = (self.row_version or 0) + 1
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None:
+            kwargs["update_fields"] = {
+                *update_fields, "fully_paid_at", "row_version",
+                *self.STORED_DEBT_FIELDS, *self.DRIFT_FIELDS, *self.SEARCH_TEXT_FIELDS,
+            }
+
+        # Итоги LedgerSummary обновляются сигналами в этой же транзакции БД
+        with transaction.atomic():
+            super().save(*args, **kwargs)
 
 class AccountType(models.Model):
     name = models.CharField(max_length=100, verbose_name="Тип счета")
@@ -357,6 +577,17 @@ class PaymentPurpose(models.Model):
         verbose_name_plural = "Назначения платежей"
         ordering = ['name']
 
+class CashFlowQuerySet(models.QuerySet):
+    def update(self, **kwargs):
+        """UPDATE в обход save() тоже увеличивает версию строк (кэш строк main.row_cache)"""
+        kwargs.setdefault("row_version", F("row_version") + 1)
+        return super().update(**kwargs)
+
+    def refresh_search_text(self):
+        """Пересчитывает хранимый текст даты и суммы для фильтров одним UPDATE"""
+        return refresh_search_text(self)
+
+
 class CashFlow(models.Model):
     account = models.ForeignKey(
         Account,
@@ -421,6 +652,27 @@ class CashFlow(models.Model):
         related_name="created_cash_flows"
     )
 
+    # Текст даты (местное время) и суммы для фильтров по подстроке (main.search_text)
+    created_at_search = SearchTextField(source="created_at", formats=LOCAL_DATE_FORMATS, local=True)
+    amount_search = SearchTextField(source="amount")
+
+    SEARCH_TEXT_FIELDS = ("created_at_search", "amount_search")
+
+    # Версия строки для кэша HTML строк таблиц (main.row_cache)
+    row_version = models.PositiveIntegerField(default=0, editable=False, verbose_name="Версия строки")
+
+    objects = CashFlowQuerySet.as_manager()
+
+    def save(self, *args, **kwargs):
+        self.row_version = (self.row_version or 0) + 1
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None:
+            kwargs["update_fields"] = {*update_fields, "row_version", *self.SEARCH_TEXT_FIELDS}
+
+        # Итоги LedgerSummary обновляются сигналами в этой же транзакции БД
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
     @property
     def formatted_amount(self):
         """Возвращает сумму с форматированием и суффиксом 'р.'"""
@@ -440,6 +692,16 @@ class CashFlow(models.Model):
         verbose_name = "Движение ДС"
         verbose_name_plural = "Движение ДС"
         ordering = ['id']
+        # Сортировки таблицы движений ДС: колонка и id для равных значений.
+        # Комментарий (TEXT) в MySQL индексируется только по префиксу — без индекса.
+        indexes = [
+            models.Index(fields=['created_at', 'id']),
+            models.Index(fields=['account', 'id']),
+            models.Index(fields=['supplier', 'id']),
+            models.Index(fields=['amount', 'id']),
+            models.Index(fields=['purpose', 'id']),
+            models.Index(fields=['created_by', 'id']),
+        ]
 
 class SupplierAccount(models.Model):
     supplier = models.ForeignKey(
@@ -812,3 +1074,283 @@ class ClientDebtRepayment(models.Model):
         verbose_name = "Погашение долга клиента"
         verbose_name_plural = "Погашения долгов клиентов"
         ordering = ['created_at']
+
+
+class LedgerSummary(models.Model):
+    """
+    Нарастающие итоги по долгам компании (одна строка).
+    Обновляются сигналами при изменении транзакций и движений ДС
+    в той же транзакции БД; полностью пересчитываются командой
+    rebuild_ledger_summary.
+    """
+    # Единственная строка итогов всегда хранится под этим pk
+    SINGLETON_PK = 1
+    DT_CLIENT_NAME = "ДТ"
+    INVESTOR_EXCLUDED_PURPOSES = ["Оплата", "Внесение инвестора", "Возврат от поставщиков", "Корректировка баланса"]
+    TOTAL_FIELDS = (
+        "bonus_debt",
+        "client_debt",
+        "client_debt_paid",
+        "dt_client_debt_paid",
+        "investor_transactions_debt",
+        "investor_cashflows_debt",
+    )
+
+    bonus_debt = models.DecimalField(max_digits=20, decimal_places=2, default=0, verbose_name="Бонусы")
+    client_debt = models.DecimalField(max_digits=20, decimal_places=2, default=0, verbose_name="Долг клиентам")
+    client_debt_paid = models.DecimalField(max_digits=20, decimal_places=2, default=0, verbose_name="Выдачи клиентам")
+    dt_client_debt_paid = models.DecimalField(max_digits=20, decimal_places=2, default=0, verbose_name="Выдачи ДТ")
+    investor_transactions_debt = models.DecimalField(max_digits=20, decimal_places=2, default=0, verbose_name="Инвесторам по сделкам")
+    investor_cashflows_debt = models.DecimalField(max_digits=20, decimal_places=2, default=0, verbose_name="Инвесторам по движениям ДС")
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="Обновлено")
+
+    def __str__(self):
+        return f"Итоги по долгам на {self.updated_at:%d.%m.%Y %H:%M}"
+
+    class Meta:
+        default_permissions = ()
+        verbose_name = "Итоги по долгам"
+        verbose_name_plural = "Итоги по долгам"
+        constraints = [
+            models.CheckConstraint(condition=models.Q(pk=1), name="ledgersummary_singleton"),
+        ]
+
+    @property
+    def client_debt_paid_without_dt(self):
+        return self.client_debt_paid - self.dt_client_debt_paid
+
+    @property
+    def investor_debt(self):
+        return self.investor_transactions_debt + self.investor_cashflows_debt
+
+    @classmethod
+    def current(cls):
+        summary = cls.objects.filter(pk=cls.SINGLETON_PK).first()
+        if summary is None:
+            summary = cls.rebuild()
+        return summary
+
+    @classmethod
+    def rebuild(cls):
+        """Полный пересчёт итогов по хранимым долгам транзакций"""
+        paid = Transaction.objects.filter(paid_amount__gt=0)
+        totals = paid.aggregate(
+            bonus_debt=models.Sum("stored_bonus_debt"),
+            client_debt=models.Sum("stored_client_debt"),
+            client_debt_paid=models.Sum("stored_client_debt_paid"),
+        )
+        totals["dt_client_debt_paid"] = paid.filter(
+            client__name__iexact=cls.DT_CLIENT_NAME
+        ).aggregate(total=models.Sum("stored_client_debt_paid"))["total"]
+        totals["investor_transactions_debt"] = paid.filter(
+            stored_bonus_debt=0, stored_client_debt=0, stored_profit__gt=0
+        ).aggregate(total=models.Sum("stored_investor_debt"))["total"]
+        totals["investor_cashflows_debt"] = cls._investor_cashflows().aggregate(
+            total=models.Sum(F("amount") - Coalesce(F("returned_to_investor"), Value(Decimal(0))))
+        )["total"]
+
+        with transaction.atomic():
+            summary, _ = cls.objects.select_for_update().get_or_create(pk=cls.SINGLETON_PK)
+            for field in cls.TOTAL_FIELDS:
+                setattr(summary, field, totals[field] or Decimal(0))
+            summary.save()
+        return summary
+
+    @classmethod
+    def apply_change(cls, old_share, new_share):
+        """Прибавляет к итогам разницу между новой и старой долей записи"""
+        delta = {
+            field: (new_share or {}).get(field, 0) - (old_share or {}).get(field, 0)
+            for field in cls.TOTAL_FIELDS
+        }
+        delta = {field: value for field, value in delta.items() if value}
+        if not delta:
+            return
+        updated = cls.objects.filter(pk=cls.SINGLETON_PK).update(
+            **{field: F(field) + value for field, value in delta.items()},
+            updated_at=timezone.now(),
+        )
+        if not updated:
+            cls.rebuild()
+
+    @classmethod
+    def _investor_cashflows(cls):
+        return CashFlow.objects.filter(
+            purpose__operation_type=PaymentPurpose.INCOME
+        ).exclude(purpose__name__in=cls.INVESTOR_EXCLUDED_PURPOSES)
+
+    @classmethod
+    def transaction_share(cls, pk):
+        """Вклад транзакции в итоги по её текущему состоянию в БД"""
+        if pk is None:
+            return None
+        row = Transaction.objects.filter(pk=pk, paid_amount__gt=0).values(
+            "client__name", *Transaction.STORED_DEBT_FIELDS
+        ).first()
+        if row is None:
+            return None
+        is_dt = (row["client__name"] or "").lower() == cls.DT_CLIENT_NAME.lower()
+        is_investor = (
+            row["stored_bonus_debt"] == 0
+            and row["stored_client_debt"] == 0
+            and row["stored_profit"] > 0
+        )
+        return {
+            "bonus_debt": row["stored_bonus_debt"],
+            "client_debt": row["stored_client_debt"],
+            "client_debt_paid": row["stored_client_debt_paid"],
+            "dt_client_debt_paid": row["stored_client_debt_paid"] if is_dt else 0,
+            "investor_transactions_debt": row["stored_investor_debt"] if is_investor else 0,
+        }
+
+    @classmethod
+    def cashflow_share(cls, pk):
+        """Вклад движения ДС в долг инвесторам по его текущему состоянию в БД"""
+        if pk is None:
+            return None
+        row = cls._investor_cashflows().filter(pk=pk).values("amount", "returned_to_investor").first()
+        if row is None:
+            return None
+        return {"investor_cashflows_debt": row["amount"] - (row["returned_to_investor"] or 0)}
+
+
+class BranchDebt(models.Model):
+    """
+    Долг поставщиков филиала — сумма хранимых долгов оплаченных сделок.
+    Обновляется сигналами при сохранении транзакций и погашениях.
+    """
+    branch = models.OneToOneField(
+        Branch,
+        on_delete=models.CASCADE,
+        verbose_name="Филиал",
+        related_name="debt"
+    )
+    # Долги поставщиков всегда в целых рублях (суммы сделок без копеек)
+    debt = models.DecimalField(max_digits=20, decimal_places=0, default=0, verbose_name="Долг")
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="Обновлено")
+
+    def __str__(self):
+        return f"{self.branch.name}: {self.debt} р."
+
+    class Meta:
+        default_permissions = ()
+        verbose_name = "Долг филиала"
+        verbose_name_plural = "Долги филиалов"
+
+    @classmethod
+    def rebuild(cls, branch_ids=None):
+        """Пересчёт долгов указанных (или всех) филиалов"""
+        branches = Branch.objects.all()
+        if branch_ids is not None:
+            branches = branches.filter(id__in=[branch_id for branch_id in branch_ids if branch_id])
+        branch_ids = list(branches.values_list("id", flat=True))
+
+        debts = dict(
+            Transaction.objects.filter(paid_amount__gt=0, supplier__branch_id__in=branch_ids)
+            .order_by()
+            .values_list("supplier__branch_id")
+            .annotate(total=models.Sum("stored_supplier_debt"))
+        )
+        with transaction.atomic():
+            for branch_id in branch_ids:
+                cls.objects.update_or_create(
+                    branch_id=branch_id,
+                    defaults={"debt": debts.get(branch_id) or Decimal(0)},
+                )
+
+    @classmethod
+    def by_branch(cls, branch_ids=None):
+        """{branch_id: долг}; недостающие строки досчитываются"""
+        branches = Branch.objects.all()
+        if branch_ids is not None:
+            branches = branches.filter(id__in=branch_ids)
+        missing = branches.filter(debt__isnull=True).values_list("id", flat=True)
+        if missing:
+            cls.rebuild(list(missing))
+        rows = cls.objects.all()
+        if branch_ids is not None:
+            rows = rows.filter(branch_id__in=branch_ids)
+        return dict(rows.values_list("branch_id", "debt"))
+
+    @classmethod
+    def apply_change(cls, old_share, new_share):
+        """Переносит разницу долга транзакции между филиалами: share = (branch_id, долг)"""
+        delta = defaultdict(Decimal)
+        if old_share:
+            delta[old_share[0]] -= old_share[1]
+        if new_share:
+            delta[new_share[0]] += new_share[1]
+        for branch_id, value in delta.items():
+            if not branch_id or not value:
+                continue
+            updated = cls.objects.filter(branch_id=branch_id).update(
+                debt=F("debt") + value,
+                updated_at=timezone.now(),
+            )
+            if not updated:
+                cls.rebuild([branch_id])
+
+    @staticmethod
+    def transaction_share(pk):
+        """(branch_id, долг поставщика) транзакции по её текущему состоянию в БД"""
+        if pk is None:
+            return None
+        return Transaction.objects.filter(
+            pk=pk, paid_amount__gt=0, supplier__branch__isnull=False
+        ).values_list("supplier__branch_id", "stored_supplier_debt").first()
+
+
+class TableVersion(models.Model):
+    """
+    Счётчик версий данных. Увеличивается при каждой записи в отслеживаемые
+    таблицы; версия входит в ключи кэшей, построенных по этим таблицам.
+    """
+    TRANSACTIONS = "transactions"
+    MONEY_LOGS = "money_logs"
+    # Названия справочников в строках таблиц (клиент, поставщик, счёт, ...)
+    ROW_LABELS = "row_labels"
+
+    name = models.CharField(max_length=50, unique=True, verbose_name="Таблица")
+    version = models.PositiveBigIntegerField(default=0, verbose_name="Версия")
+
+    def __str__(self):
+        return f"{self.name}: {self.version}"
+
+    class Meta:
+        default_permissions = ()
+        verbose_name = "Версия данных"
+        verbose_name_plural = "Версии данных"
+
+    @classmethod
+    def bump(cls, name=TRANSACTIONS):
+        if not cls.objects.filter(name=name).update(version=F("version") + 1):
+            cls.objects.get_or_create(name=name, defaults={"version": 1})
+
+    @classmethod
+    def current(cls, name=TRANSACTIONS):
+        return cls.objects.filter(name=name).values_list("version", flat=True).first() or 0
+
+
+class SearchToken(models.Model):
+    """
+    Обратный индекс глобального поиска: слово документа (клиента, сделки,
+    движения ДС, ...) с весом поля, в котором оно встретилось. Заполняется
+    сигналами при сохранении строк, целиком — командой rebuild_search_index.
+    """
+    kind = models.CharField(max_length=32, verbose_name="Тип документа")
+    object_id = models.PositiveBigIntegerField(verbose_name="ID документа")
+    token = models.CharField(max_length=64, verbose_name="Слово")
+    weight = models.PositiveSmallIntegerField(default=1, verbose_name="Вес")
+
+    def __str__(self):
+        return f"{self.kind}:{self.object_id} {self.token}"
+
+    class Meta:
+        default_permissions = ()
+        verbose_name = "Слово поискового индекса"
+        verbose_name_plural = "Поисковый индекс"
+        # Поиск идёт по префиксу слова, переиндексация — по документу
+        indexes = [
+            models.Index(fields=["token", "kind", "object_id"]),
+            models.Index(fields=["kind", "object_id"]),
+        ]
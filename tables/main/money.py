@@ -0,0 +1,56 @@
+"""
+Денежная арифметика в целых числах.
+
+Суммы — в копейках, проценты — в десятых долях процента (7.5% -> 75).
+Функции над копейками используют только целочисленные *, // и сравнения,
+поэтому одинаково работают с int и с массивами NumPy: ими считают и
+свойства Transaction, и пакетный расчёт долгов в main.debts, и отчёты.
+"""
+from decimal import Decimal, ROUND_HALF_UP
+
+KOPECKS = 100  # копеек в рубле
+PERCENT_SCALE = 10  # десятых долей в проценте
+WHOLE = 100 * PERCENT_SCALE  # 100% в десятых долях
+
+
+def _decimal(value):
+    if value is None:
+        return Decimal(0)
+    if isinstance(value, Decimal):
+        return value
+    return Decimal(str(value))
+
+
+def to_kopecks(value):
+    """Рубли (Decimal, int, float, str или None) -> целые копейки"""
+    return int((_decimal(value) * KOPECKS).to_integral_value(ROUND_HALF_UP))
+
+
+def to_tenths(percentage):
+    """Процент (Decimal, int, float, str или None) -> целые десятые доли процента"""
+    return int((_decimal(percentage) * PERCENT_SCALE).to_integral_value(ROUND_HALF_UP))
+
+
+def from_kopecks(kopecks):
+    """Копейки -> Decimal в рублях"""
+    return Decimal(int(kopecks)) / KOPECKS
+
+
+def percent_of(kopecks, tenths):
+    """Процент от суммы, округлённый вниз до целого рубля; результат в копейках"""
+    return kopecks * tenths // (WHOLE * KOPECKS) * KOPECKS
+
+
+def truncate_rubles(kopecks):
+    """Копейки -> целые рубли с отбрасыванием копеек (к нулю, как int())"""
+    return abs(kopecks) // KOPECKS * ((kopecks > 0) * 1 - (kopecks < 0) * 1)
+
+
+def floor_percent(value, percentage):
+    """Процент от суммы в рублях, округлённый вниз до рубля, как Decimal"""
+    return Decimal(percent_of(to_kopecks(value), to_tenths(percentage)) // KOPECKS)
+
+
+def rubles(value):
+    """Целые рубли любой суммы с отбрасыванием копеек"""
+    return truncate_rubles(to_kopecks(value))
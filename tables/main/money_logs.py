@@ -0,0 +1,202 @@
+"""
+Журнал денежных операций (money_logs_list) одним запросом к БД.
+
+Движения ДС и операции «Прибыль» инвесторов объединяются через UNION ALL
+с общими колонками: тип, описание, сумма, комментарий и автор считаются
+выражениями в БД, поэтому фильтры, сортировка и постраничный вывод тоже
+выполняются там, а в Python собираются только строки одной страницы.
+"""
+from decimal import Decimal
+
+from django.db.models import (
+    Case,
+    CharField,
+    DecimalField,
+    ExpressionWrapper,
+    F,
+    IntegerField,
+    OuterRef,
+    Q,
+    Subquery,
+    Value,
+    When,
+)
+from django.db.models.functions import Coalesce, Concat
+from django.utils import timezone
+
+from .filters import filter_by_amount, filter_by_date
+from .hidden_rows import integer_ids
+from .models import CashFlow, ClientDebtRepayment, InvestorDebtOperation
+from .pagination import UnionAll
+
+CASH_FLOW = 0
+INVESTOR_OPERATION = 1
+
+ID_PREFIXES = {CASH_FLOW: "cf", INVESTOR_OPERATION: "io"}
+# Сумма в строке — с точностью поля модели-источника
+AMOUNT_PLACES = {
+    CASH_FLOW: Decimal(1).scaleb(-CashFlow._meta.get_field("amount").decimal_places),
+    INVESTOR_OPERATION: Decimal(1).scaleb(-InvestorDebtOperation._meta.get_field("amount").decimal_places),
+}
+
+# Колонки объединённого запроса, в одинаковом порядке для обеих частей
+COLUMNS = (
+    "source", "row_pk", "dt", "type_label", "type_id", "info", "amount_value", "comment_text", "creator",
+)
+
+# Ключи сортировки money_logs_list -> колонки
+SORT_COLUMNS = {
+    "date": "dt",
+    "type": "type_label",
+    "info": "info",
+    "amount": "amount_value",
+    "comment": "comment_text",
+    "created_by": "creator",
+}
+
+# Назначения платежа -> (type_id, подпись типа); прочие — «Движение ДС»
+PURPOSE_TYPES = {
+    "Погашение долга поставщика": ("dr", "Погашение долга поставщика"),
+    "Возврат от поставщиков": ("dr", "Погашение долга поставщика"),
+    "Погашение долга клиента": ("cdr", "Погашение долга клиента"),
+    "Забор инвестора": ("io-withdrawal", "Инвестор: Забор"),
+    "Внесение инвестора": ("io-deposit", "Инвестор: Внесение"),
+    "Выдача бонусов": ("bonus", "Выдача бонусов"),
+    "ДТ": ("dt", "Выдача клиенту ДТ"),
+}
+
+
+def _text(*parts):
+    return Concat(*parts, output_field=CharField())
+
+
+def _or_empty(name):
+    return Coalesce(F(name), Value(""), output_field=CharField())
+
+
+def _purpose_case(values, default):
+    """Выражение по назначению платежа: values — {назначение: значение}"""
+    return Case(
+        *[When(purpose__name=name, then=Value(value)) for name, value in values.items()],
+        default=default,
+        output_field=CharField(),
+    )
+
+
+def _purposes(*type_ids):
+    return [name for name, (type_id, _) in PURPOSE_TYPES.items() if type_id in type_ids]
+
+
+def _cash_flow_info():
+    account = _text(Value("Счет: "), _or_empty("account__name"))
+    supplier = Case(
+        When(supplier__isnull=False, then=_text(Value(", Поставщик: "), _or_empty("supplier__name"))),
+        default=Value(""),
+        output_field=CharField(),
+    )
+    purpose = Case(
+        When(purpose__name="", then=Value("")),
+        default=_text(Value(", Назначение: "), _or_empty("purpose__name")),
+        output_field=CharField(),
+    )
+    client_name = Subquery(
+        ClientDebtRepayment.objects.filter(cash_flow=OuterRef("pk"))
+        .order_by("created_at", "pk")
+        .values("client__name")[:1]
+    )
+
+    return Case(
+        When(purpose__name__in=_purposes("dr"), then=_text(
+            Value("Поставщик: "), _or_empty("supplier__name"), Value(", "), account,
+        )),
+        When(purpose__name__in=_purposes("cdr"), then=_text(
+            Value("Клиент: "), Coalesce(client_name, Value(""), output_field=CharField()), Value(", "), account,
+        )),
+        When(purpose__name__in=_purposes("io-withdrawal", "io-deposit"), then=_text(account, supplier)),
+        When(purpose__name__in=_purposes("bonus", "dt"), then=account),
+        default=_text(account, supplier, purpose),
+        output_field=CharField(),
+    )
+
+
+def _cash_flows():
+    return CashFlow.objects.annotate(
+        source=Value(CASH_FLOW, output_field=IntegerField()),
+        row_pk=F("pk"),
+        dt=F("created_at"),
+        type_label=_purpose_case(
+            {name: label for name, (_, label) in PURPOSE_TYPES.items()}, Value("Движение ДС")
+        ),
+        type_id=_purpose_case(
+            {name: type_id for name, (type_id, _) in PURPOSE_TYPES.items()}, Value("cf")
+        ),
+        info=_cash_flow_info(),
+        amount_value=ExpressionWrapper(F("amount"), output_field=DecimalField(max_digits=17, decimal_places=2)),
+        comment_text=Coalesce(F("comment"), Value(""), output_field=CharField()),
+        creator=_or_empty("created_by__username"),
+    )
+
+
+def _investor_operations():
+    return InvestorDebtOperation.objects.filter(operation_type="profit").annotate(
+        source=Value(INVESTOR_OPERATION, output_field=IntegerField()),
+        row_pk=F("pk"),
+        dt=F("created_at"),
+        type_label=Value("Инвестор: Прибыль", output_field=CharField()),
+        type_id=Value("io-profit", output_field=CharField()),
+        info=_text(Value("Инвестор: "), _or_empty("investor__name")),
+        amount_value=ExpressionWrapper(F("amount"), output_field=DecimalField(max_digits=17, decimal_places=2)),
+        comment_text=Value("", output_field=CharField()),
+        creator=_or_empty("created_by__username"),
+    )
+
+
+def money_log_rows(date="", type_id="", info="", amount="", comment="", created_by="", hidden=()):
+    """
+    Объединённый журнал с фильтрами по подстроке (type_id — точное
+    совпадение, created_by — имя пользователя или его id; дата и сумма —
+    по правилам main.filters). hidden — id строк вида cf-<id> / io-<id>,
+    которые исключаются из журнала.
+    """
+    parts = []
+    for source, rows in ((CASH_FLOW, _cash_flows()), (INVESTOR_OPERATION, _investor_operations())):
+        hidden_pks = integer_ids(hidden, f"{ID_PREFIXES[source]}-")
+        if hidden_pks:
+            rows = rows.exclude(pk__in=hidden_pks)
+        rows = filter_by_date(rows, "created_at", date)
+        if type_id:
+            rows = rows.filter(type_id=type_id)
+        if info:
+            rows = rows.filter(info__icontains=info)
+        rows = filter_by_amount(rows, "amount", amount)
+        if comment:
+            rows = rows.filter(comment_text__icontains=comment)
+        if created_by:
+            condition = Q(creator__icontains=created_by)
+            if created_by.isdigit():
+                condition |= Q(created_by_id=int(created_by))
+            rows = rows.filter(condition)
+        parts.append(rows.values(*COLUMNS))
+    return UnionAll(*parts)
+
+
+def log_id(row):
+    """id строки журнала вида cf-<id> / io-<id>"""
+    return f"{ID_PREFIXES[row['source']]}-{row['row_pk']}"
+
+
+class MoneyLogRow:
+    """Строка журнала для components/table_row.html"""
+    __slots__ = ("id", "dt", "date", "type", "type_id", "info", "amount", "comment", "created_by")
+
+    def __init__(self, row):
+        source = row["source"]
+        self.id = log_id(row)
+        self.dt = row["dt"]
+        self.date = timezone.localtime(self.dt).strftime("%d.%m.%Y %H:%M") if self.dt else ""
+        self.type = row["type_label"]
+        self.type_id = row["type_id"]
+        self.info = row["info"]
+        self.amount = Decimal(row["amount_value"]).quantize(AMOUNT_PLACES[source])
+        self.comment = row["comment_text"]
+        self.created_by = row["creator"]
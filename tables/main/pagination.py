@@ -0,0 +1,297 @@
+"""
+Постраничный вывод таблиц по курсору (keyset/seek).
+
+Вместо OFFSET следующая страница выбирается условием «строки после последней
+строки текущей страницы» по ключу сортировки и id, поэтому время ответа не
+растёт с номером страницы. Курсор — непрозрачная строка (base64 от JSON),
+в нём значения ключа граничной строки, направление и номер страницы, чтобы
+ответ сохранял привычные current_page/total_pages.
+
+Режим включается параметром запроса cursor (пустой — первая страница);
+без него эндпоинты работают через обычный Paginator и page.
+"""
+import base64
+import binascii
+import json
+import math
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+
+from django.core.exceptions import ValidationError
+from django.core.paginator import Paginator
+from django.db.models import F, Q, QuerySet
+from django.utils.functional import cached_property
+
+KEY_PREFIX = "page_key_"
+
+
+def order_expression(key, descending):
+    """Направление сортировки ключа: NULL первым по возрастанию и последним по убыванию"""
+    expression = F(key) if isinstance(key, str) else key
+    return expression.desc(nulls_last=True) if descending else expression.asc(nulls_first=True)
+
+
+def _encode_value(value):
+    if isinstance(value, datetime):
+        return {"dt": value.isoformat()}
+    if isinstance(value, Decimal):
+        return {"d": str(value)}
+    return value
+
+
+# Значения ключа, которые курсор хранит как есть (остальные — dt/d выше)
+PLAIN_VALUE_TYPES = (str, int, float, bool, type(None))
+
+
+def _decode_value(value):
+    if isinstance(value, dict):
+        if "dt" in value:
+            return datetime.fromisoformat(value["dt"])
+        if "d" in value:
+            return Decimal(value["d"])
+    if not isinstance(value, PLAIN_VALUE_TYPES):
+        raise ValueError("Некорректное значение ключа курсора")
+    return value
+
+
+def encode_cursor(values, number, backward=False):
+    payload = {"k": [_encode_value(value) for value in values], "p": number, "b": backward}
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor, size=None):
+    """
+    (значения ключа, номер страницы, назад ли) или None для пустого/битого
+    курсора, а также курсора с числом значений ключа, отличным от size.
+    """
+    if not cursor:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        payload = json.loads(raw)
+        if not isinstance(payload["k"], list) or (size is not None and len(payload["k"]) != size):
+            return None
+        return [_decode_value(value) for value in payload["k"]], max(int(payload["p"]), 1), bool(payload["b"])
+    except (binascii.Error, ValueError, KeyError, TypeError, InvalidOperation):
+        return None
+
+
+class UnionAll:
+    """
+    UNION ALL запросов .values() с одинаковыми колонками. Django не позволяет
+    фильтровать и аннотировать объединённый запрос, поэтому filter/annotate
+    применяются к каждой части, а объединение строится в order_by и count.
+    """
+
+    def __init__(self, *parts):
+        self.parts = parts
+
+    def annotate(self, **annotations):
+        return UnionAll(*[part.annotate(**annotations) for part in self.parts])
+
+    def filter(self, *args, **kwargs):
+        return UnionAll(*[part.filter(*args, **kwargs) for part in self.parts])
+
+    def _union(self):
+        # Части объединения не могут иметь своего ORDER BY (в т.ч. из Meta.ordering)
+        first, *rest = [part.order_by() for part in self.parts]
+        return first.union(*rest, all=True)
+
+    def order_by(self, *ordering):
+        return self._union().order_by(*ordering)
+
+    def count(self):
+        return self._union().count()
+
+
+class KeysetPage:
+    def __init__(self, object_list, number, has_previous, has_next, previous_cursor, next_cursor):
+        self.object_list = object_list
+        self.number = number
+        self._has_previous = has_previous
+        self._has_next = has_next
+        self.previous_cursor = previous_cursor
+        self.next_cursor = next_cursor
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_previous(self):
+        return self._has_previous
+
+    def has_next(self):
+        return self._has_next
+
+
+class KeysetPaginator:
+    """
+    ordering — список (выражение или имя поля, по убыванию ли). NULL считается
+    меньше любых значений: первым по возрастанию, последним по убыванию,
+    как по умолчанию в MySQL, поэтому сортировка может идти по индексу.
+    Для QuerySet id
+    добавляется последним ключом автоматически, для UnionAll последний ключ
+    должен быть уникальным. Для уже собранных списков строк ключи — имена
+    атрибутов, последний из них уникален, а список отсортирован в том же
+    порядке.
+    """
+
+    def __init__(self, object_list, ordering, per_page, count=None):
+        self.per_page = per_page
+        self._count = count
+        self.is_queryset = isinstance(object_list, (QuerySet, UnionAll))
+        ordering = list(ordering)
+        if isinstance(object_list, QuerySet) and (not ordering or ordering[-1][0] != "id"):
+            ordering.append(("id", False))
+        self.descending = [descending for _, descending in ordering]
+
+        if self.is_queryset:
+            self.names = [f"{KEY_PREFIX}{index}" for index in range(len(ordering))]
+            keys = {
+                name: F(key) if isinstance(key, str) else key
+                for name, (key, _) in zip(self.names, ordering)
+            }
+            self.object_list = object_list.annotate(**keys)
+        else:
+            self.names = [key for key, _ in ordering]
+            self.object_list = list(object_list)
+
+    @cached_property
+    def count(self):
+        if self._count is not None:
+            return self._count()
+        if self.is_queryset:
+            return self.object_list.count()
+        return len(self.object_list)
+
+    @property
+    def num_pages(self):
+        return max(math.ceil(self.count / self.per_page), 1)
+
+    def _key(self, obj):
+        if isinstance(obj, dict):
+            return [obj[name] for name in self.names]
+        return [getattr(obj, name) for name in self.names]
+
+    def _order_by(self, reverse):
+        return [
+            order_expression(name, descending != reverse)
+            for name, descending in zip(self.names, self.descending)
+        ]
+
+    @staticmethod
+    def _equal(name, value):
+        return Q(**{f"{name}__isnull": True}) if value is None else Q(**{name: value})
+
+    @staticmethod
+    def _after(name, value, greater):
+        """Строго дальше value по одному ключу; NULL меньше любых значений, None — пусто"""
+        if greater:
+            return Q(**{f"{name}__isnull": False}) if value is None else Q(**{f"{name}__gt": value})
+        if value is None:
+            return None
+        return Q(**{f"{name}__lt": value}) | Q(**{f"{name}__isnull": True})
+
+    def _beyond(self, values, reverse):
+        """Q-условие «строка дальше values» по порядку (или против него при reverse)"""
+        condition = None
+        for index, name in enumerate(self.names):
+            step = self._after(name, values[index], self.descending[index] == reverse)
+            if step is None:
+                continue
+            for prev_name, prev_value in zip(self.names[:index], values[:index]):
+                step &= self._equal(prev_name, prev_value)
+            condition = step if condition is None else condition | step
+        return condition
+
+    def _is_beyond(self, key, values, reverse):
+        for item, value, descending in zip(key, values, self.descending):
+            if item == value:
+                continue
+            if item is None or value is None:
+                return (item is None) == (descending != reverse)
+            return (item < value) == (descending != reverse)
+        return False
+
+    def _slice(self, values, reverse, limit):
+        if self.is_queryset:
+            rows = self.object_list
+            if values is not None:
+                rows = rows.filter(self._beyond(values, reverse))
+            return list(rows.order_by(*self._order_by(reverse))[:limit])
+        rows = self.object_list[::-1] if reverse else self.object_list
+        if values is not None:
+            rows = [row for row in rows if self._is_beyond(self._key(row), values, reverse)]
+        return rows[:limit]
+
+    def page(self, cursor=None):
+        """Страница по курсору; курсор не от этого порядка сортировки даёт первую страницу"""
+        decoded = decode_cursor(cursor, len(self.names))
+        if decoded is None:
+            values, number, backward = None, 1, False
+        else:
+            values, number, backward = decoded
+
+        try:
+            rows = self._slice(values, backward, self.per_page + 1)
+        except (TypeError, ValueError, ValidationError):
+            # Значения ключа не того типа, что поля сортировки
+            values, number, backward = None, 1, False
+            rows = self._slice(values, backward, self.per_page + 1)
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+
+        if backward:
+            rows.reverse()
+            number = max(number - 1, 1)
+            has_previous, has_next = has_more, True
+        else:
+            number = number + 1 if values is not None else 1
+            has_previous, has_next = values is not None, has_more
+
+        previous_cursor = encode_cursor(self._key(rows[0]), number, backward=True) if rows and has_previous else None
+        next_cursor = encode_cursor(self._key(rows[-1]), number) if rows and has_next else None
+        return KeysetPage(rows, number, has_previous, has_next, previous_cursor, next_cursor)
+
+
+class CountedPaginator(Paginator):
+    """Paginator, берущий число строк из функции count (например, из кэша)"""
+
+    def __init__(self, object_list, per_page, count, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self._count = count
+
+    @cached_property
+    def count(self):
+        return self._count()
+
+
+def paginate(request, object_list, ordering, per_page, count=None):
+    """
+    (paginator, page) для эндпоинта таблицы: по курсору, если передан параметр
+    cursor, иначе обычный Paginator по номеру page в том же порядке.
+    count — функция, возвращающая число строк вместо COUNT(*) по object_list.
+    """
+    if "cursor" in request.GET:
+        paginator = KeysetPaginator(object_list, ordering, per_page, count=count)
+        return paginator, paginator.page(request.GET.get("cursor"))
+
+    if isinstance(object_list, (QuerySet, UnionAll)):
+        object_list = object_list.order_by(*[
+            order_expression(key, descending) for key, descending in ordering
+        ])
+    if count is not None:
+        paginator = CountedPaginator(object_list, per_page, count)
+    else:
+        paginator = Paginator(object_list, per_page)
+    return paginator, paginator.get_page(request.GET.get("page", 1))
+
+
+def cursor_context(page):
+    """Курсоры соседних страниц для ответа; пусто в обычном постраничном режиме"""
+    if not isinstance(page, KeysetPage):
+        return {}
+    return {"next_cursor": page.next_cursor, "previous_cursor": page.previous_cursor}
@@ -0,0 +1,78 @@
+"""
+Кэш HTML строк таблиц.
+
+Строка сделки или движения ДС выводится одинаково для всех пользователей
+одной роли, пока не изменилась сама запись. HTML строки кэшируется по
+ключу (модель, pk, row_version, версия названий справочников, хеш схемы
+колонок, роль): row_version растёт при каждом save() и UPDATE через
+queryset, версия TableVersion.ROW_LABELS — при переименовании клиента,
+поставщика, счёта, назначения или пользователя. Страница читает все ключи
+одним cache.get_many и выводит заново только строки, которых нет в кэше.
+"""
+from django.core.cache import cache
+from django.core.exceptions import FieldDoesNotExist
+
+from .models import TableVersion
+from .row_renderer import compile_row
+from .schemas import schema_hash
+
+ROW_TIMEOUT = 60 * 60 * 24
+VERSION_FIELD = "row_version"
+
+
+def request_role(request):
+    user_type = getattr(request.user, "user_type", None)
+    return getattr(user_type, "name", "") or ""
+
+
+def _versioned(items):
+    """Строки — экземпляры модели с полем row_version"""
+    if not items:
+        return False
+    meta = getattr(items[0], "_meta", None)
+    if meta is None:
+        return False
+    try:
+        meta.get_field(VERSION_FIELD)
+    except FieldDoesNotExist:
+        return False
+    return True
+
+
+def _key(item, labels, schema, role):
+    return f"row:{item._meta.label_lower}:{item.pk}:{item.row_version}:{labels}:{schema}:{role}"
+
+
+def rendered_rows(request, fields, items):
+    """
+    HTML строк items списком, как compile_row(fields).render для каждой.
+    Строки моделей с row_version берутся из кэша, недостающие выводятся
+    и кладутся в кэш; прочие строки выводятся без кэша.
+    """
+    items = list(items)
+    renderer = compile_row(fields)
+    if not _versioned(items):
+        return [renderer.render(item) for item in items]
+
+    labels = TableVersion.current(TableVersion.ROW_LABELS)
+    # У схем реестра main.schemas хеш посчитан при запуске
+    schema = getattr(fields, "hash", None) or schema_hash(fields)
+    role = request_role(request)
+    keys = [_key(item, labels, schema, role) for item in items]
+    cached = cache.get_many(keys)
+
+    rows = []
+    missing = {}
+    for key, item in zip(keys, items):
+        html = cached.get(key)
+        if html is None:
+            html = missing[key] = renderer.render(item)
+        rows.append(html)
+    if missing:
+        cache.set_many(missing, ROW_TIMEOUT)
+    return rows
+
+
+def render_cached_rows(request, fields, items):
+    """HTML строк одной строкой, как row_renderer.render_rows"""
+    return "".join(rendered_rows(request, fields, items))
@@ -0,0 +1,228 @@
+"""
+Строки таблиц без шаблона components/table_row.html.
+
+Списки выводят до 200 строк на страницу, и render_to_string для каждой
+строки заново создаёт контекст шаблона, разрешает get_attr, format_date и
+вложенный checkbox.html. compile_row(fields) один раз разбирает схему колонок
+(словари get_transaction_fields, get_cash_flow_fields и т. п.) в список
+функций колонок, а render_rows выводит всю страницу за один проход.
+
+HTML совпадает с шаблоном байт в байт: те же пробелы и переводы строк,
+фильтры default/floatformat/yesno/format_date, локализация и экранирование
+значений через render_value_in_context. Проверка и сравнение скорости —
+команда benchmark_row_renderer. При правке table_row.html или checkbox.html
+нужно поправить и этот модуль.
+"""
+from collections.abc import Mapping
+from functools import lru_cache
+
+from django.template import Context
+from django.template.base import render_value_in_context
+from django.template.defaultfilters import floatformat, yesno
+
+from users.templatetags.components import StyleManager
+from users.templatetags.custom_filters import format_date
+
+CHECKBOX_STYLE = "css/checkbox.css"
+
+# Отступы table_row.html: перед {% with %}, перед {% if %}, после {% endif %}, после {% endwith %}
+FIELD_START = "\n        \n            "
+FIELD_END = "\n        \n    "
+
+
+def _context():
+    # Контекст только для настроек вывода значений (экранирование, l10n, пояс)
+    return Context(autoescape=True)
+
+
+def _call(value):
+    """Вызов вызываемого значения, как при разрешении переменной шаблона"""
+    if callable(value):
+        if getattr(value, "do_not_call_in_templates", False):
+            return value
+        if getattr(value, "alters_data", False):
+            return ""
+        try:
+            return value()
+        except TypeError:
+            return ""
+    return value
+
+
+def field_value(item, name):
+    """item|get_attr:name"""
+    value = item.get(name) if isinstance(item, dict) else getattr(item, name, None)
+    return _call(value)
+
+
+def type_display(item):
+    """item.get_type_display; отсутствующее значение — пустая строка"""
+    if isinstance(item, dict) and "get_type_display" in item:
+        return _call(item["get_type_display"])
+    return _call(getattr(item, "get_type_display", ""))
+
+
+def _compare(value, other, greater):
+    try:
+        return value > other if greater else value < other
+    except TypeError:
+        return False
+
+
+def _date_cell(name):
+    def render(item, context, counter):
+        value = format_date(field_value(item, name)) or ""
+        return f'\n                <td class="table__cell">{render_value_in_context(value, context)}</td>\n            '
+    return render
+
+
+def _boolean_cell(name):
+    def render(item, context, counter):
+        value = field_value(item, name)
+        label = yesno(value, "Да,Нет")
+        element_id = render_value_in_context(counter, context)
+        checked = "checked" if value and value != "false" and value != "False" else ""
+        text = f'<span class="checkbox__text">{render_value_in_context(label, context)}</span>' if label else ""
+        checkbox = (
+            '\n\n<div class="checkbox">\n'
+            '    <input type="checkbox"\n'
+            f'           id="{element_id}"\n'
+            '           class="checkbox__input"\n'
+            f'           name="{element_id}"\n'
+            f'           {checked}\n'
+            '           disabled>\n'
+            f'    <label for="{element_id}" class="checkbox__label">\n'
+            '        <span class="checkbox__box" ></span>\n'
+            f'        {text}\n'
+            '    </label>\n'
+            '</div>\n'
+        )
+        return (
+            '\n                \n                    <td class="table__cell">\n                        '
+            f'{checkbox}\n                    </td>\n                \n            '
+        )
+    return render
+
+
+def _type_sign_cell(css_class):
+    def render(item, context, counter):
+        value = render_value_in_context(type_display(item), context)
+        return f'\n                <td class="{css_class}">{value}</td>\n            '
+    return render
+
+
+def _value_cell(field, name):
+    is_number = bool(field.get("is_number"))
+    is_currency = bool(field.get("is_currency"))
+    number_class = " table__cell-number" if is_number else ""
+    indent = "\n                        "
+
+    if is_currency:
+        def text(value, context):
+            return indent + render_value_in_context(floatformat(value or "0", 2), context)
+    elif field.get("is_percent"):
+        def text(value, context):
+            return indent + render_value_in_context(value or "0", context)
+    elif is_number:
+        # {% if value is not None %} и {% if field.is_float %} вложены друг в друга
+        outer = indent + "\n                            "
+        inner = "\n                                "
+        closing = "\n                            \n                        "
+        if field.get("is_float"):
+            def number(value, context):
+                return render_value_in_context(floatformat(value, 2) or "0,00", context)
+        elif field.get("is_integer"):
+            def number(value, context):
+                return render_value_in_context(value or "", context)
+        else:
+            number = render_value_in_context
+
+        def text(value, context):
+            if value is None:
+                return outer + "\n                        "
+            return outer + inner + number(value, context) + closing
+    else:
+        def text(value, context):
+            return indent + render_value_in_context(value or "", context)
+
+    def render(item, context, counter):
+        value = field_value(item, name)
+        sign_class = ""
+        if is_currency:
+            if _compare(value, 0, True):
+                sign_class = " text-green"
+            elif _compare(value, 0, False):
+                sign_class = " text-red"
+        return (
+            f'\n                <td class="table__cell{number_class}{sign_class}">\n                    '
+            f'{text(value, context)}\n                    \n                </td>\n            '
+        )
+    return render
+
+
+def _cell(field):
+    name = field.get("name", "")
+    if field.get("is_date"):
+        return _date_cell(name)
+    if field.get("is_boolean"):
+        return _boolean_cell(name)
+    if field.get("is_type_sign"):
+        return _type_sign_cell("table__cell table__cell-sign")
+    if field.get("is_enum_field"):
+        return _type_sign_cell("table__cell")
+    return _value_cell(field, name)
+
+
+class RowRenderer:
+    """Скомпилированная схема колонок: render(item) — HTML одной строки"""
+
+    def __init__(self, fields):
+        self.cells = [_cell(field) for field in fields]
+        self.type_signs = sum(1 for field in fields if field.get("is_type_sign"))
+        if any(field.get("is_boolean") for field in fields):
+            StyleManager.add_style(CHECKBOX_STYLE)
+
+    def _row_class(self, item):
+        if not self.type_signs:
+            return ""
+        value = type_display(item)
+        css_class = "text-red" if value == "-" else "text-green" if value == "+" else ""
+        return css_class * self.type_signs
+
+    def render(self, item, context=None, counter=""):
+        """counter — forloop.parentloop.counter шаблона (id чекбоксов)"""
+        if context is None:
+            context = _context()
+        cells = "".join(FIELD_START + cell(item, context, counter) + FIELD_END for cell in self.cells)
+        return f'\n<tr class="table__row {self._row_class(item)}">\n    {cells}\n</tr>\n'
+
+    def render_rows(self, items):
+        context = _context()
+        return "".join(self.render(item, context) for item in items)
+
+
+def _freeze(value):
+    if isinstance(value, Mapping):
+        return tuple(sorted((key, _freeze(item)) for key, item in value.items()))
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(item) for item in value)
+    return value
+
+
+@lru_cache(maxsize=64)
+def _compiled(key):
+    return RowRenderer([dict(field) for field in key])
+
+
+def compile_row(fields):
+    """RowRenderer схемы fields; одинаковые схемы компилируются один раз"""
+    try:
+        return _compiled(_freeze(fields))
+    except TypeError:
+        # Нехешируемые значения в схеме — без кэша
+        return RowRenderer(fields)
+
+
+def render_rows(fields, items):
+    """HTML строк items, как render_to_string("components/table_row.html") для каждой"""
+    return compile_row(fields).render_rows(items)
@@ -0,0 +1,233 @@
+"""
+Реестр схем колонок таблиц.
+
+Схема — колонки для components/table.html и table_row.html. Раньше каждый
+запрос заново обходил model._meta (get_model_fields), сортировал колонки и
+вставлял вычисляемые. Теперь схемы строятся один раз при запуске
+(MainConfig.ready -> build) для каждой таблицы и роли и хранятся
+неизменяемыми: кортеж колонок только для чтения с хешем schema.hash для
+ключей кэша (main.row_cache, main.windows). Представления берут готовую
+схему через get(table, role) или for_request(table, request).
+"""
+import hashlib
+import json
+from collections.abc import Mapping
+from types import MappingProxyType
+
+from tables.utils import get_model_fields
+from users.models import User
+
+from .models import Client, Supplier, Transaction
+
+# Роли пользователей со своими схемами; прочие типы пользователей — ADMIN
+ADMIN = "admin"
+ACCOUNTANT = "accountant"
+ASSISTANT = "assistant"
+USER_TYPE_ROLES = {"Бухгалтер": ACCOUNTANT, "Ассистент": ASSISTANT}
+
+# Таблицы реестра
+TRANSACTIONS = "transactions"
+CASH_FLOW = "cash_flow"
+CLIENTS = "clients"
+SUPPLIERS = "suppliers"
+USERS = "users"
+
+
+def schema_hash(fields):
+    """Короткий хеш колонок: другая схема — другие ключи кэша"""
+    plain = [dict(field) if isinstance(field, Mapping) else field for field in fields]
+    text = json.dumps(plain, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha1(text.encode()).hexdigest()[:12]
+
+
+class Schema(tuple):
+    """Кортеж колонок только для чтения; hash — хеш схемы, name — (таблица, роль)"""
+
+    def __new__(cls, fields, name=None):
+        schema = super().__new__(cls, (MappingProxyType(dict(field)) for field in fields))
+        schema.hash = schema_hash(schema)
+        schema.name = name
+        return schema
+
+
+def _transaction_fields(role):
+    excluded = [
+        "id", "amount", "client_percentage", "bonus_percentage",
+        "supplier_percentage", "paid_amount", "modified_by_accountant",
+        "viewed_by_admin", "returned_date", "returned_by_supplier", "returned_bonus", "returned_to_client", "returned_to_investor",
+        "row_version",
+        *Transaction.STORED_DEBT_FIELDS,
+        *Transaction.DRIFT_FIELDS,
+        *Transaction.SEARCH_TEXT_FIELDS,
+    ]
+
+    field_order = [
+        "created_at", "client", "supplier", "account", "amount", "client_percentage",
+        "remaining_amount", "bonus_percentage", "bonus", "supplier_percentage", "profit",
+        "paid_amount", "debt", "documents"
+    ]
+
+    if role == ASSISTANT:
+        field_order = [
+            "created_at", "client", "supplier", "account", "amount", "paid_amount", "documents"
+        ]
+
+    fields = get_model_fields(
+        Transaction,
+        excluded_fields=excluded,
+        field_order=field_order,
+    )
+
+    insertions = [
+        (4, {"name": "amount", "verbose_name": "Сумма", "is_amount": True, }),
+        (5, {"name": "client_percentage", "verbose_name": "%", "is_percent": True, }),
+        (6, {"name": "remaining_amount", "verbose_name": "Выдать", "is_amount": True }),
+        (7, {"name": "bonus_percentage", "verbose_name": "%", "is_percent": True, }),
+        (8, {"name": "bonus", "verbose_name": "Бонус", "is_amount": True}),
+        (9, {"name": "supplier_percentage", "verbose_name": "%", "is_percent": True, }),
+        (10, {"name": "profit", "verbose_name": "Прибыль", "is_amount": True}),
+        (11, {"name": "paid_amount", "verbose_name": "Оплачено", "is_amount": True}),
+        (12, {"name": "debt", "verbose_name": "Долг", "is_amount": True}),
+    ]
+
+    if role == ASSISTANT:
+        insertions = [
+            (4, {"name": "amount", "verbose_name": "Сумма", "is_amount": True, }),
+            (5, {"name": "paid_amount", "verbose_name": "Оплачено", "is_amount": True}),
+        ]
+
+    for pos, field in insertions:
+        fields.insert(pos, field)
+
+    return fields
+
+
+def _cash_flow_fields(role):
+    fields = [
+        {"name": "created_at", "verbose_name": "Дата", "is_date": True},
+        {"name": "account", "verbose_name": "Счет", "is_relation": True},
+        {"name": "supplier", "verbose_name": "Поставщик", "is_relation": True},
+        {"name": "purpose", "verbose_name": "Назначение", "is_relation": True},
+        {"name": "comment", "verbose_name": "Комментарий"},
+        {"name": "created_by", "verbose_name": "Пользователь", "is_relation": True},
+    ]
+
+    insertions = [
+        (3, {"name": "formatted_amount", "verbose_name": "Сумма", "is_text": True}),
+    ]
+
+    for pos, field in insertions:
+        fields.insert(pos, field)
+
+    return fields
+
+
+def _client_fields(role):
+    excluded = [
+        "id",
+        "percentage",
+        "bonus_percentage"
+    ]
+    fields = get_model_fields(
+        Client,
+        excluded_fields=excluded,
+    )
+
+    insertions = [
+        (1, {"name": "percentage", "verbose_name": "%", "is_percent": True, }),
+        (3, {"name": "bonus_percentage", "verbose_name": "%", "is_percent": True, }),
+    ]
+
+    for pos, field in insertions:
+        fields.insert(pos, field)
+
+    return fields
+
+
+def _supplier_fields(role):
+    excluded = [
+        "id",
+        "cost_percentage",
+        "user",
+        "visible_for_assistant",
+        "default_account",
+        "visible_in_summary"
+    ]
+    fields = get_model_fields(
+        Supplier,
+        excluded_fields=excluded,
+    )
+
+    # Счета выводятся строкой supplier.accounts_display (без «Наличных»)
+    insertions = [
+        (2, {"name": "cost_percentage", "verbose_name": "%", "is_percent": True, }),
+        (3, {"name": "accounts_display", "verbose_name": "Счета"}),
+    ]
+
+    for pos, field in insertions:
+        fields.insert(pos, field)
+
+    return fields
+
+
+def _user_fields(role):
+    excluded = [
+        "id",
+        "data_joined",
+        "supplier",
+        "password",
+        "last_login",
+        "is_superuser",
+        "is_staff",
+        "email",
+        "branch",
+    ]
+    fields = get_model_fields(
+        User,
+        excluded_fields=excluded,
+    )
+
+    insertions = [
+        (0, {"name": "email", "verbose_name": "Почта", }),
+    ]
+
+    for pos, field in insertions:
+        fields.insert(pos, field)
+
+    return fields
+
+
+# Таблица -> (построитель колонок по роли, роли со своей схемой)
+BUILDERS = {
+    TRANSACTIONS: (_transaction_fields, (ADMIN, ACCOUNTANT, ASSISTANT)),
+    CASH_FLOW: (_cash_flow_fields, (ADMIN,)),
+    CLIENTS: (_client_fields, (ADMIN,)),
+    SUPPLIERS: (_supplier_fields, (ADMIN,)),
+    USERS: (_user_fields, (ADMIN,)),
+}
+
+SCHEMAS = {}
+
+
+def build():
+    """Строит все схемы реестра; вызывается из MainConfig.ready"""
+    SCHEMAS.clear()
+    for table, (builder, roles) in BUILDERS.items():
+        for role in roles:
+            SCHEMAS[table, role] = Schema(builder(role), name=(table, role))
+
+
+def get(table, role=ADMIN):
+    """Схема таблицы для роли; у таблиц без отдельной схемы роли — схема ADMIN"""
+    if not SCHEMAS:
+        build()
+    return SCHEMAS.get((table, role)) or SCHEMAS[table, ADMIN]
+
+
+def role_of(user):
+    user_type = getattr(user, "user_type", None)
+    return USER_TYPE_ROLES.get(getattr(user_type, "name", None), ADMIN)
+
+
+def for_request(table, request):
+    return get(table, role_of(request.user))
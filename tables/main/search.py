@@ -0,0 +1,365 @@
+"""
+Глобальный поиск по клиентам, поставщикам, сделкам, движениям ДС,
+переводам и погашениям долгов.
+
+Текст документа разбивается на слова (tokenize): нижний регистр, «ё» как
+«е», числа и даты целиком («15.03.2025», «1000.50»). Слова с весом поля
+хранятся в SearchToken и обновляются сигналами при каждой записи. Запрос
+ищет каждое слово по префиксу индекса — у русских слов длиннее четырёх букв
+сначала отбрасывается окончание, чтобы «оплаты» находило «оплата», — и
+возвращает документы, в которых нашлись все слова, по убыванию веса.
+Ассистенту не попадают документы поставщиков, скрытых от него
+(visible_for_assistant), как и в списках таблиц.
+"""
+import re
+from dataclasses import dataclass, field
+from decimal import Decimal
+from typing import Callable
+
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, Max, Q, Value, When
+from django.utils import timezone
+
+from .models import (
+    Account,
+    Branch,
+    CashFlow,
+    Client,
+    ClientDebtRepayment,
+    MoneyTransfer,
+    PaymentPurpose,
+    SearchToken,
+    Supplier,
+    SupplierDebtRepayment,
+    Transaction,
+)
+from .schemas import ASSISTANT, role_of
+
+TOKEN = re.compile(r"\d+(?:[.,]\d+)+|\w+")
+TOKEN_LENGTH = SearchToken._meta.get_field("token").max_length
+MAX_QUERY_TOKENS = 6
+DEFAULT_LIMIT = 30
+MAX_LIMIT = 100
+CHUNK_SIZE = 500
+
+# Окончания русских слов, отбрасываемые у слов запроса (самые длинные первыми)
+ENDINGS = sorted((
+    "ами", "ями", "ого", "его", "ому", "ему", "ыми", "ими", "ой", "ей", "ом", "ем", "ам", "ям",
+    "ах", "ях", "ов", "ев", "ый", "ий", "ая", "яя", "ое", "ее", "ые", "ие", "ую", "юю",
+    "а", "я", "ы", "и", "у", "ю", "е", "о", "ь",
+), key=len, reverse=True)
+CYRILLIC_WORD = re.compile(r"[а-я]+")
+
+
+def tokenize(text):
+    """Слова текста для индекса и запроса; однобуквенные слова пропускаются"""
+    text = str(text or "").lower().replace("ё", "е")
+    return [
+        token[:TOKEN_LENGTH] for token in TOKEN.findall(text)
+        if len(token) > 1 or token.isdigit()
+    ]
+
+
+def stem(token):
+    """Основа русского слова для поиска по префиксу: без окончания, не короче 4 букв"""
+    if not CYRILLIC_WORD.fullmatch(token) or len(token) <= 4:
+        return token
+    for ending in ENDINGS:
+        if token.endswith(ending) and len(token) - len(ending) >= 4:
+            return token[:-len(ending)]
+    return token
+
+
+def _amount(value):
+    if value is None:
+        return ""
+    value = Decimal(value)
+    return f"{value:.0f}" if value == value.to_integral() else f"{value:.2f}"
+
+
+def _date(value):
+    return timezone.localtime(value).strftime("%d.%m.%Y") if value else ""
+
+
+def _name(obj):
+    return str(obj) if obj else ""
+
+
+@dataclass(frozen=True)
+class SearchDocument:
+    """
+    Индексируемая модель: texts(obj) — [(текст, вес)], title/details/amount/
+    date — поля результата, depends — {модель справочника: поле документа},
+    чьё переименование меняет текст документа, assistant_visible — условие
+    на документы, видимые ассистенту (None — видны все).
+    """
+    kind: str
+    model: type
+    texts: Callable
+    title: Callable
+    details: Callable = lambda obj: ""
+    amount: Callable = lambda obj: None
+    date: Callable = lambda obj: None
+    related: tuple = ()
+    depends: dict = field(default_factory=dict)
+    assistant_visible: Q = None
+
+    def queryset(self):
+        return self.model.objects.select_related(*self.related)
+
+    def visible_to(self, user, queryset):
+        """queryset без документов, скрытых от пользователя user"""
+        if self.assistant_visible is None or user is None or role_of(user) != ASSISTANT:
+            return queryset
+        return queryset.filter(self.assistant_visible)
+
+
+DOCUMENTS = {document.kind: document for document in (
+    SearchDocument(
+        kind="client",
+        model=Client,
+        texts=lambda c: [(c.name, 5), (c.comment, 1)],
+        title=lambda c: c.name,
+        details=lambda c: c.comment or "",
+    ),
+    SearchDocument(
+        kind="supplier",
+        model=Supplier,
+        related=("branch",),
+        texts=lambda s: [(s.name, 5), (_name(s.branch), 1)],
+        title=lambda s: s.name,
+        details=lambda s: _name(s.branch),
+        depends={Branch: "branch"},
+        assistant_visible=Q(visible_for_assistant=True),
+    ),
+    SearchDocument(
+        kind="transaction",
+        model=Transaction,
+        related=("client", "supplier", "account"),
+        texts=lambda t: [
+            (_name(t.client), 2), (_name(t.supplier), 2), (_name(t.account), 1),
+            (_amount(t.amount), 3), (_amount(t.paid_amount), 2), (_date(t.created_at), 2),
+        ],
+        title=lambda t: " — ".join(name for name in (_name(t.client), _name(t.supplier)) if name),
+        details=lambda t: _name(t.account),
+        amount=lambda t: t.amount,
+        date=lambda t: t.created_at,
+        depends={Client: "client", Supplier: "supplier", Account: "account"},
+        # Как список сделок ассистента на главной странице
+        assistant_visible=Q(supplier__visible_for_assistant=True),
+    ),
+    SearchDocument(
+        kind="cash_flow",
+        model=CashFlow,
+        related=("account", "supplier", "purpose"),
+        texts=lambda cf: [
+            (cf.comment, 3), (_name(cf.purpose), 2), (_name(cf.supplier), 2), (_name(cf.account), 1),
+            (_amount(cf.amount), 3), (_date(cf.created_at), 2),
+        ],
+        title=lambda cf: _name(cf.purpose),
+        details=lambda cf: ", ".join(text for text in (_name(cf.account), _name(cf.supplier), cf.comment) if text),
+        amount=lambda cf: cf.amount,
+        date=lambda cf: cf.created_at,
+        depends={Supplier: "supplier", Account: "account", PaymentPurpose: "purpose"},
+        assistant_visible=~Q(supplier__visible_for_assistant=False),
+    ),
+    SearchDocument(
+        kind="money_transfer",
+        model=MoneyTransfer,
+        related=("source_account", "source_supplier", "destination_account", "destination_supplier"),
+        texts=lambda mt: [
+            (mt.comment, 3), (_name(mt.source_supplier), 2), (_name(mt.destination_supplier), 2),
+            (_name(mt.source_account), 1), (_name(mt.destination_account), 1),
+            (_amount(mt.amount), 3), (_date(mt.transfer_date), 2),
+        ],
+        title=lambda mt: str(mt),
+        details=lambda mt: mt.comment or "",
+        amount=lambda mt: mt.amount,
+        date=lambda mt: mt.transfer_date,
+        depends={
+            Supplier: ("source_supplier", "destination_supplier"),
+            Account: ("source_account", "destination_account"),
+        },
+        assistant_visible=(
+            ~Q(source_supplier__visible_for_assistant=False)
+            & ~Q(destination_supplier__visible_for_assistant=False)
+        ),
+    ),
+    SearchDocument(
+        kind="supplier_repayment",
+        model=SupplierDebtRepayment,
+        related=("supplier",),
+        texts=lambda r: [(r.comment, 3), (_name(r.supplier), 2), (_amount(r.amount), 3), (_date(r.created_at), 2)],
+        title=lambda r: _name(r.supplier),
+        details=lambda r: r.comment or "",
+        amount=lambda r: r.amount,
+        date=lambda r: r.created_at,
+        depends={Supplier: "supplier"},
+        assistant_visible=Q(supplier__visible_for_assistant=True),
+    ),
+    SearchDocument(
+        kind="client_repayment",
+        model=ClientDebtRepayment,
+        related=("client",),
+        texts=lambda r: [(r.comment, 3), (_name(r.client), 2), (_amount(r.amount), 3), (_date(r.created_at), 2)],
+        title=lambda r: _name(r.client),
+        details=lambda r: r.comment or "",
+        amount=lambda r: r.amount,
+        date=lambda r: r.created_at,
+        depends={Client: "client"},
+    ),
+)}
+
+DOCUMENT_BY_MODEL = {document.model: document for document in DOCUMENTS.values()}
+
+
+def document_tokens(document, obj):
+    """{слово: вес} документа; у повторяющегося слова — наибольший вес"""
+    tokens = {}
+    for text, weight in document.texts(obj):
+        for token in tokenize(text):
+            tokens[token] = max(tokens.get(token, 0), weight)
+    return tokens
+
+
+def index_objects(document, objects):
+    """Переписывает слова документов objects одним DELETE и одним INSERT"""
+    objects = list(objects)
+    if not objects:
+        return
+    with transaction.atomic():
+        SearchToken.objects.filter(kind=document.kind, object_id__in=[obj.pk for obj in objects]).delete()
+        SearchToken.objects.bulk_create([
+            SearchToken(kind=document.kind, object_id=obj.pk, token=token, weight=weight)
+            for obj in objects
+            for token, weight in document_tokens(document, obj).items()
+        ], batch_size=CHUNK_SIZE)
+
+
+def index_instance(instance):
+    document = DOCUMENT_BY_MODEL[type(instance)]
+    # Связанные справочники перечитываются одним запросом с select_related
+    index_objects(document, document.queryset().filter(pk=instance.pk))
+
+
+def unindex_instance(instance):
+    document = DOCUMENT_BY_MODEL[type(instance)]
+    SearchToken.objects.filter(kind=document.kind, object_id=instance.pk).delete()
+
+
+def index_queryset(document, queryset, chunk_size=CHUNK_SIZE):
+    """Переиндексирует строки queryset порциями по id; возвращает их число"""
+    indexed = 0
+    last_id = 0
+    while True:
+        chunk = list(queryset.filter(pk__gt=last_id).order_by("pk")[:chunk_size])
+        if not chunk:
+            return indexed
+        last_id = chunk[-1].pk
+        index_objects(document, chunk)
+        indexed += len(chunk)
+
+
+def reindex_dependents(instance):
+    """Переиндексирует документы, в текст которых входит название справочника instance"""
+    for document in DOCUMENTS.values():
+        lookups = document.depends.get(type(instance))
+        if not lookups:
+            continue
+        if isinstance(lookups, str):
+            lookups = (lookups,)
+        condition = Q()
+        for lookup in lookups:
+            condition |= Q(**{lookup: instance.pk})
+        index_queryset(document, document.queryset().filter(condition))
+
+
+def rebuild(chunk_size=CHUNK_SIZE):
+    """Полная перестройка индекса: {тип документа: число строк}"""
+    counts = {}
+    for kind, document in DOCUMENTS.items():
+        SearchToken.objects.filter(kind=kind).delete()
+        counts[kind] = index_queryset(document, document.queryset(), chunk_size)
+    return counts
+
+
+def _match(term):
+    """Вес совпадения слова индекса с term: целиком — вдвое больше, чем по префиксу"""
+    prefix = stem(term)
+    return Max(Case(
+        When(token=term, then=F("weight") * 2),
+        When(token__istartswith=prefix, then=F("weight")),
+        default=Value(0),
+        output_field=IntegerField(),
+    ))
+
+
+def _visible_tokens(tokens, user):
+    """Слова только тех документов, которые видны пользователю user"""
+    if user is None or role_of(user) != ASSISTANT:
+        return tokens
+    condition = Q()
+    for document in DOCUMENTS.values():
+        if document.assistant_visible is None:
+            condition |= Q(kind=document.kind)
+        else:
+            visible = document.visible_to(user, document.model.objects.all()).values("pk")
+            condition |= Q(kind=document.kind, object_id__in=visible)
+    return tokens.filter(condition)
+
+
+def search(query, kinds=None, limit=DEFAULT_LIMIT, user=None):
+    """
+    Документы, содержащие все слова query: [{type, type_name, id, title,
+    details, amount, date, score}] по убыванию score, затем новые первыми.
+    user — пользователь, для которого скрываются недоступные ему документы.
+    """
+    terms = list(dict.fromkeys(tokenize(query)))[:MAX_QUERY_TOKENS]
+    if not terms:
+        return []
+
+    tokens = _visible_tokens(SearchToken.objects.all(), user)
+    if kinds:
+        tokens = tokens.filter(kind__in=kinds)
+    any_term = Q()
+    for term in terms:
+        any_term |= Q(token__istartswith=stem(term))
+
+    names = [f"score_{index}" for index in range(len(terms))]
+    hits = (
+        tokens.filter(any_term)
+        .values("kind", "object_id")
+        .annotate(**{name: _match(term) for name, term in zip(names, terms)})
+        .filter(**{f"{name}__gt": 0 for name in names})
+        .annotate(score=sum((F(name) for name in names[1:]), F(names[0])))
+        .order_by("-score", "-object_id")[:limit]
+    )
+    hits = list(hits)
+
+    ids = {}
+    for hit in hits:
+        ids.setdefault(hit["kind"], []).append(hit["object_id"])
+    objects = {
+        kind: DOCUMENTS[kind].visible_to(user, DOCUMENTS[kind].queryset()).in_bulk(kind_ids)
+        for kind, kind_ids in ids.items()
+    }
+
+    results = []
+    for hit in hits:
+        document = DOCUMENTS[hit["kind"]]
+        obj = objects[hit["kind"]].get(hit["object_id"])
+        if obj is None:
+            continue
+        amount = document.amount(obj)
+        date = document.date(obj)
+        results.append({
+            "type": document.kind,
+            "type_name": str(document.model._meta.verbose_name),
+            "id": obj.pk,
+            "title": document.title(obj),
+            "details": document.details(obj),
+            "amount": float(amount) if amount is not None else None,
+            "date": timezone.localtime(date).strftime("%d.%m.%Y %H:%M") if date else "",
+            "score": hit["score"],
+        })
+    return results
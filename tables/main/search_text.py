@@ -0,0 +1,163 @@
+"""
+Хранимый текст дат и сумм для фильтров колонок по подстроке.
+
+Фильтр «03.2025» или «150» раньше форматировал дату или сумму каждой строки
+в запросе (Extract/Concat/CAST), и индекс использоваться не мог. Теперь у
+строки есть колонки SearchTextField с уже отформатированным значением: для
+даты — все форматы, в которых её ищут, через SEPARATOR, для суммы — число
+как его выводит CAST. Колонки заполняются при каждом save() (после
+auto_now_add), массово — refresh_search_text() одним UPDATE.
+
+В MySQL на колонках FULLTEXT-индекс с парсером ngram: фрагмент из цифр и
+знаков даты сначала ищется фразой по индексу, затем точно через LIKE, так
+что результат тот же, что у подстроки.
+"""
+import re
+from datetime import timezone as dt_timezone
+from decimal import Decimal
+
+from django.db import connections, models
+from django.db.models import BooleanField, Case, CharField, DateTimeField, ExpressionWrapper, F, Func, Value, When
+from django.db.models.expressions import Expression
+from django.db.models.functions import (
+    Cast,
+    Coalesce,
+    Concat,
+    ExtractDay,
+    ExtractHour,
+    ExtractMinute,
+    ExtractMonth,
+    ExtractYear,
+    LPad,
+)
+from django.utils import timezone
+
+SEPARATOR = "|"
+
+# Форматы даты в списке транзакций (в UTC, как хранится) и в движениях ДС
+TRANSACTION_DATE_FORMATS = ("%d.%m.%Y %H:%M", "%Y-%m-%d %H:%M", "%d.%m %H:%M")
+LOCAL_DATE_FORMATS = ("%d.%m.%Y %H:%M",)
+
+DATE_PARTS = {
+    "%d": (ExtractDay, 2),
+    "%m": (ExtractMonth, 2),
+    "%Y": (ExtractYear, 4),
+    "%H": (ExtractHour, 2),
+    "%M": (ExtractMinute, 2),
+}
+
+# Фрагменты, которые ищутся по ngram-индексу: без пробелов (их парсер
+# отбрасывает) и не короче ngram_token_size (по умолчанию 2)
+NGRAM_QUERY = re.compile(r"[0-9.:\-]{2,}")
+
+
+def _concat(pieces):
+    """Concat сбалансированным деревом: длинная цепочка пар переполняет парсер SQLite"""
+    if len(pieces) == 1:
+        return pieces[0]
+    middle = len(pieces) // 2
+    return Concat(_concat(pieces[:middle]), _concat(pieces[middle:]), output_field=CharField())
+
+
+class SearchTextField(models.CharField):
+    """
+    Текст поля source для поиска по подстроке. formats — форматы даты
+    (local — в местном времени), без них source — сумма.
+    """
+
+    def __init__(self, *args, source=None, formats=(), local=False, **kwargs):
+        self.source = source
+        self.formats = tuple(formats)
+        self.local = local
+        kwargs.setdefault("max_length", 64)
+        kwargs.setdefault("default", "")
+        kwargs.setdefault("blank", True)
+        kwargs.setdefault("editable", False)
+        super().__init__(*args, **kwargs)
+
+    def deconstruct(self):
+        name, path, args, kwargs = super().deconstruct()
+        kwargs["source"] = self.source
+        if self.formats:
+            kwargs["formats"] = self.formats
+        if self.local:
+            kwargs["local"] = True
+        return name, path, args, kwargs
+
+    def pre_save(self, model_instance, add):
+        value = getattr(model_instance, self.source)
+        text = self.expression() if isinstance(value, Expression) else self.text(value)
+        setattr(model_instance, self.attname, text)
+        return text
+
+    def text(self, value):
+        """Текст значения поля source, как его строит expression()"""
+        if value is None:
+            return ""
+        if self.formats:
+            value = timezone.localtime(value) if self.local else value.astimezone(dt_timezone.utc)
+            return SEPARATOR.join(value.strftime(date_format) for date_format in self.formats)
+        field = self.model._meta.get_field(self.source)
+        value = field.to_python(value).quantize(Decimal(1).scaleb(-field.decimal_places))
+        return f"{abs(value) if value == 0 else value:f}"
+
+    def expression(self):
+        """Тот же текст выражением БД для массового UPDATE"""
+        if not self.formats:
+            return Coalesce(Cast(self.source, CharField()), Value(""), output_field=CharField())
+
+        source = F(self.source)
+        if self.local:
+            # Сдвиг на текущее смещение пояса, как в filters.local_date_text
+            offset = timezone.localtime().utcoffset()
+            source = ExpressionWrapper(source + Value(offset), output_field=DateTimeField())
+
+        pieces = []
+        for index, date_format in enumerate(self.formats):
+            if index:
+                pieces.append(Value(SEPARATOR))
+            for token in re.findall(r"%.|[^%]+", date_format):
+                if token in DATE_PARTS:
+                    extract, width = DATE_PARTS[token]
+                    pieces.append(LPad(Cast(extract(source, tzinfo=dt_timezone.utc), CharField()), width, Value("0")))
+                else:
+                    pieces.append(Value(token))
+        return Case(
+            When(**{f"{self.source}__isnull": True}, then=Value("")),
+            default=_concat(pieces),
+            output_field=CharField(),
+        )
+
+
+def search_text_fields(model):
+    return [field for field in model._meta.concrete_fields if isinstance(field, SearchTextField)]
+
+
+def refresh_search_text(queryset):
+    """Пересчитывает хранимый текст одним SQL UPDATE (для изменений в обход save())"""
+    return queryset.update(**{
+        field.name: field.expression() for field in search_text_fields(queryset.model)
+    })
+
+
+class NgramMatch(Func):
+    """MATCH ... AGAINST фразы в режиме BOOLEAN по FULLTEXT-индексу с парсером ngram"""
+    output_field = BooleanField()
+
+    def __init__(self, field, phrase):
+        super().__init__(F(field))
+        self.phrase = phrase
+
+    def as_sql(self, compiler, connection, **extra_context):
+        sql, params = compiler.compile(self.source_expressions[0])
+        return f"MATCH ({sql}) AGAINST (%s IN BOOLEAN MODE)", [*params, f'"{self.phrase}"']
+
+
+def filter_contains(queryset, field, text):
+    """Строки, у которых хранимый текст field содержит text"""
+    if SEPARATOR in text:
+        return queryset.none()
+    queryset = queryset.filter(**{f"{field}__contains": text})
+    if connections[queryset.db].vendor == "mysql" and NGRAM_QUERY.fullmatch(text):
+        queryset = queryset.filter(NgramMatch(field, text))
+    return queryset
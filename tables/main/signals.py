@@ -0,0 +1,231 @@
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from users.models import User
+
+from . import search
+from .models import Account, Branch, BranchDebt, CashFlow, Client, ClientDebtRepayment, InvestorDebtOperation, LedgerSummary, MoneyTransfer, PaymentPurpose, Supplier, SupplierDebtRepayment, TableVersion, Transaction
+
+
+# Доля записи до изменения запоминается на экземпляре, после изменения
+# к итогам LedgerSummary прибавляется разница.
+
+@receiver(pre_save, sender=Transaction)
+@receiver(pre_delete, sender=Transaction)
+def remember_transaction_share(sender, instance, **kwargs):
+    instance._ledger_share = LedgerSummary.transaction_share(instance.pk)
+    instance._branch_share = BranchDebt.transaction_share(instance.pk)
+
+
+@receiver(post_save, sender=Transaction)
+def update_ledger_on_transaction_save(sender, instance, **kwargs):
+    LedgerSummary.apply_change(
+        getattr(instance, "_ledger_share", None),
+        LedgerSummary.transaction_share(instance.pk),
+    )
+    BranchDebt.apply_change(
+        getattr(instance, "_branch_share", None),
+        BranchDebt.transaction_share(instance.pk),
+    )
+
+
+@receiver(post_delete, sender=Transaction)
+def update_ledger_on_transaction_delete(sender, instance, **kwargs):
+    LedgerSummary.apply_change(getattr(instance, "_ledger_share", None), None)
+    BranchDebt.apply_change(getattr(instance, "_branch_share", None), None)
+
+
+@receiver(pre_save, sender=CashFlow)
+@receiver(pre_delete, sender=CashFlow)
+def remember_cashflow_share(sender, instance, **kwargs):
+    instance._ledger_share = LedgerSummary.cashflow_share(instance.pk)
+
+
+@receiver(post_save, sender=CashFlow)
+def update_ledger_on_cashflow_save(sender, instance, **kwargs):
+    LedgerSummary.apply_change(
+        getattr(instance, "_ledger_share", None),
+        LedgerSummary.cashflow_share(instance.pk),
+    )
+
+
+@receiver(post_delete, sender=CashFlow)
+def update_ledger_on_cashflow_delete(sender, instance, **kwargs):
+    LedgerSummary.apply_change(getattr(instance, "_ledger_share", None), None)
+
+
+# Переименование клиента "ДТ" или назначения платежа меняет состав итогов
+# целиком, поэтому в этих случаях итоги пересчитываются.
+
+@receiver(pre_save, sender=Client)
+def remember_client_name(sender, instance, **kwargs):
+    instance._ledger_name = (
+        Client.objects.filter(pk=instance.pk).values_list("name", flat=True).first()
+        if instance.pk else None
+    )
+
+
+@receiver(post_save, sender=Client)
+def rebuild_ledger_on_client_rename(sender, instance, created, **kwargs):
+    old_name = getattr(instance, "_ledger_name", None)
+    if not created and old_name != instance.name and LedgerSummary.DT_CLIENT_NAME.lower() in (
+        (old_name or "").lower(), (instance.name or "").lower()
+    ):
+        LedgerSummary.rebuild()
+
+
+@receiver(pre_save, sender=PaymentPurpose)
+def remember_purpose(sender, instance, **kwargs):
+    instance._ledger_purpose = (
+        PaymentPurpose.objects.filter(pk=instance.pk).values_list("name", "operation_type").first()
+        if instance.pk else None
+    )
+
+
+@receiver(post_save, sender=PaymentPurpose)
+def rebuild_ledger_on_purpose_change(sender, instance, created, **kwargs):
+    old_purpose = getattr(instance, "_ledger_purpose", None)
+    if not created and old_purpose != (instance.name, instance.operation_type):
+        LedgerSummary.rebuild()
+
+
+@receiver(post_save, sender=Branch)
+def create_branch_debt(sender, instance, created, **kwargs):
+    if created:
+        BranchDebt.objects.get_or_create(branch=instance)
+
+
+# Перевод поставщика в другой филиал переносит весь его долг.
+
+@receiver(pre_save, sender=Supplier)
+def remember_supplier_branch(sender, instance, **kwargs):
+    instance._old_branch_id = (
+        Supplier.objects.filter(pk=instance.pk).values_list("branch_id", flat=True).first()
+        if instance.pk else None
+    )
+
+
+@receiver(post_save, sender=Supplier)
+def rebuild_branch_debt_on_supplier_move(sender, instance, created, **kwargs):
+    old_branch_id = getattr(instance, "_old_branch_id", None)
+    if not created and old_branch_id != instance.branch_id:
+        BranchDebt.rebuild([old_branch_id, instance.branch_id])
+
+
+# Погашение долга филиала сверяет его счётчик с транзакциями.
+
+@receiver(post_save, sender=SupplierDebtRepayment)
+@receiver(post_delete, sender=SupplierDebtRepayment)
+def rebuild_branch_debt_on_repayment(sender, instance, **kwargs):
+    branch_id = Supplier.objects.filter(pk=instance.supplier_id).values_list("branch_id", flat=True).first()
+    if branch_id:
+        BranchDebt.rebuild([branch_id])
+
+
+# Любая запись в транзакции, движения ДС и справочники, чьи названия
+# показываются вместе с ними, увеличивает версию TableVersion.TRANSACTIONS:
+# по ней сбрасываются кэшированные числа строк (main.counts) и окна строк
+# (main.windows).
+
+@receiver(post_save, sender=Transaction)
+@receiver(post_delete, sender=Transaction)
+@receiver(post_save, sender=CashFlow)
+@receiver(post_delete, sender=CashFlow)
+@receiver(post_save, sender=Client)
+@receiver(post_save, sender=Supplier)
+@receiver(post_save, sender=PaymentPurpose)
+def bump_transactions_version(sender, instance, **kwargs):
+    TableVersion.bump()
+
+
+# Операции инвесторов и погашения клиентов входят в журнал денежных
+# операций вместе с движениями ДС; их запись сбрасывает кэш числа строк журнала.
+
+@receiver(post_save, sender=InvestorDebtOperation)
+@receiver(post_delete, sender=InvestorDebtOperation)
+@receiver(post_save, sender=ClientDebtRepayment)
+@receiver(post_delete, sender=ClientDebtRepayment)
+def bump_money_logs_version(sender, instance, **kwargs):
+    TableVersion.bump(TableVersion.MONEY_LOGS)
+
+
+# Глобальный поиск: документ переиндексируется при каждой записи, а при
+# переименовании справочника — все документы, где встречается его название.
+
+@receiver(post_save, sender=Client)
+@receiver(post_save, sender=Supplier)
+@receiver(post_save, sender=Transaction)
+@receiver(post_save, sender=CashFlow)
+@receiver(post_save, sender=MoneyTransfer)
+@receiver(post_save, sender=SupplierDebtRepayment)
+@receiver(post_save, sender=ClientDebtRepayment)
+def update_search_index(sender, instance, **kwargs):
+    search.index_instance(instance)
+
+
+@receiver(post_delete, sender=Client)
+@receiver(post_delete, sender=Supplier)
+@receiver(post_delete, sender=Transaction)
+@receiver(post_delete, sender=CashFlow)
+@receiver(post_delete, sender=MoneyTransfer)
+@receiver(post_delete, sender=SupplierDebtRepayment)
+@receiver(post_delete, sender=ClientDebtRepayment)
+def remove_from_search_index(sender, instance, **kwargs):
+    search.unindex_instance(instance)
+
+
+@receiver(pre_save, sender=Client)
+@receiver(pre_save, sender=Supplier)
+@receiver(pre_save, sender=Account)
+@receiver(pre_save, sender=PaymentPurpose)
+@receiver(pre_save, sender=Branch)
+def remember_search_name(sender, instance, **kwargs):
+    instance._search_name = (
+        sender.objects.filter(pk=instance.pk).values_list("name", flat=True).first()
+        if instance.pk else None
+    )
+
+
+@receiver(post_save, sender=Client)
+@receiver(post_save, sender=Supplier)
+@receiver(post_save, sender=Account)
+@receiver(post_save, sender=PaymentPurpose)
+@receiver(post_save, sender=Branch)
+def reindex_search_on_rename(sender, instance, created, **kwargs):
+    if not created and getattr(instance, "_search_name", None) != instance.name:
+        search.reindex_dependents(instance)
+
+
+# Строки таблиц показывают названия справочников и автора движения ДС: их
+# переименование или удаление сбрасывает весь кэш HTML строк (main.row_cache).
+
+@receiver(post_save, sender=Client)
+@receiver(post_save, sender=Supplier)
+@receiver(post_save, sender=Account)
+@receiver(post_save, sender=PaymentPurpose)
+def bump_row_labels_on_rename(sender, instance, created, **kwargs):
+    if not created and getattr(instance, "_search_name", None) != instance.name:
+        TableVersion.bump(TableVersion.ROW_LABELS)
+
+
+@receiver(pre_save, sender=User)
+def remember_username(sender, instance, **kwargs):
+    instance._row_label = (
+        User.objects.filter(pk=instance.pk).values_list("username", flat=True).first()
+        if instance.pk else None
+    )
+
+
+@receiver(post_save, sender=User)
+def bump_row_labels_on_user_rename(sender, instance, created, **kwargs):
+    if not created and getattr(instance, "_row_label", None) != instance.username:
+        TableVersion.bump(TableVersion.ROW_LABELS)
+
+
+@receiver(post_delete, sender=Client)
+@receiver(post_delete, sender=Supplier)
+@receiver(post_delete, sender=Account)
+@receiver(post_delete, sender=PaymentPurpose)
+@receiver(post_delete, sender=User)
+def bump_row_labels_on_delete(sender, instance, **kwargs):
+    TableVersion.bump(TableVersion.ROW_LABELS)
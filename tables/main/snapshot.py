@@ -0,0 +1,209 @@
+"""
+Снимок баланса компании: активы, обязательства, дебиторы, кредиторы и капитал.
+
+Обычный путь (build_balance_snapshot) берёт долги из нарастающих итогов
+LedgerSummary и BranchDebt и не читает таблицу транзакций вовсе.
+scan_balance_snapshot считает те же цифры заново за один потоковый проход
+по оплаченным транзакциям и один по движениям ДС — для сверки итогов
+и для команды benchmark_balance_snapshot.
+"""
+from collections import defaultdict
+from dataclasses import dataclass, field, replace
+from decimal import Decimal
+
+from django.db.models import Exists, F, OuterRef, Sum, Value
+from django.db.models.functions import Coalesce
+
+from .models import (
+    Account,
+    BalanceData,
+    Branch,
+    BranchDebt,
+    Credit,
+    InventoryItem,
+    Investor,
+    LedgerSummary,
+    ShortTermLiability,
+    Supplier,
+    SupplierAccount,
+    Transaction,
+)
+
+# Филиалы, долги которых не входят в дебиторскую задолженность
+EXCLUDED_BRANCHES = ("Филиал 1", "Наши ИП")
+
+SCAN_CHUNK_SIZE = 2000
+
+
+@dataclass(frozen=True)
+class BranchDebtLine:
+    id: int
+    name: str
+    debt: Decimal
+    has_suppliers: bool = True
+
+    @property
+    def counted(self):
+        return self.name not in EXCLUDED_BRANCHES
+
+
+@dataclass(frozen=True)
+class BalanceSnapshot:
+    branches: tuple
+    bonus_debt: Decimal
+    client_debt: Decimal
+    client_debt_paid: Decimal
+    dt_client_debt_paid: Decimal
+    investor_debt: Decimal
+    # Статьи баланса; заполняются только при with_sheet=True
+    equipment: Decimal = Decimal(0)
+    safe_amount: Decimal = Decimal(0)
+    inventory: tuple = field(default=())
+    credits: tuple = field(default=())
+    short_term: tuple = field(default=())
+    investors: tuple = field(default=())
+
+    @property
+    def client_debt_paid_without_dt(self):
+        return self.client_debt_paid - self.dt_client_debt_paid
+
+    @property
+    def debtors(self):
+        """Филиалы с поставщиками, входящие в дебиторскую задолженность"""
+        return [line for line in self.branches if line.counted and line.has_suppliers]
+
+    @property
+    def total_branch_debts(self):
+        return sum((line.debt for line in self.branches if line.counted), Decimal(0))
+
+    @property
+    def creditors_total(self):
+        return self.bonus_debt + self.client_debt_paid_without_dt + self.investor_debt
+
+    @property
+    def inventory_total(self):
+        return sum((item.total or Decimal(0) for item in self.inventory), Decimal(0))
+
+    @property
+    def credit_total(self):
+        return sum((credit.amount or Decimal(0) for credit in self.credits), Decimal(0))
+
+    @property
+    def short_total(self):
+        return sum((item.amount or Decimal(0) for item in self.short_term), Decimal(0))
+
+    @property
+    def investors_total(self):
+        return sum((investor.balance or Decimal(0) for investor in self.investors), Decimal(0))
+
+    @property
+    def assets(self):
+        return self.equipment + self.inventory_total + self.total_branch_debts + self.safe_amount
+
+    @property
+    def liabilities(self):
+        """Обязательства без капитала"""
+        return self.credit_total + self.short_total + self.creditors_total + self.investors_total
+
+    @property
+    def capital(self):
+        return self.assets - self.liabilities
+
+
+def _branches(branch_ids=None):
+    branches = Branch.objects.annotate(
+        has_suppliers=Exists(Supplier.objects.filter(branch=OuterRef("pk")))
+    )
+    if branch_ids is not None:
+        branches = branches.filter(id__in=branch_ids)
+    return list(branches.values_list("id", "name", "has_suppliers"))
+
+
+def _sheet():
+    equipment = BalanceData.objects.filter(name="Оборудование").aggregate(total=Sum("amount"))["total"] or Decimal(0)
+
+    safe_amount = SupplierAccount.objects.filter(
+        supplier__visible_in_summary=True
+    ).exclude(account__name__iexact="Наличные").aggregate(total=Sum("balance"))["total"] or Decimal(0)
+    cash_account = Account.objects.filter(name__iexact="Наличные").first()
+    if cash_account and cash_account.balance is not None:
+        safe_amount = Decimal(safe_amount) + Decimal(cash_account.balance)
+
+    return {
+        "equipment": equipment,
+        "safe_amount": Decimal(safe_amount),
+        "inventory": tuple(InventoryItem.objects.all().order_by("name")),
+        "credits": tuple(Credit.objects.all().order_by("name")),
+        "short_term": tuple(ShortTermLiability.objects.all().order_by("name")),
+        "investors": tuple(Investor.objects.all().order_by("name")),
+    }
+
+
+def build_balance_snapshot(branch_ids=None, with_sheet=False):
+    """Снимок по нарастающим итогам; branch_ids ограничивает список филиалов"""
+    branches = _branches(branch_ids)
+    debts = BranchDebt.by_branch([branch_id for branch_id, _, _ in branches] if branch_ids is not None else None)
+    ledger = LedgerSummary.current()
+
+    snapshot = BalanceSnapshot(
+        branches=tuple(
+            BranchDebtLine(branch_id, name, debts.get(branch_id) or Decimal(0), has_suppliers)
+            for branch_id, name, has_suppliers in branches
+        ),
+        bonus_debt=ledger.bonus_debt,
+        client_debt=ledger.client_debt,
+        client_debt_paid=ledger.client_debt_paid,
+        dt_client_debt_paid=ledger.dt_client_debt_paid,
+        investor_debt=ledger.investor_debt,
+    )
+    if with_sheet:
+        snapshot = replace(snapshot, **_sheet())
+    return snapshot
+
+
+def scan_balance_snapshot(with_sheet=False):
+    """Тот же снимок, посчитанный одним проходом по транзакциям без нарастающих итогов"""
+    branch_debts = defaultdict(Decimal)
+    totals = defaultdict(Decimal)
+    dt_name = LedgerSummary.DT_CLIENT_NAME.lower()
+
+    rows = Transaction.objects.filter(paid_amount__gt=0).order_by().values_list(
+        "supplier__branch_id",
+        "client__name",
+        "stored_supplier_debt",
+        "stored_bonus_debt",
+        "stored_client_debt",
+        "stored_client_debt_paid",
+        "stored_profit",
+        "stored_investor_debt",
+    )
+    for branch_id, client_name, supplier_debt, bonus_debt, client_debt, client_debt_paid, profit, investor_debt \
+            in rows.iterator(chunk_size=SCAN_CHUNK_SIZE):
+        if branch_id:
+            branch_debts[branch_id] += supplier_debt
+        totals["bonus_debt"] += bonus_debt
+        totals["client_debt"] += client_debt
+        totals["client_debt_paid"] += client_debt_paid
+        if (client_name or "").lower() == dt_name:
+            totals["dt_client_debt_paid"] += client_debt_paid
+        if bonus_debt == 0 and client_debt == 0 and profit > 0:
+            totals["investor_debt"] += investor_debt
+
+    totals["investor_debt"] += LedgerSummary._investor_cashflows().aggregate(
+        total=Sum(F("amount") - Coalesce(F("returned_to_investor"), Value(Decimal(0))))
+    )["total"] or Decimal(0)
+
+    snapshot = BalanceSnapshot(
+        branches=tuple(
+            BranchDebtLine(branch_id, name, branch_debts[branch_id], has_suppliers)
+            for branch_id, name, has_suppliers in _branches()
+        ),
+        bonus_debt=totals["bonus_debt"],
+        client_debt=totals["client_debt"],
+        client_debt_paid=totals["client_debt_paid"],
+        dt_client_debt_paid=totals["dt_client_debt_paid"],
+        investor_debt=totals["investor_debt"],
+    )
+    if with_sheet:
+        snapshot = replace(snapshot, **_sheet())
+    return snapshot
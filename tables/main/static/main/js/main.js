@@ -244,6 +244,90 @@ const setIds = (ids, tableId) => {
 	}
 }
 
+// Догружает остальные порции списка панели должников (page 2..totalPages)
+// колоночным JSON по мере надобности: следующая порция запрашивается, когда
+// кнопка «Показать ещё» под таблицей попадает в область видимости при
+// прокрутке, или по клику на неё. Строкам порции сразу ставится data-id,
+// после каждой порции вызывается onPage. С prepend порции добавляются над
+// уже выведенными строками (список отдаётся порциями от новых к старым)
+const attachDetailPages = (
+	url,
+	pageParam,
+	totalPages,
+	tableId,
+	columnsKey,
+	idsKey,
+	onPage,
+	prepend = false,
+) => {
+	const table = document.getElementById(tableId)
+	const tbody = table ? table.querySelector('.table__body') : null
+	const lastPage = Number(totalPages) || 1
+	if (!tbody || lastPage < 2) return
+
+	const more = document.createElement('button')
+	more.type = 'button'
+	more.className = 'button debtors-details-more'
+	more.textContent = 'Показать ещё'
+	;(table.closest('.table-container') || table).after(more)
+
+	let page = 1
+	let loading = false
+	let visible = false
+	let observer = null
+
+	const finish = () => {
+		if (observer) observer.disconnect()
+		more.remove()
+	}
+
+	const loadNext = async () => {
+		if (loading || page >= lastPage) return
+		loading = true
+		more.disabled = true
+		try {
+			const response = await fetch(`${url}&${pageParam}=${page + 1}&format=columns`)
+			if (!response.ok) throw new Error('Ошибка при загрузке данных.')
+			const chunk = await response.json()
+
+			const rows = document.createElement('template')
+			rows.innerHTML = TableManager.buildRowsHTML(chunk[columnsKey])
+			const ids = chunk[idsKey] || []
+			rows.content.querySelectorAll('tr').forEach((row, index) => {
+				if (index < ids.length) row.setAttribute('data-id', ids[index])
+			})
+			tbody.insertBefore(
+				rows.content,
+				prepend ? tbody.firstElementChild : tbody.querySelector('.table__row--summary'),
+			)
+			page++
+			if (onPage) onPage()
+		} catch (error) {
+			showError(error.message || 'Ошибка при загрузке данных.')
+			finish()
+			return
+		} finally {
+			loading = false
+			more.disabled = false
+		}
+
+		if (page >= lastPage) {
+			finish()
+		} else if (visible) {
+			loadNext()
+		}
+	}
+
+	more.addEventListener('click', loadNext)
+	if ('IntersectionObserver' in window) {
+		observer = new IntersectionObserver(entries => {
+			visible = entries.some(entry => entry.isIntersecting)
+			if (visible) loadNext()
+		})
+		observer.observe(more)
+	}
+}
+
 const setColumnIds = (ids, tableId) => {
 	const headerCells = document.querySelectorAll(`#${tableId} thead th`)
 	const columnsToProcess = headerCells.length - 2
@@ -4875,11 +4959,10 @@ const handleDebtors = async () => {
 					document.body.appendChild(loader)
 
 					try {
-						const response = await fetch(
-							`/suppliers/debtors/details/?type=${type}&value=${encodeURIComponent(
-								value,
-							)}`,
-						)
+						const detailsUrl = `/suppliers/debtors/details/?type=${type}&value=${encodeURIComponent(
+							value,
+						)}`
+						const response = await fetch(detailsUrl)
 
 						if (!response.ok) {
 							const errorText = await response.json()
@@ -4894,6 +4977,25 @@ const handleDebtors = async () => {
 								data.html_transactions +
 								'<div class="debtors-details-title">Выдано</div>' +
 								data.html_repayments
+							const hasDebtSummary =
+								data.transactions_table_id !== 'branch-transactions-Филиал_1' &&
+								data.transactions_table_id !== 'branch-transactions-Наши_ИП'
+							const showLastRepayments = table => {
+								const rows = Array.from(
+									table.querySelectorAll('tbody tr:not(.table__row--summary)'),
+								)
+
+								if (rows.length > 10) {
+									rows.slice(0, rows.length - 10).forEach(row => {
+										row.classList.add('hidden-row')
+									})
+									rows.slice(-10).forEach(row => {
+										row.classList.remove('hidden-row')
+									})
+								} else {
+									rows.forEach(row => row.classList.remove('hidden-row'))
+								}
+							}
 							;[data.transactions_table_id, data.repayments_table_id].forEach(
 								tableId => {
 									const table = details.querySelector(`#${tableId}`)
@@ -4912,40 +5014,43 @@ const handleDebtors = async () => {
 										} else {
 											setIds(data.data_ids, data.transactions_table_id)
 											setIds(data.repayment_ids, data.repayments_table_id)
-											if (
-												data.transactions_table_id !==
-													'branch-transactions-Филиал_1' &&
-												data.transactions_table_id !==
-													'branch-transactions-Наши_ИП'
-											) {
-												TableManager.calculateTableSummary(
+											if (hasDebtSummary) {
+												TableManager.showTableSummary(
 													data.transactions_table_id,
-													['supplier_debt'],
+													{ supplier_debt: data.supplier_debt_total },
 												)
 											}
 										}
 
 										if (tableId === data.repayments_table_id) {
-											const rows = Array.from(
-												table.querySelectorAll(
-													'tbody tr:not(.table__row--summary)',
-												),
-											)
-
-											if (rows.length > 10) {
-												rows.slice(0, rows.length - 10).forEach(row => {
-													row.classList.add('hidden-row')
-												})
-												rows.slice(-10).forEach(row => {
-													row.classList.remove('hidden-row')
-												})
-											} else {
-												rows.forEach(row => row.classList.remove('hidden-row'))
-											}
+											showLastRepayments(table)
 										}
 									}
 								},
 							)
+							attachDetailPages(
+								detailsUrl,
+								'page',
+								data.total_pages,
+								data.transactions_table_id,
+								'columns_transactions',
+								'data_ids',
+							)
+							attachDetailPages(
+								detailsUrl,
+								'rep_page',
+								data.repayments_total_pages,
+								data.repayments_table_id,
+								'columns_repayments',
+								'repayment_ids',
+								() => {
+									const table = details.querySelector(
+										`#${data.repayments_table_id}`,
+									)
+									if (table) showLastRepayments(table)
+								},
+								true,
+							)
 						} else if (value === 'Инвесторам') {
 							details.innerHTML =
 								'<div class="debtors-details-title">Прибыль</div>' +
@@ -4994,6 +5099,14 @@ const handleDebtors = async () => {
 									setIds(data.data_ids, data.table_id)
 								}
 							}
+							attachDetailPages(
+								detailsUrl,
+								'page',
+								data.total_pages,
+								data.table_id,
+								'columns',
+								'data_ids',
+							)
 
 							const investorsTable = details.querySelector('#investors-table')
 							if (investorsTable) {
@@ -5055,6 +5168,14 @@ const handleDebtors = async () => {
 									setIds(data.data_ids, data.table_id)
 								}
 							}
+							attachDetailPages(
+								detailsUrl,
+								'page',
+								data.total_pages,
+								data.table_id,
+								'columns',
+								'data_ids',
+							)
 
 							if (
 								(value === 'Выдачи клиентам' || value === 'ДТ') &&
@@ -0,0 +1,30 @@
+from decimal import Decimal
+
+from main.models import Account, Branch, Client, Supplier, Transaction
+
+
+class TransactionFixtures:
+    """Клиент, поставщик филиала и счёт для транзакций тестов"""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.branch = Branch.objects.create(name="Филиал 2")
+        cls.customer = Client.objects.create(name="Клиент", percentage=Decimal("7.5"), bonus_percentage=Decimal("1.5"))
+        cls.supplier = Supplier.objects.create(name="Поставщик", branch=cls.branch, cost_percentage=Decimal("3.2"))
+        cls.account = Account.objects.create(name="Счёт")
+
+    @classmethod
+    def make_transaction(cls, **fields):
+        values = {
+            "client": cls.customer,
+            "supplier": cls.supplier,
+            "account": cls.account,
+            "amount": Decimal(100000),
+            "client_percentage": Decimal("7.5"),
+            "bonus_percentage": Decimal("1.5"),
+            "supplier_percentage": Decimal("3.2"),
+            "paid_amount": Decimal(0),
+        }
+        values.update(fields)
+        return Transaction.objects.create(**values)
@@ -0,0 +1,28 @@
+from decimal import Decimal
+from types import SimpleNamespace
+
+from django.test import SimpleTestCase
+
+from main.columns import table_columns
+
+
+class TableColumnsTests(SimpleTestCase):
+
+    def test_mixed_scales_keep_own_places(self):
+        fields = [
+            {"name": "value", "verbose_name": "%", "is_percent": True},
+            {"name": "value", "verbose_name": "Число", "is_number": True},
+            {"name": "value", "verbose_name": "Текст"},
+        ]
+        items = [SimpleNamespace(value=Decimal(value)) for value in ("10.5", "10.50", "3", "-2.25")]
+        payload = table_columns(fields, items)
+        for column in payload["columns"]:
+            self.assertEqual(column, ["10,5", "10,50", 3, "-2,25"])
+        self.assertTrue(all("places" not in field for field in payload["fields"]))
+
+    def test_currency_uses_two_places(self):
+        fields = [{"name": "value", "verbose_name": "Сумма", "is_currency": True}]
+        payload = table_columns(fields, [SimpleNamespace(value=Decimal("10.5")), SimpleNamespace(value=None)])
+        self.assertEqual(payload["columns"], [[10.5, 0]])
+        self.assertEqual(payload["fields"][0]["places"], 2)
+        self.assertEqual(payload["count"], 2)
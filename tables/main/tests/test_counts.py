@@ -0,0 +1,44 @@
+from django.core.cache import cache
+from django.http import QueryDict
+from django.test import SimpleTestCase, TestCase
+
+from main.counts import cached_count, filter_signature
+from main.models import Transaction
+
+from . import TransactionFixtures
+
+
+class CachedCountTests(TransactionFixtures, TestCase):
+
+    def setUp(self):
+        cache.clear()
+
+    def test_count_is_cached_until_data_changes(self):
+        self.make_transaction()
+        self.make_transaction()
+        self.assertEqual(cached_count("transactions", Transaction.objects.all()), 2)
+        # Пока версия данных не изменилась, COUNT не выполняется
+        self.assertEqual(cached_count("transactions", Transaction.objects.none()), 2)
+
+        self.make_transaction()
+        self.assertEqual(cached_count("transactions", Transaction.objects.all()), 3)
+
+    def test_filters_have_own_counts(self):
+        self.make_transaction(paid_amount=0)
+        self.make_transaction(paid_amount=100)
+        paid = Transaction.objects.filter(paid_amount__gt=0)
+        self.assertEqual(cached_count("transactions", paid, signature="paid=1"), 1)
+        self.assertEqual(cached_count("transactions", Transaction.objects.all()), 2)
+
+    def test_approximate_counts_need_mysql(self):
+        self.make_transaction()
+        with self.settings(APPROXIMATE_TABLE_COUNTS=True):
+            self.assertEqual(cached_count("transactions", Transaction.objects.all(), model=Transaction), 1)
+
+
+class FilterSignatureTests(SimpleTestCase):
+
+    def test_page_params_and_empty_values_are_ignored(self):
+        params = QueryDict("page=3&sort=amount&order=desc&cursor=abc&client=+Иванов+&supplier=&amount=100")
+        self.assertEqual(filter_signature(params), filter_signature(QueryDict("amount=100&client=Иванов")))
+        self.assertNotEqual(filter_signature(params), filter_signature(QueryDict("amount=100")))
@@ -0,0 +1,52 @@
+from datetime import timedelta
+from decimal import Decimal
+
+from django.test import TestCase
+from django.utils import timezone
+
+from main.models import SupplierDebtRepayment
+from users.models import User
+
+from . import TransactionFixtures
+
+
+class BranchDetailsTests(TransactionFixtures, TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.transactions = [
+            cls.make_transaction(amount=Decimal(100000 * (i + 1)), paid_amount=Decimal(100000 * (i + 1)))
+            for i in range(3)
+        ]
+        start = timezone.now() - timedelta(days=30)
+        cls.repayments = []
+        for day in range(5):
+            repayment = SupplierDebtRepayment.objects.create(supplier=cls.supplier, amount=Decimal(100 + day))
+            SupplierDebtRepayment.objects.filter(pk=repayment.pk).update(created_at=start + timedelta(days=day))
+            cls.repayments.append(repayment)
+        cls.user = User.objects.create_user(username="admin", password="pass")
+
+    def details(self, **params):
+        self.client.force_login(self.user)
+        response = self.client.get(
+            "/suppliers/debtors/details/", {"type": "branch", "value": self.branch.name, "per_page": 2, **params},
+            secure=True,
+        )
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_repayments_start_from_newest(self):
+        ids = [r.pk for r in self.repayments]
+        data = self.details()
+        self.assertEqual(data["repayment_ids"], ids[3:])
+        self.assertEqual(data["repayments_total_pages"], 3)
+        self.assertEqual(self.details(rep_page=2)["repayment_ids"], ids[1:3])
+        self.assertEqual(self.details(rep_page=3)["repayment_ids"], ids[:1])
+
+    def test_debt_total_covers_all_pages(self):
+        data = self.details()
+        self.assertEqual(len(data["data_ids"]), 2)
+        expected = sum(t.supplier_debt for t in self.transactions)
+        self.assertEqual(Decimal(str(data["supplier_debt_total"])), expected)
+        self.assertNotIn("supplier_debt_total", self.details(page=2))
@@ -0,0 +1,73 @@
+from decimal import Decimal
+
+from django.test import TestCase
+
+from main import money
+from main.debts import queryset_debts, to_rubles, total, transaction_debts
+from main.models import Transaction
+
+from . import TransactionFixtures
+
+DEBT_NAMES = (
+    "remaining_amount", "bonus", "profit", "supplier_debt", "client_debt",
+    "bonus_debt", "client_debt_paid", "investor_debt",
+)
+
+
+class BatchDebtsTests(TransactionFixtures, TestCase):
+    """Пакетный расчёт main.debts совпадает со свойствами Transaction"""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        rows = [
+            (Decimal(100000), "7.5", "1.5", "3.2", Decimal(100000), Decimal(0)),
+            (Decimal(123457), "9.9", "0.1", "4.7", Decimal(50000), Decimal(1200)),
+            (Decimal(999), "33.3", "3.3", "16.6", Decimal(999), Decimal(5)),
+            (Decimal(-15001), "7.5", "2.5", "3.5", Decimal(0), Decimal(0)),
+            (Decimal(1), "0.0", "0.0", "0.0", Decimal(0), Decimal(0)),
+        ]
+        cls.transactions = [
+            cls.make_transaction(
+                amount=amount,
+                client_percentage=Decimal(client),
+                bonus_percentage=Decimal(bonus),
+                supplier_percentage=Decimal(supplier),
+                paid_amount=paid,
+                returned_by_supplier=returned,
+                returned_to_investor=Decimal("10.50"),
+            )
+            for amount, client, bonus, supplier, paid, returned in rows
+        ]
+
+    def test_queryset_debts_match_properties(self):
+        ids, debts = queryset_debts(Transaction.objects.order_by("id"))
+        transactions = list(Transaction.objects.order_by("id"))
+        self.assertEqual(ids.tolist(), [t.id for t in transactions])
+        for name in DEBT_NAMES:
+            with self.subTest(name=name):
+                self.assertEqual(
+                    debts[name].tolist(),
+                    [money.to_kopecks(getattr(t, name)) for t in transactions],
+                )
+
+    def test_transaction_debts_keep_page_order(self):
+        page = list(reversed(self.transactions))
+        debts = transaction_debts(page)
+        self.assertEqual(
+            debts["supplier_debt"].tolist(),
+            [money.to_kopecks(t.supplier_debt) for t in page],
+        )
+
+    def test_rubles_and_total(self):
+        debts = transaction_debts(self.transactions)
+        self.assertEqual(
+            to_rubles(debts["investor_debt"]),
+            [int(t.investor_debt) for t in self.transactions],
+        )
+        self.assertEqual(total(debts["profit"]), sum(t.profit for t in self.transactions))
+
+    def test_empty_queryset(self):
+        ids, debts = queryset_debts(Transaction.objects.none())
+        self.assertEqual(len(ids), 0)
+        self.assertEqual(total(debts["supplier_debt"]), Decimal(0))
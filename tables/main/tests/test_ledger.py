@@ -0,0 +1,111 @@
+from decimal import Decimal
+
+from django.test import TestCase
+
+from main.models import Account, Branch, BranchDebt, CashFlow, Client, LedgerSummary, PaymentPurpose, Supplier
+from users.models import User, UserType
+
+from . import TransactionFixtures
+
+
+class LedgerTotalsTests(TransactionFixtures, TestCase):
+    """Итоги, обновляемые сигналами, совпадают с полным пересчётом"""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.dt_client = Client.objects.create(name=LedgerSummary.DT_CLIENT_NAME, percentage=Decimal("5.0"))
+        cls.other_branch = Branch.objects.create(name="Филиал 3")
+        cls.other_supplier = Supplier.objects.create(name="Поставщик 2", branch=cls.other_branch, cost_percentage=Decimal("2.5"))
+        cls.investor_income = PaymentPurpose.objects.create(name="Доход инвестора", operation_type=PaymentPurpose.INCOME)
+
+    def assertMatchesRebuild(self):
+        summary = LedgerSummary.current()
+        current = {field: getattr(summary, field) for field in LedgerSummary.TOTAL_FIELDS}
+        debts = BranchDebt.by_branch()
+
+        rebuilt = LedgerSummary.rebuild()
+        self.assertEqual(current, {field: getattr(rebuilt, field) for field in LedgerSummary.TOTAL_FIELDS})
+        BranchDebt.rebuild()
+        self.assertEqual(debts, BranchDebt.by_branch())
+        self.assertEqual(list(LedgerSummary.objects.values_list("pk", flat=True)), [LedgerSummary.SINGLETON_PK])
+
+    def test_transaction_create_edit_delete(self):
+        paid = self.make_transaction(paid_amount=Decimal(60000))
+        self.make_transaction(paid_amount=Decimal(100000), returned_bonus=Decimal(1500), returned_to_client=Decimal(92500))
+        dt = self.make_transaction(client=self.dt_client, supplier=self.other_supplier, paid_amount=Decimal(20000))
+        self.make_transaction(paid_amount=Decimal(0))
+        self.assertMatchesRebuild()
+
+        paid.paid_amount = Decimal(100000)
+        paid.returned_by_supplier = Decimal(5000)
+        paid.returned_to_investor = Decimal("10.50")
+        paid.save()
+        self.assertMatchesRebuild()
+
+        dt.supplier = self.supplier
+        dt.client = self.customer
+        dt.save()
+        self.assertMatchesRebuild()
+
+        dt.paid_amount = Decimal(0)
+        dt.save()
+        self.assertMatchesRebuild()
+
+        paid.delete()
+        self.assertMatchesRebuild()
+
+    def test_cashflow_create_edit_delete(self):
+        cash_flow = CashFlow.objects.create(account=self.account, amount=Decimal(30000), purpose=self.investor_income)
+        CashFlow.objects.create(account=self.account, amount=Decimal(-500), purpose=self.investor_income)
+        self.assertMatchesRebuild()
+
+        cash_flow.returned_to_investor = Decimal("12000.25")
+        cash_flow.save()
+        self.assertMatchesRebuild()
+
+        cash_flow.delete()
+        self.assertMatchesRebuild()
+
+    def test_supplier_moves_to_other_branch(self):
+        self.make_transaction(paid_amount=Decimal(50000))
+        self.supplier.branch = self.other_branch
+        self.supplier.save()
+        self.assertMatchesRebuild()
+
+    def test_branch_debt_is_whole_rubles(self):
+        self.make_transaction(paid_amount=Decimal(50001))
+        debt = BranchDebt.by_branch()[self.branch.id]
+        self.assertEqual(debt, Decimal(46801))
+        self.assertEqual(str(debt), "46801")
+
+    def test_single_summary_row(self):
+        LedgerSummary.rebuild()
+        LedgerSummary.rebuild()
+        self.assertEqual(LedgerSummary.objects.count(), 1)
+        self.assertEqual(LedgerSummary.current().pk, LedgerSummary.SINGLETON_PK)
+
+    def test_settle_bonus_returns_totals_after_payout(self):
+        paid = self.make_transaction(paid_amount=Decimal(100000))
+        self.make_transaction(paid_amount=Decimal(40000))
+        CashFlow.objects.create(account=self.account, amount=Decimal(3000), purpose=self.investor_income)
+        Account.objects.create(name="Наличные", balance=Decimal(10000))
+
+        admin = User.objects.create_user(
+            username="admin", password="pass", user_type=UserType.objects.create(name="Администратор"),
+        )
+        self.client.force_login(admin)
+        response = self.client.post(
+            f"/suppliers/settle-debt/{paid.pk}/", {"type": "bonus", "amount": "500"}, secure=True,
+        )
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+
+        self.assertMatchesRebuild()
+        summary = LedgerSummary.current()
+        self.assertEqual(Decimal(str(data["total_debt"])), summary.bonus_debt)
+        self.assertEqual(Decimal(str(data["total_profit"])), summary.investor_debt)
+        self.assertEqual(
+            Decimal(str(data["total_summary_debts"])),
+            summary.bonus_debt + summary.client_debt_paid + summary.investor_debt,
+        )
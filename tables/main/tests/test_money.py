@@ -0,0 +1,66 @@
+import math
+from decimal import Decimal
+
+from django.test import SimpleTestCase
+
+from main import money
+
+AMOUNTS = [Decimal(value) for value in (
+    0, 1, 7, 99, 100, 999, 1001, 12345, 100000, 123457, 999999, 7922961, 9999999999,
+    -1, -99, -15001, -123457,
+)]
+PERCENTAGES = [Decimal(tenths) / 10 for tenths in range(0, 1001)]
+
+
+def old_floor_percent(value, percentage):
+    """Расчёт свойств Transaction до main.money"""
+    return Decimal(math.floor(value * percentage / 100))
+
+
+class FloorPercentTests(SimpleTestCase):
+    """floor_percent совпадает с прежним расчётом на Decimal"""
+
+    def assertParity(self, percentage_of):
+        mismatches = [
+            (value, percentage)
+            for value in AMOUNTS
+            for percentage in PERCENTAGES
+            if money.floor_percent(value, percentage_of(percentage))
+            != old_floor_percent(value, percentage_of(percentage))
+        ]
+        self.assertEqual(mismatches, [])
+
+    def test_percent(self):
+        self.assertParity(lambda percentage: percentage)
+
+    def test_remaining_percent(self):
+        self.assertParity(lambda percentage: 100 - percentage)
+
+    def test_result_is_whole_rubles(self):
+        self.assertEqual(money.floor_percent(Decimal(1001), Decimal("7.5")), Decimal(75))
+        self.assertEqual(money.floor_percent(Decimal(-1001), Decimal("7.5")), Decimal(-76))
+        self.assertEqual(money.floor_percent(None, Decimal("7.5")), Decimal(0))
+
+
+class ConversionTests(SimpleTestCase):
+
+    def test_to_kopecks(self):
+        self.assertEqual(money.to_kopecks(Decimal("10.50")), 1050)
+        self.assertEqual(money.to_kopecks("0.015"), 2)
+        self.assertEqual(money.to_kopecks(-0.015), -2)
+        self.assertEqual(money.to_kopecks(0.29), 29)
+        self.assertEqual(money.to_kopecks(None), 0)
+
+    def test_to_tenths(self):
+        self.assertEqual(money.to_tenths(Decimal("7.5")), 75)
+        self.assertEqual(money.to_tenths(16.6), 166)
+        self.assertEqual(money.to_tenths(None), 0)
+
+    def test_from_kopecks(self):
+        self.assertEqual(money.from_kopecks(1050), Decimal("10.5"))
+        self.assertEqual(money.from_kopecks(-1), Decimal("-0.01"))
+
+    def test_rubles_truncate_towards_zero(self):
+        for value in (Decimal("10.99"), Decimal("-10.99"), Decimal("0.5"), Decimal(-3)):
+            with self.subTest(value=value):
+                self.assertEqual(money.rubles(value), int(value))
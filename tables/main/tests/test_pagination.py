@@ -0,0 +1,136 @@
+from decimal import Decimal
+from types import SimpleNamespace
+
+from django.core.paginator import Paginator
+from django.test import RequestFactory, SimpleTestCase, TestCase
+
+from main.models import Transaction
+from main.pagination import KeysetPage, KeysetPaginator, decode_cursor, encode_cursor, order_expression, paginate
+
+from . import TransactionFixtures
+
+PER_PAGE = 4
+
+
+class KeysetPaginatorTests(TransactionFixtures, TestCase):
+    """Страницы по курсору совпадают со страницами Paginator в том же порядке"""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        # Повторы сумм и NULL в paid_amount проверяют добивку по id и порядок NULL
+        for index in range(19):
+            cls.make_transaction(
+                amount=Decimal(1000 * (index % 5)),
+                paid_amount=None if index % 4 == 0 else Decimal(100 * (index % 3)),
+            )
+
+    def offset_pages(self, ordering):
+        rows = Transaction.objects.order_by(*[
+            order_expression(key, descending) for key, descending in [*ordering, ("id", False)]
+        ])
+        paginator = Paginator(rows, PER_PAGE)
+        return [[t.id for t in paginator.page(number)] for number in paginator.page_range]
+
+    def keyset_forward(self, paginator):
+        pages = []
+        page = paginator.page()
+        while True:
+            pages.append(page)
+            if not page.next_cursor:
+                return pages
+            page = paginator.page(page.next_cursor)
+
+    def keyset_backward(self, paginator, page):
+        pages = [page]
+        while page.previous_cursor:
+            page = paginator.page(page.previous_cursor)
+            pages.append(page)
+        return pages[::-1]
+
+    def assertParity(self, ordering):
+        expected = self.offset_pages(ordering)
+        paginator = KeysetPaginator(Transaction.objects.all(), ordering, PER_PAGE)
+        self.assertEqual(paginator.num_pages, len(expected))
+
+        forward = self.keyset_forward(paginator)
+        self.assertEqual([[t.id for t in page] for page in forward], expected)
+        self.assertEqual([page.number for page in forward], list(range(1, len(expected) + 1)))
+
+        backward = self.keyset_backward(paginator, forward[-1])
+        self.assertEqual([[t.id for t in page] for page in backward], expected)
+        self.assertEqual([page.number for page in backward], list(range(1, len(expected) + 1)))
+        self.assertFalse(backward[0].has_previous())
+        self.assertTrue(backward[0].has_next())
+
+    def test_ascending(self):
+        self.assertParity([("amount", False)])
+
+    def test_descending(self):
+        self.assertParity([("amount", True)])
+
+    def test_nulls(self):
+        self.assertParity([("paid_amount", False)])
+        self.assertParity([("paid_amount", True)])
+
+    def test_several_keys(self):
+        self.assertParity([("amount", True), ("paid_amount", False)])
+
+    def test_list_rows(self):
+        rows = sorted(
+            (SimpleNamespace(id=t.id, amount=t.amount) for t in Transaction.objects.all()),
+            key=lambda row: (-row.amount, row.id),
+        )
+        paginator = KeysetPaginator(rows, [("amount", True), ("id", False)], PER_PAGE)
+        forward = self.keyset_forward(paginator)
+        self.assertEqual(
+            [[row.id for row in page] for page in forward],
+            self.offset_pages([("amount", True)]),
+        )
+
+    def test_foreign_cursor_is_first_page(self):
+        paginator = KeysetPaginator(Transaction.objects.all(), [("amount", False)], PER_PAGE)
+        first = [t.id for t in paginator.page()]
+        cursors = [
+            encode_cursor([Decimal(1000)], 2),
+            encode_cursor([Decimal(1000), 5, 7], 2),
+            encode_cursor(["не сумма", 5], 2),
+            encode_cursor([Decimal(1000), "не id"], 2, backward=True),
+        ]
+        for cursor in cursors:
+            page = paginator.page(cursor)
+            self.assertEqual([t.id for t in page], first)
+            self.assertEqual(page.number, 1)
+            self.assertFalse(page.has_previous())
+
+        rows = [SimpleNamespace(amount=index, id=index) for index in range(10)]
+        paginator = KeysetPaginator(rows, [("amount", False), ("id", False)], PER_PAGE)
+        page = paginator.page(encode_cursor(["не сумма", 1], 2))
+        self.assertEqual([row.id for row in page], list(range(PER_PAGE)))
+
+    def test_paginate_switches_on_cursor(self):
+        factory = RequestFactory()
+        ordering = [("amount", True)]
+        expected = self.offset_pages(ordering)
+
+        paginator, page = paginate(factory.get("/", {"page": 2}), Transaction.objects.all(), ordering, PER_PAGE)
+        self.assertIsInstance(paginator, Paginator)
+        self.assertEqual([t.id for t in page], expected[1])
+
+        paginator, page = paginate(factory.get("/", {"cursor": ""}), Transaction.objects.all(), ordering, PER_PAGE)
+        self.assertIsInstance(page, KeysetPage)
+        self.assertEqual([t.id for t in page], expected[0])
+
+
+class CursorTests(SimpleTestCase):
+
+    def test_round_trip(self):
+        values = [Decimal("10.50"), None, 7]
+        self.assertEqual(decode_cursor(encode_cursor(values, 3, backward=True)), (values, 3, True))
+
+    def test_broken_cursor_is_first_page(self):
+        self.assertIsNone(decode_cursor(""))
+        self.assertIsNone(decode_cursor("не курсор"))
+        self.assertIsNone(decode_cursor(encode_cursor([1, 2], 2), size=3))
+        self.assertIsNone(decode_cursor(encode_cursor([[1], 2], 2)))
+        self.assertIsNone(decode_cursor(encode_cursor([{"d": "не число"}], 2)))
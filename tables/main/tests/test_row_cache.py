@@ -0,0 +1,65 @@
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.test import RequestFactory, TestCase
+
+from main.models import Account, TableVersion, Transaction
+from main.row_cache import rendered_rows
+from users.models import User
+
+from . import TransactionFixtures
+
+FIELDS = [
+    {"name": "amount", "verbose_name": "Сумма"},
+    {"name": "account", "verbose_name": "Счёт", "is_relation": True},
+]
+
+
+class RenderedRowsTests(TransactionFixtures, TestCase):
+    """Кэш HTML строк сбрасывается при каждом изменении строки или названий"""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.user = User.objects.create_user(username="admin", password="pass")
+
+    def setUp(self):
+        cache.clear()
+        self.request = RequestFactory().get("/")
+        self.request.user = self.user
+        self.transaction = self.make_transaction(amount=Decimal(111111))
+
+    def render(self, transaction=None):
+        transaction = transaction or Transaction.objects.select_related("account").get(pk=self.transaction.pk)
+        [html] = rendered_rows(self.request, FIELDS, [transaction])
+        return html
+
+    def test_cached_row_is_served_again(self):
+        self.assertIn("111111", self.render())
+        # Без сохранения row_version тот же — строка берётся из кэша
+        unsaved = Transaction.objects.get(pk=self.transaction.pk)
+        unsaved.amount = Decimal(222222)
+        self.assertIn("111111", self.render(unsaved))
+
+    def test_save_renders_row_again(self):
+        self.render()
+        self.transaction.amount = Decimal(222222)
+        self.transaction.save()
+        self.assertIn("222222", self.render())
+
+    def test_queryset_update_renders_row_again(self):
+        self.render()
+        Transaction.objects.filter(pk=self.transaction.pk).update(amount=Decimal(333333))
+        self.assertIn("333333", self.render())
+
+    def test_row_labels_bump_renders_row_again(self):
+        self.assertIn("Счёт", self.render())
+        self.account.name = "Касса"
+        self.account.save()
+        self.assertIn("Касса", self.render())
+
+        # UPDATE мимо сигналов не сбрасывает кэш, пока версия названий та же
+        Account.objects.filter(pk=self.account.pk).update(name="Сейф")
+        self.assertIn("Касса", self.render())
+        TableVersion.bump(TableVersion.ROW_LABELS)
+        self.assertIn("Сейф", self.render())
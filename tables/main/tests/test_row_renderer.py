@@ -0,0 +1,100 @@
+from datetime import datetime
+from decimal import Decimal
+from types import SimpleNamespace
+
+from django.template.loader import render_to_string
+from django.test import TestCase
+from django.utils import timezone
+
+from main import schemas
+from main.models import CashFlow, PaymentPurpose, Transaction
+from main.money_logs import MoneyLogRow, money_log_rows
+from main.row_renderer import compile_row, render_rows
+from main.views import MONEY_LOG_FIELDS
+
+from . import TransactionFixtures
+
+# Все ветки table_row.html
+BRANCH_FIELDS = [
+    {"name": "created_at", "verbose_name": "Дата", "is_date": True},
+    {"name": "flag", "verbose_name": "Флаг", "is_boolean": True},
+    {"name": "type", "verbose_name": "Знак", "is_type_sign": True},
+    {"name": "type", "verbose_name": "Тип", "is_enum_field": True},
+    {"name": "total", "verbose_name": "Итого", "is_currency": True},
+    {"name": "percent", "verbose_name": "%", "is_percent": True},
+    {"name": "ratio", "verbose_name": "Доля", "is_number": True, "is_float": True},
+    {"name": "count", "verbose_name": "Кол-во", "is_number": True, "is_integer": True},
+    {"name": "size", "verbose_name": "Размер", "is_number": True},
+    {"name": "note", "verbose_name": "Заметка"},
+    {"name": "owner", "verbose_name": "Владелец", "is_relation": True},
+    {"name": "missing", "verbose_name": "Нет поля"},
+]
+
+
+def branch_item(sign, created_at, flag, total, percent, ratio, count, size, note, owner):
+    return SimpleNamespace(
+        get_type_display=lambda: sign,
+        created_at=created_at, flag=flag, total=total, percent=percent, ratio=ratio,
+        count=count, size=size, note=note, owner=owner,
+    )
+
+
+def template_rows(fields, items):
+    return "".join(
+        render_to_string("components/table_row.html", {"item": item, "fields": fields})
+        for item in items
+    )
+
+
+class RowRendererTests(TransactionFixtures, TestCase):
+    """Скомпилированная схема выводит HTML байт в байт как components/table_row.html"""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.make_transaction(paid_amount=Decimal(60000), returned_to_investor=Decimal("10.50"), documents=True)
+        cls.make_transaction(amount=Decimal(-1500), client=None, supplier=None, account=None)
+        purpose = PaymentPurpose.objects.create(name="Доход <инвестора>", operation_type=PaymentPurpose.INCOME)
+        CashFlow.objects.create(account=cls.account, amount=Decimal(30000), purpose=purpose, comment="Комментарий & «кавычки»")
+        CashFlow.objects.create(account=cls.account, amount=Decimal(-700), purpose=purpose, supplier=cls.supplier)
+
+    def assertSameHTML(self, fields, items):
+        items = list(items)
+        self.assertTrue(items)
+        expected = template_rows(fields, items)
+        self.assertEqual(compile_row(fields).render_rows(items), expected)
+        self.assertEqual(render_rows(fields, items), expected)
+
+    def test_all_template_branches(self):
+        moment = timezone.make_aware(datetime(2026, 3, 8, 9, 5))
+        items = [
+            branch_item("+", moment, True, Decimal("10.5"), Decimal("7.5"), Decimal("0.333"), 3, Decimal("10.50"), "<b>&", self.customer),
+            branch_item("-", None, "false", Decimal(-3), Decimal("0.0"), None, 0, None, "", None),
+            branch_item("", moment.date(), False, 0, None, 0, None, Decimal(0), 0, "текст"),
+            branch_item(None, "", "False", None, 12, 1.005, Decimal(7), -2, Decimal("1.25"), 5),
+        ]
+        self.assertSameHTML(BRANCH_FIELDS, items)
+
+    def test_dict_rows(self):
+        items = [
+            {"created_at": None, "flag": True, "get_type_display": "+", "total": 5, "note": "x"},
+            {"get_type_display": "-", "percent": Decimal("1.5"), "count": 2},
+        ]
+        self.assertSameHTML(BRANCH_FIELDS, items)
+
+    def test_transaction_schemas(self):
+        transactions = Transaction.objects.select_related("client", "supplier", "account")
+        for role in (schemas.ADMIN, schemas.ACCOUNTANT, schemas.ASSISTANT):
+            with self.subTest(role=role):
+                self.assertSameHTML(schemas.get(schemas.TRANSACTIONS, role), transactions)
+
+    def test_cash_flow_schema(self):
+        cash_flows = CashFlow.objects.select_related("account", "supplier", "purpose", "created_by")
+        self.assertSameHTML(schemas.get(schemas.CASH_FLOW), cash_flows)
+
+    def test_reference_schemas(self):
+        self.assertSameHTML(schemas.get(schemas.CLIENTS), [self.customer])
+        self.assertSameHTML(schemas.get(schemas.SUPPLIERS), [self.supplier])
+
+    def test_money_log_rows(self):
+        self.assertSameHTML(MONEY_LOG_FIELDS, [MoneyLogRow(row) for row in money_log_rows().order_by("-dt")])
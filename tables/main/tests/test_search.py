@@ -0,0 +1,85 @@
+from decimal import Decimal
+
+from django.test import SimpleTestCase, TestCase
+
+from main import search
+from main.models import CashFlow, PaymentPurpose, Supplier
+from users.models import User, UserType
+
+from . import TransactionFixtures
+
+
+class TokenizeTests(SimpleTestCase):
+
+    def test_tokenize(self):
+        self.assertEqual(
+            search.tokenize("Оплата ЁЛКИ 15.03.2025 1000,50 и 7 а"),
+            ["оплата", "елки", "15.03.2025", "1000,50", "7"],
+        )
+        self.assertEqual(search.tokenize(None), [])
+
+    def test_stem(self):
+        self.assertEqual(search.stem("оплаты"), "оплат")
+        self.assertEqual(search.stem("поставщиками"), "поставщик")
+        # Короткие, латинские и числовые слова не меняются
+        self.assertEqual(search.stem("дома"), "дома")
+        self.assertEqual(search.stem("payments"), "payments")
+        self.assertEqual(search.stem("15.03.2025"), "15.03.2025")
+
+
+class SearchTests(TransactionFixtures, TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.hidden_supplier = Supplier.objects.create(name="Скрытый поставщик", visible_for_assistant=False)
+        purpose = PaymentPurpose.objects.create(name="Аренда")
+        cls.rent = CashFlow.objects.create(account=cls.account, amount=Decimal(-45000), purpose=purpose, comment="Оплата аренды склада")
+        cls.hidden_rent = CashFlow.objects.create(
+            account=cls.account, amount=Decimal(-12000), purpose=purpose, supplier=cls.hidden_supplier, comment="Оплата аренды офиса",
+        )
+        cls.visible_transaction = cls.make_transaction(amount=Decimal(777001))
+        cls.hidden_transaction = cls.make_transaction(amount=Decimal(777002), supplier=cls.hidden_supplier)
+
+        cls.admin = User.objects.create_user(username="admin", password="pass")
+        cls.assistant = User.objects.create_user(
+            username="assistant", password="pass", user_type=UserType.objects.create(name="Ассистент"),
+        )
+
+    def found(self, query, **kwargs):
+        return {(result["type"], result["id"]) for result in search.search(query, **kwargs)}
+
+    def test_prefix_and_stem_match(self):
+        self.assertEqual(
+            self.found("оплаты аренде"),
+            {("cash_flow", self.rent.pk), ("cash_flow", self.hidden_rent.pk)},
+        )
+        self.assertEqual(self.found("оплаты склад"), {("cash_flow", self.rent.pk)})
+        self.assertEqual(self.found("777"), {
+            ("transaction", self.visible_transaction.pk), ("transaction", self.hidden_transaction.pk),
+        })
+
+    def test_exact_word_scores_higher(self):
+        results = search.search("777001")
+        self.assertEqual(results[0]["id"], self.visible_transaction.pk)
+        self.assertEqual(len(results), 1)
+
+    def test_kinds_and_empty_query(self):
+        self.assertEqual(self.found("поставщик", kinds=["supplier"]), {
+            ("supplier", self.supplier.pk), ("supplier", self.hidden_supplier.pk),
+        })
+        self.assertEqual(search.search("  , "), [])
+
+    def test_hidden_suppliers_are_not_found_by_assistant(self):
+        self.assertEqual(self.found("оплаты аренде", user=self.admin), {
+            ("cash_flow", self.rent.pk), ("cash_flow", self.hidden_rent.pk),
+        })
+        self.assertEqual(self.found("оплаты аренде", user=self.assistant), {("cash_flow", self.rent.pk)})
+        self.assertEqual(self.found("777", user=self.assistant), {("transaction", self.visible_transaction.pk)})
+        self.assertEqual(self.found("скрытый", user=self.assistant), set())
+
+    def test_view_passes_user(self):
+        self.client.force_login(self.assistant)
+        response = self.client.get("/search/", {"q": "оплаты аренде"}, secure=True)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([result["id"] for result in response.json()["results"]], [self.rent.pk])
@@ -0,0 +1,37 @@
+from django.core.cache import cache
+from django.test import TestCase
+
+from users.models import User
+
+from . import TransactionFixtures
+
+
+class TableWindowTests(TransactionFixtures, TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.transaction = cls.make_transaction()
+        cls.user = User.objects.create_user(username="admin", password="pass")
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.user)
+
+    def window(self, name, **params):
+        response = self.client.get(f"/tables/{name}/window/", params, secure=True)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_rename_refreshes_cached_window(self):
+        first = self.window("transactions")
+        self.assertEqual(first["ids"], [self.transaction.pk])
+        self.assertIn("Счёт", "".join(first["rows"]))
+
+        # Переименование счёта не меняет TableVersion.TRANSACTIONS, только ROW_LABELS
+        self.account.name = "Новое имя"
+        self.account.save()
+
+        second = self.window("transactions", snapshot=first["snapshot"])
+        self.assertTrue(second["stale"])
+        self.assertIn("Новое имя", "".join(second["rows"]))
@@ -73,6 +73,8 @@ urlpatterns = [
     path("suppliers/repay-debt/<signed_int:pk>/", views.repay_supplier_debt, name="repay_supplier_debt"),
     path("suppliers/repay-debt/edit/<int:pk>/", views.edit_supplier_debt_repayment, name="edit_supplier_debt_repayment"),
 	path("supplier-accounts/list/", views.money_logs_list, name="supplier_accounts_list"),
+	path("tables/<str:name>/window/", views.table_window, name="table_window"),
+	path("search/", views.global_search, name="global_search"),
 	path("branches/list/", views.branch_list, name="branch_list"),
 	path("company_balance_stats/", views.company_balance_stats, name="company_balance_stats"),
     path("company_balance_stats/by_month/", views.company_balance_stats_by_month, name="company_balance_stats_by_month"),
@@ -1,8 +1,20 @@
 from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib.auth.decorators import login_required
-from tables.utils import get_model_fields
 from django.db import transaction, models
-from .models import Transaction, Client, Supplier, Account, CashFlow, SupplierAccount, PaymentPurpose, MoneyTransfer, Branch, SupplierDebtRepayment, Investor, InvestorDebtOperation, BalanceData, MonthlyCapital, ShortTermLiability, Credit, InventoryItem, ClientDebtRepayment
+from .models import Transaction, Client, Supplier, Account, CashFlow, SupplierAccount, PaymentPurpose, MoneyTransfer, Branch, SupplierDebtRepayment, Investor, InvestorDebtOperation, BalanceData, MonthlyCapital, ShortTermLiability, Credit, InventoryItem, ClientDebtRepayment, BranchDebt, LedgerSummary, TableVersion
+from .debts import transaction_debts, to_rubles
+from .snapshot import build_balance_snapshot
+from .pagination import paginate, cursor_context
+from .columns import page_rows, wants_columns
+from .filters import filter_by_date, filter_by_amount, filter_by_period
+from .search_text import filter_contains
+from .counts import cached_count, filter_signature
+from . import hidden_rows, schemas
+from .money_logs import money_log_rows, MoneyLogRow, log_id as money_log_id, SORT_COLUMNS as MONEY_LOG_SORT_COLUMNS
+from . import windows
+from . import debtor_lists
+from . import search
+from . import money
 from django.http import JsonResponse, Http404
 from django.forms.models import model_to_dict
 from django.template.loader import render_to_string
@@ -13,6 +25,7 @@ import json
 from decimal import Decimal
 from django.db.models import Sum, F, ExpressionWrapper, DecimalField, Value
 from collections import defaultdict
+from types import SimpleNamespace
 from functools import wraps
 from django.core.exceptions import PermissionDenied
 from datetime import datetime
@@ -23,7 +36,8 @@ from django.utils import timezone
 from users.models import User, UserType, HiddenRows
 import math
 from django.db.models import F, ExpressionWrapper, IntegerField, Value
-from django.db.models.functions import Floor
+from django.db.models.functions import Floor, Coalesce, Cast
+from django.db.models import CharField
 import logging
 logger = logging.getLogger(__name__)
 
@@ -87,7 +101,7 @@ def clean_percentage(value):
 
 def strip_cents(value):
     try:
-        return int(Decimal(str(value or 0)))
+        return money.rubles(value)
     except Exception:
         return 0
 
@@ -102,18 +116,18 @@ def index(request):
 
     fields = get_transaction_fields(is_accountant, is_assistant)
 
-    transactions_qs = Transaction.objects.select_related('client', 'supplier').all().order_by('-created_at')
+    transactions_qs = Transaction.objects.select_related('client', 'supplier').all()
     if is_assistant:
         transactions_qs = transactions_qs.filter(supplier__visible_for_assistant=True)
+    # respect_hidden=1 — без скрытых пользователем строк, страница остаётся полной
+    transactions_qs = hidden_rows.exclude_hidden(request, hidden_rows.TRANSACTIONS, transactions_qs)
 
-    paginator = Paginator(transactions_qs, 100)
-    page_number = request.GET.get('page', 1)
-    page = paginator.get_page(page_number)
+    paginator, page = paginate(request, transactions_qs, [('created_at', True), ('id', False)], 100)
 
     changed_cells = {}
     for t in page.object_list:
-        client_changed = t.client and t.client_percentage != t.client.percentage
-        supplier_changed = t.supplier and t.supplier_percentage != t.supplier.cost_percentage
+        client_changed = t.client_id and t.client_percentage_changed
+        supplier_changed = t.supplier_id and t.supplier_percentage_changed
 
         if client_changed or supplier_changed:
             changed_cells[t.id] = {
@@ -123,25 +137,11 @@ def index(request):
 
     is_admin = user_type == 'Администратор'
 
-    supplier_debts = [
-        strip_cents(getattr(t, 'supplier_debt', 0))
-        for t in page.object_list
-    ]
-
-    client_debts = [
-        strip_cents(getattr(t, 'client_debt', 0))
-        for t in page.object_list
-    ]
-
-    bonus_debts = [
-        strip_cents(Decimal(str(t.amount or 0)) * Decimal(str(t.bonus_percentage or 0)) / Decimal('100') - Decimal(str(t.returned_bonus or 0)))
-        for t in page.object_list
-    ]
-
-    investor_debts = [
-        strip_cents(getattr(t, 'investor_debt', 0))
-        for t in page.object_list
-    ]
+    page_debts = transaction_debts(page.object_list)
+    supplier_debts = to_rubles(page_debts["supplier_debt"])
+    client_debts = to_rubles(page_debts["client_debt"])
+    bonus_debts = to_rubles(page_debts["bonus_debt"])
+    investor_debts = to_rubles(page_debts["investor_debt"])
 
     context = {
         "fields": fields,
@@ -158,68 +158,25 @@ def index(request):
             "bonus_debt": bonus_debts,
             "investor_debt": investor_debts,
         },
+        **cursor_context(page),
     }
 
     return render(request, "main/main.html", context)
 
 def get_transaction_fields(is_accountant, is_assistant=False):
-    excluded = [
-        "id", "amount", "client_percentage", "bonus_percentage",
-        "supplier_percentage", "paid_amount", "modified_by_accountant",
-        "viewed_by_admin", "returned_date", "returned_by_supplier", "returned_bonus", "returned_to_client", "returned_to_investor",
-    ]
+    """Колонки таблицы сделок для роли — готовая схема из реестра main.schemas"""
+    role = schemas.ASSISTANT if is_assistant else schemas.ACCOUNTANT if is_accountant else schemas.ADMIN
+    return schemas.get(schemas.TRANSACTIONS, role)
 
-    field_order = [
-        "created_at", "client", "supplier", "account", "amount", "client_percentage",
-        "remaining_amount", "bonus_percentage", "bonus", "supplier_percentage", "profit",
-        "paid_amount", "debt", "documents"
-    ]
-
-    if is_assistant:
-        field_order = [
-            "created_at", "client", "supplier", "account", "amount", "paid_amount", "documents"
-        ]
+def _integer_text(name):
+    """Целая часть вычисляемой суммы как строка, как str(int(value))"""
+    return Cast(Cast(F(name), models.BigIntegerField()), CharField())
 
-    fields = get_model_fields(
-        Transaction,
-        excluded_fields=excluded,
-        field_order=field_order,
-    )
-
-    insertions = [
-        (4, {"name": "amount", "verbose_name": "Сумма", "is_amount": True, }),
-        (5, {"name": "client_percentage", "verbose_name": "%", "is_percent": True, }),
-        (6, {"name": "remaining_amount", "verbose_name": "Выдать", "is_amount": True }),
-        (7, {"name": "bonus_percentage", "verbose_name": "%", "is_percent": True, }),
-        (8, {"name": "bonus", "verbose_name": "Бонус", "is_amount": True}),
-        (9, {"name": "supplier_percentage", "verbose_name": "%", "is_percent": True, }),
-        (10, {"name": "profit", "verbose_name": "Прибыль", "is_amount": True}),
-        (11, {"name": "paid_amount", "verbose_name": "Оплачено", "is_amount": True}),
-        (12, {"name": "debt", "verbose_name": "Долг", "is_amount": True}),
-    ]
 
-    if is_assistant:
-        insertions = [
-            (4, {"name": "amount", "verbose_name": "Сумма", "is_amount": True, }),
-            (5, {"name": "paid_amount", "verbose_name": "Оплачено", "is_amount": True}),
-        ]
-
-    for pos, field in insertions:
-        fields.insert(pos, field)
-
-    return fields
-
-@forbid_supplier
-@login_required
-def transaction_list_sorted(request):
-    from decimal import Decimal
-    import math
-
-    is_accountant = request.user.user_type.name == 'Бухгалтер' if hasattr(request.user, 'user_type') else False
-    is_assistant = request.user.user_type.name == 'Ассистент' if hasattr(request.user, 'user_type') else False
-
-    fields = get_transaction_fields(is_accountant, is_assistant)
+def transaction_list_rows(request):
+    """Отфильтрованные транзакции списка и порядок сортировки: (queryset, ordering)"""
     transactions = Transaction.objects.select_related('client', 'supplier', 'account').all()
+    transactions = hidden_rows.exclude_hidden(request, hidden_rows.TRANSACTIONS, transactions)
 
     # Фильтрация по обычным полям
     client_id = request.GET.get('client')
@@ -231,6 +188,7 @@ def transaction_list_sorted(request):
     supplier_percentage = request.GET.get('supplier_percentage')
     paid_amount = request.GET.get('paid_amount')
     documents = request.GET.get('documents')
+    percentage_changed = request.GET.get('percentage_changed')
 
     if client_id:
         transactions = transactions.filter(client_id=client_id)
@@ -239,7 +197,7 @@ def transaction_list_sorted(request):
     if account_id:
         transactions = transactions.filter(account_id=account_id)
     if amount:
-        transactions = transactions.filter(amount__icontains=amount)
+        transactions = filter_contains(transactions, 'amount_search', amount)
     if client_percentage:
         transactions = transactions.filter(client_percentage__icontains=client_percentage)
     if bonus_percentage:
@@ -247,138 +205,124 @@ def transaction_list_sorted(request):
     if supplier_percentage:
         transactions = transactions.filter(supplier_percentage__icontains=supplier_percentage)
     if paid_amount:
-        transactions = transactions.filter(paid_amount__icontains=paid_amount)
+        transactions = filter_contains(transactions, 'paid_amount_search', paid_amount)
     if documents is not None:
         if documents.lower() in ['1', 'true', 'on']:
             transactions = transactions.filter(documents=True)
         elif documents.lower() in ['0', 'false', 'off']:
             transactions = transactions.filter(documents=False)
+    if percentage_changed and percentage_changed.lower() in ['1', 'true', 'on']:
+        # Только сделки с процентами, отличными от карточек клиента/поставщика
+        transactions = transactions.filter(
+            models.Q(client_percentage_changed=True) | models.Q(supplier_percentage_changed=True)
+        )
 
-    # Получаем QuerySet как список для дальнейшей фильтрации по вычисляемым полям и датам
-    transactions = list(transactions)
-
-    # Фильтрация по дате (created_at, fully_paid_at) по подстроке в любом формате
+    # Фильтрация по дате (created_at, fully_paid_at) по подстроке в любом формате:
+    # хранимый текст содержит даты во всех форматах списка (в UTC, как хранится)
     created_at = request.GET.get('created_at')
     fully_paid_at = request.GET.get('fully_paid_at')
 
-    def date_matches(dt, query):
-        if not dt or not query:
-            return False
-        # Проверяем несколько форматов
-        dt_strs = [
-            dt.strftime('%d.%m.%Y'),
-            dt.strftime('%Y-%m-%d'),
-            dt.strftime('%d.%m'),
-            dt.strftime('%d'),
-            dt.strftime('%m.%Y'),
-            dt.strftime('%Y'),
-            dt.strftime('%d.%m.%Y %H:%M'),
-            dt.strftime('%Y-%m-%d %H:%M'),
-            dt.strftime('%d.%m %H:%M'),
-            dt.strftime('%H:%M'),
-        ]
-        return any(query in s for s in dt_strs)
-
     if created_at:
-        transactions = [t for t in transactions if t.created_at and date_matches(t.created_at, created_at)]
+        transactions = filter_contains(transactions, 'created_at_search', created_at)
     if fully_paid_at:
-        transactions = [t for t in transactions if t.fully_paid_at and date_matches(t.fully_paid_at, fully_paid_at)]
-
-    # Фильтрация по вычисляемым полям
-    remaining_amount = request.GET.get('remaining_amount')
-    bonus = request.GET.get('bonus')
-    profit = request.GET.get('profit')
-    debt = request.GET.get('debt')
-
-    if remaining_amount:
-        transactions = [t for t in transactions if remaining_amount in str(int(t.remaining_amount))]
-    if bonus:
-        transactions = [t for t in transactions if bonus in str(int(t.bonus))]
-    if profit:
-        transactions = [t for t in transactions if profit in str(int(t.profit))]
-    if debt:
-        transactions = [t for t in transactions if debt in str(int(t.debt['amount']))]
+        transactions = filter_contains(transactions, 'fully_paid_at_search', fully_paid_at)
 
-    # Сортировка
+    # Фильтрация по вычисляемым полям: подстрока в целой части значения
+    transactions = transactions.with_debts().alias(
+        debt=Coalesce('paid_amount', Value(Decimal(0))) - F('amount'),
+    )
+    for name in ('remaining_amount', 'bonus', 'profit', 'debt'):
+        value = request.GET.get(name)
+        if value:
+            transactions = transactions.alias(**{f'{name}_text': _integer_text(name)}).filter(
+                **{f'{name}_text__contains': value}
+            )
+
+    # Сортировка; при равных значениях — по id, как при устойчивой сортировке
     sort = request.GET.get('sort')
     order = request.GET.get('order', 'asc')
     allowed_sort_fields = {
-        'created_at': lambda t: t.created_at,
-        'client': lambda t: t.client.name if t.client else '',
-        'supplier': lambda t: t.supplier.name if t.supplier else '',
-        'account': lambda t: t.account.name if t.account else '',
-        'amount': lambda t: t.amount,
-        'client_percentage': lambda t: t.client_percentage,
-        'bonus_percentage': lambda t: t.bonus_percentage,
-        'supplier_percentage': lambda t: t.supplier_percentage,
-        'paid_amount': lambda t: t.paid_amount,
-        'documents': lambda t: t.documents,
-        'remaining_amount': lambda t: t.remaining_amount,
-        'bonus': lambda t: t.bonus,
-        'profit': lambda t: t.profit,
-        'debt': lambda t: t.debt['amount'],
-        'fully_paid_at': lambda t: t.fully_paid_at or '',
+        'created_at': F('created_at'),
+        'client': Coalesce('client__name', Value('')),
+        'supplier': Coalesce('supplier__name', Value('')),
+        'account': Coalesce('account__name', Value('')),
+        'amount': F('amount'),
+        'client_percentage': F('client_percentage'),
+        'bonus_percentage': F('bonus_percentage'),
+        'supplier_percentage': F('supplier_percentage'),
+        'paid_amount': F('paid_amount'),
+        'documents': F('documents'),
+        'remaining_amount': F('remaining_amount'),
+        'bonus': F('bonus'),
+        'profit': F('profit'),
+        'debt': F('debt'),
+        'fully_paid_at': F('fully_paid_at'),
     }
     if sort in allowed_sort_fields:
-        reverse = (order == 'desc')
-        transactions = sorted(transactions, key=allowed_sort_fields[sort], reverse=reverse)
+        ordering = [(allowed_sort_fields[sort], order == 'desc')]
     else:
-        transactions = sorted(transactions, key=lambda t: t.created_at, reverse=True)
+        ordering = [('created_at', True)]
+    return transactions, ordering + [('id', False)]
 
-    # Пагинация
-    paginator = Paginator(transactions, 200)
-    page_number = request.GET.get('page', 1)
-    page = paginator.get_page(page_number)
-    transaction_ids = [tr.id for tr in page.object_list]
-    html = "".join(
-        render_to_string(
-            "components/table_row.html",
-            {"item": tr, "fields": fields},
-        )
-        for tr in page.object_list
-    )
 
+def transaction_rows_context(transactions):
+    """Изменённые проценты и долги строк страницы или окна транзакций"""
     changed_cells = {}
-    for t in page.object_list:
-        client_changed = t.client and t.client_percentage != t.client.percentage
-        supplier_changed = t.supplier and t.supplier_percentage != t.supplier.cost_percentage
+    for t in transactions:
+        client_changed = t.client_id and t.client_percentage_changed
+        supplier_changed = t.supplier_id and t.supplier_percentage_changed
         if client_changed or supplier_changed:
             changed_cells[t.id] = {
                 'client_percentage': client_changed,
                 'supplier_percentage': supplier_changed
             }
 
-    supplier_debts = [
-        strip_cents(getattr(t, 'supplier_debt', 0))
-        for t in page.object_list
-    ]
-    client_debts = [
-        strip_cents(getattr(t, 'client_debt', 0))
-        for t in page.object_list
-    ]
-    bonus_debts = [
-        strip_cents(Decimal(str(t.amount or 0)) * Decimal(str(t.bonus_percentage or 0)) / Decimal('100') - Decimal(str(t.returned_bonus or 0)))
-        for t in page.object_list
-    ]
-    investor_debts = [
-        strip_cents(getattr(t, 'investor_debt', 0))
-        for t in page.object_list
-    ]
+    page_debts = transaction_debts(transactions)
+    supplier_debts = to_rubles(page_debts["supplier_debt"])
+    client_debts = to_rubles(page_debts["client_debt"])
+    bonus_debts = to_rubles(page_debts["bonus_debt"])
+    investor_debts = to_rubles(page_debts["investor_debt"])
+
+    return {
+        "changed_cells": changed_cells,
+        "supplier_debts": supplier_debts,
+        "debts": {
+            "supplier_debts": supplier_debts,
+            "client_debt": client_debts,
+            "bonus_debt": bonus_debts,
+            "investor_debt": investor_debts,
+        },
+    }
+
 
+def transaction_fields_for(request):
+    return schemas.for_request(schemas.TRANSACTIONS, request)
+
+
+@forbid_supplier
+@login_required
+def transaction_list_sorted(request):
+    fields = transaction_fields_for(request)
+    transactions, ordering = transaction_list_rows(request)
+
+    # Пагинация: по номеру страницы или по курсору (параметр cursor)
+    paginator, page = paginate(
+        request, transactions, ordering, 200,
+        count=lambda: cached_count(
+            'transactions', transactions,
+            filter_signature(request.GET) + hidden_rows.hidden_signature(request, hidden_rows.TRANSACTIONS),
+            model=Transaction,
+        ),
+    )
+    transaction_ids = [tr.id for tr in page.object_list]
     return JsonResponse({
-        "html": html,
+        **page_rows(request, fields, page.object_list),
         "context": {
             "total_pages": paginator.num_pages,
             "current_page": page.number,
             "transaction_ids": transaction_ids,
-            "changed_cells": changed_cells,
-            "supplier_debts": supplier_debts,
-            "debts": {
-                "supplier_debts": supplier_debts,
-                "client_debt": client_debts,
-                "bonus_debt": bonus_debts,
-                "investor_debt": investor_debts,
-            },
+            **transaction_rows_context(page.object_list),
+            **cursor_context(page),
         },
     })
 
@@ -481,8 +425,8 @@ def transaction_create(request):
                 account=account_supplier
             )
 
-            client_changed = trans.client and trans.client_percentage != trans.client.percentage
-            supplier_changed = trans.supplier and trans.supplier_percentage != trans.supplier.cost_percentage
+            client_changed = trans.client_id and trans.client_percentage_changed
+            supplier_changed = trans.supplier_id and trans.supplier_percentage_changed
             changed_cells = {
                 trans.id: {
                     'client_percentage': client_changed,
@@ -570,21 +514,21 @@ def transaction_edit(request, pk=None):
             new_supplier_percentage = Decimal(str(supplier_percentage or supplier.cost_percentage))
             new_amount = Decimal(str(amount_float))
 
-            new_bonus = Decimal(math.floor(float(new_amount * new_bonus_percentage / Decimal('100'))))
+            new_bonus = money.floor_percent(new_amount, new_bonus_percentage)
             if trans.returned_bonus > new_bonus:
                 return JsonResponse(
                     {"status": "error", "message": "Возвращено бонуса больше, чем новый бонус по проценту. Измените процент или уменьшите возврат."},
                     status=400,
                 )
 
-            new_remaining_amount = Decimal(math.floor(float(new_amount * (Decimal('100') - new_client_percentage) / Decimal('100'))))
+            new_remaining_amount = money.floor_percent(new_amount, Decimal('100') - new_client_percentage)
             if trans.returned_to_client > new_remaining_amount:
                 return JsonResponse(
                     {"status": "error", "message": "Возвращено клиенту больше, чем новая сумма по проценту клиента. Измените процент или уменьшите возврат."},
                     status=400,
                 )
 
-            new_supplier_fee = Decimal(math.floor(float(new_amount * new_supplier_percentage / Decimal('100'))))
+            new_supplier_fee = money.floor_percent(new_amount, new_supplier_percentage)
             limit = Decimal(trans.paid_amount) - new_supplier_fee
             if limit >= 0 and Decimal(trans.returned_by_supplier) > limit:
                 return JsonResponse(
@@ -646,8 +590,8 @@ def transaction_edit(request, pk=None):
                 trans.viewed_by_admin = False
             trans.save()
 
-            client_changed = trans.client and trans.client_percentage != trans.client.percentage
-            supplier_changed = trans.supplier and trans.supplier_percentage != trans.supplier.cost_percentage
+            client_changed = trans.client_id and trans.client_percentage_changed
+            supplier_changed = trans.supplier_id and trans.supplier_percentage_changed
             changed_cells = {
                 trans.id: {
                     'client_percentage': client_changed,
@@ -813,8 +757,8 @@ def transaction_payment(request, pk=None):
 
             trans.save()
 
-            client_changed = trans.client and trans.client_percentage != trans.client.percentage
-            supplier_changed = trans.supplier and trans.supplier_percentage != trans.supplier.cost_percentage
+            client_changed = trans.client_id and trans.client_percentage_changed
+            supplier_changed = trans.supplier_id and trans.supplier_percentage_changed
             changed_cells = {
                 trans.id: {
                     'client_percentage': client_changed,
@@ -1002,10 +946,6 @@ def suppliers(request):
         supplier.accounts_display = ", ".join(acc.name for acc in supplier.accounts.all().exclude(name="Наличные"))
 
     fields = get_supplier_fields()
-    
-    for field in fields:
-        if field.get("name") == "accounts":
-            field["name"] = "accounts_display"
 
     context = {
         "fields": fields,
@@ -1016,28 +956,7 @@ def suppliers(request):
     return render(request, "main/suppliers.html", context)
 
 def get_supplier_fields():
-    excluded = [
-        "id",
-        "cost_percentage",
-        "user",
-        "visible_for_assistant",
-        "default_account",
-        "visible_in_summary"
-    ]
-    fields = get_model_fields(
-        Supplier,
-        excluded_fields=excluded,
-    )
-
-    insertions = [
-        (2, {"name": "cost_percentage", "verbose_name": "%", "is_percent": True, }),
-        (3, {"name": "accounts", "verbose_name": "Счета"}),
-    ]
-
-    for pos, field in insertions:
-        fields.insert(pos, field)
-
-    return fields
+    return schemas.get(schemas.SUPPLIERS)
 
 @forbid_supplier
 @login_required
@@ -1052,25 +971,7 @@ def clients(request):
     return render(request, "main/clients.html", context)
 
 def get_client_fields():
-    excluded = [
-        "id",
-        "percentage",
-        "bonus_percentage"
-    ]
-    fields = get_model_fields(
-        Client,
-        excluded_fields=excluded,
-    )
-
-    insertions = [
-        (1, {"name": "percentage", "verbose_name": "%", "is_percent": True, }),
-        (3, {"name": "bonus_percentage", "verbose_name": "%", "is_percent": True, }),
-    ]
-
-    for pos, field in insertions:
-        fields.insert(pos, field)
-
-    return fields
+    return schemas.get(schemas.CLIENTS)
 
 @forbid_supplier
 @login_required
@@ -1143,6 +1044,8 @@ def client_edit(request, pk=None):
             client.bonus_percentage = float(bonus_percentage) if bonus_percentage is not None else 0
 
             client.save()
+            if old_percentage != new_percentage:
+                Transaction.objects.filter(client=client).refresh_percentage_drift()
             context = {
                 "item": client,
                 "fields": get_client_fields(),
@@ -1181,7 +1084,7 @@ def client_delete(request, pk=None):
 @forbid_supplier
 @login_required
 def cash_flow(request):
-    cash_flow = CashFlow.objects.all().order_by('-created_at')
+    cash_flow = CashFlow.objects.select_related('account', 'supplier', 'purpose', 'created_by').order_by('-created_at')
 
     paginator = Paginator(cash_flow, 200)
     page_number = request.GET.get('page', 1)
@@ -1197,11 +1100,10 @@ def cash_flow(request):
 
     return render(request, "main/cash_flow.html", context)
 
-@forbid_supplier
-@login_required
-def cash_flow_list(request):
-    fields = get_cash_flow_fields()
-    cash_flow = CashFlow.objects.all()
+def cash_flow_list_rows(request):
+    """Отфильтрованные движения ДС списка и порядок сортировки: (queryset, ordering)"""
+    cash_flow = CashFlow.objects.select_related('account', 'supplier', 'purpose', 'created_by')
+    cash_flow = hidden_rows.exclude_hidden(request, hidden_rows.CASH_FLOW, cash_flow)
 
     # Фильтрация
     created_at = request.GET.get('created_at')
@@ -1213,14 +1115,15 @@ def cash_flow_list(request):
     id_created_by = request.GET.get('created_by')
 
     if created_at:
-        # Фильтрация по подстроке даты (например, "2" найдёт все даты, где есть "2")
-        cash_flow = cash_flow.filter(created_at__strftime__icontains=created_at)
+        # Год, месяц, день или минута — диапазон по индексу, прочий текст — подстрока даты
+        cash_flow = filter_by_date(cash_flow, 'created_at', created_at, search_field='created_at_search')
     if id_account:
         cash_flow = cash_flow.filter(account_id=id_account)
     if id_supplier:
         cash_flow = cash_flow.filter(supplier_id=id_supplier)
     if amount:
-        cash_flow = cash_flow.extra(where=["CAST(amount AS CHAR) LIKE %s"], params=[f"%{amount}%"])
+        # "=150", ">1000", "100..500" — по индексу, прочий текст — подстрока суммы
+        cash_flow = filter_by_amount(cash_flow, 'amount', amount, search_field='amount_search')
     if id_purpose:
         cash_flow = cash_flow.filter(purpose_id=id_purpose)
     if comment:
@@ -1231,6 +1134,7 @@ def cash_flow_list(request):
     # Сортировка
     sort = request.GET.get('sort')
     order = request.GET.get('order', 'asc')
+    # У каждой колонки есть составной индекс (колонка, id) — см. CashFlow.Meta.indexes
     allowed_sort_fields = {
         'created_at': 'created_at',
         'id_account': 'account_id',
@@ -1245,30 +1149,34 @@ def cash_flow_list(request):
         'created_by': 'created_by_id',
     }
     if sort in allowed_sort_fields:
-        sort_field = allowed_sort_fields[sort]
-        if order == 'desc':
-            sort_field = '-' + sort_field
-        cash_flow = cash_flow.order_by(sort_field)
+        ordering = [(allowed_sort_fields[sort], order == 'desc')]
     else:
-        cash_flow = cash_flow.order_by('-created_at')
+        ordering = [('created_at', True)]
+    return cash_flow, ordering + [('id', False)]
 
-    paginator = Paginator(cash_flow, 200)
-    page_number = request.GET.get('page', 1)
-    page = paginator.get_page(page_number)
-    cash_flow_ids = [tr.id for tr in page.object_list]
-    html = "".join(
-        render_to_string(
-            "components/table_row.html",
-            {"item": tr, "fields": fields},
-        )
-        for tr in page.object_list
+
+@forbid_supplier
+@login_required
+def cash_flow_list(request):
+    fields = get_cash_flow_fields()
+    cash_flow, ordering = cash_flow_list_rows(request)
+
+    paginator, page = paginate(
+        request, cash_flow, ordering, 200,
+        count=lambda: cached_count(
+            'cash_flows', cash_flow,
+            filter_signature(request.GET) + hidden_rows.hidden_signature(request, hidden_rows.CASH_FLOW),
+            model=CashFlow,
+        ),
     )
+    cash_flow_ids = [tr.id for tr in page.object_list]
     return JsonResponse({
-        "html": html,
+        **page_rows(request, fields, page.object_list),
         "context": {
             "total_pages": paginator.num_pages,
             "current_page": page.number,
             "cash_flow_ids": cash_flow_ids,
+            **cursor_context(page),
         },
     })
 
@@ -1285,94 +1193,31 @@ def investor_list(request):
     return JsonResponse(list(investor_data), safe=False)
 
 def get_cash_flow_fields():
-    excluded = [
-        "id",
-        "amount",
-        "transaction",
-        "returned_to_investor"
-    ]
-    fields = [
-        {"name": "created_at", "verbose_name": "Дата", "is_date": True},
-        {"name": "account", "verbose_name": "Счет", "is_relation": True},
-        {"name": "supplier", "verbose_name": "Поставщик", "is_relation": True},
-        {"name": "purpose", "verbose_name": "Назначение", "is_relation": True},
-        {"name": "comment", "verbose_name": "Комментарий"},
-        {"name": "created_by", "verbose_name": "Пользователь", "is_relation": True},
-    ]
-
-    insertions = [
-        (3, {"name": "formatted_amount", "verbose_name": "Сумма", "is_text": True}),
-    ]
-
-    for pos, field in insertions:
-        fields.insert(pos, field)
-
-    return fields
+    return schemas.get(schemas.CASH_FLOW)
 
 @forbid_supplier
 @login_required
 def transaction_list(request):
-    is_accountant = request.user.user_type.name == 'Бухгалтер' if hasattr(request.user, 'user_type') else False
-    is_assistant = request.user.user_type.name == 'Ассистент' if hasattr(request.user, 'user_type') else False
-
-    fields = get_transaction_fields(is_accountant, is_assistant)
-    transactions = Transaction.objects.select_related('client', 'supplier').all().order_by('-created_at')
-    paginator = Paginator(transactions, 200)
-    page_number = request.GET.get('page', 1)
-    page = paginator.get_page(page_number)
-    changed_cells = {}
-    for t in page.object_list:
-        client_changed = t.client and t.client_percentage != t.client.percentage
-        supplier_changed = t.supplier and t.supplier_percentage != t.supplier.cost_percentage
-
-        if client_changed or supplier_changed:
-            changed_cells[t.id] = {
-                'client_percentage': client_changed,
-                'supplier_percentage': supplier_changed
-            }
-    transaction_ids = [tr.id for tr in page.object_list]
-    html = "".join(
-        render_to_string(
-            "components/table_row.html",
-            {"item": tr, "fields": fields},
-        )
-        for tr in page.object_list
+    fields = transaction_fields_for(request)
+    transactions = Transaction.objects.select_related('client', 'supplier').all()
+    transactions = hidden_rows.exclude_hidden(request, hidden_rows.TRANSACTIONS, transactions)
+    paginator, page = paginate(
+        request, transactions, [('created_at', True), ('id', False)], 200,
+        count=lambda: cached_count(
+            'transactions', transactions,
+            hidden_rows.hidden_signature(request, hidden_rows.TRANSACTIONS),
+            model=Transaction,
+        ),
     )
-
-    supplier_debts = [
-        strip_cents(getattr(t, 'supplier_debt', 0))
-        for t in page.object_list
-    ]
-
-    client_debts = [
-        strip_cents(getattr(t, 'client_debt', 0))
-        for t in page.object_list
-    ]
-
-    bonus_debts = [
-        strip_cents(Decimal(str(t.amount or 0)) * Decimal(str(t.bonus_percentage or 0)) / Decimal('100') - Decimal(str(t.returned_bonus or 0)))
-        for t in page.object_list
-    ]
-
-    investor_debts = [
-        strip_cents(getattr(t, 'investor_debt', 0))
-        for t in page.object_list
-    ]
-
+    transaction_ids = [tr.id for tr in page.object_list]
     return JsonResponse({
-        "html": html,
+        **page_rows(request, fields, page.object_list),
         "context": {
             "total_pages": paginator.num_pages,
             "current_page": page.number,
             "transaction_ids": transaction_ids,
-            "changed_cells": changed_cells,
-            "supplier_debts": supplier_debts,
-            "debts": {
-                "supplier_debts": supplier_debts,
-                "client_debt": client_debts,
-                "bonus_debt": bonus_debts,
-                "investor_debt": investor_debts,
-            },
+            **transaction_rows_context(page.object_list),
+            **cursor_context(page),
         },
     })
 
@@ -1515,10 +1360,6 @@ def supplier_create(request):
             supplier.accounts_display = ", ".join(acc.name for acc in supplier.accounts.all().exclude(name="Наличные"))
 
             fields = get_supplier_fields()
-            
-            for field in fields:
-                if field.get("name") == "accounts":
-                    field["name"] = "accounts_display"
 
             context = {
                 "item": supplier,
@@ -1617,14 +1458,12 @@ def supplier_edit(request, pk=None):
                 supplier.user = user
 
             supplier.save()
+            if old_cost_percentage != new_cost_percentage:
+                Transaction.objects.filter(supplier=supplier).refresh_percentage_drift()
 
             supplier.accounts_display = ", ".join(acc.name for acc in supplier.accounts.all().exclude(name="Наличные"))
 
             fields = get_supplier_fields()
-            
-            for field in fields:
-                if field.get("name") == "accounts":
-                    field["name"] = "accounts_display"
 
             context = {
                 "item": supplier,
@@ -3387,8 +3226,7 @@ def debtors(request):
 
     is_supplier = hasattr(request.user, 'user_type') and request.user.user_type.name == 'Поставщик' or request.user.user_type.name == 'Филиал'
 
-    branches = list(Branch.objects.all().values('id', 'name'))
-
+    branch_ids = None
     if is_supplier:
         branch = None
         if hasattr(user, 'branch') and user.branch:
@@ -3398,57 +3236,23 @@ def debtors(request):
             if supplier:
                 branch = supplier.branch
         if branch:
-            branches = [b for b in branches if b['id'] == branch.id]
-
-    transactions = Transaction.objects.select_related('supplier__branch').filter(paid_amount__gt=0).all()
+            branch_ids = [branch.id]
 
-    branch_debts = defaultdict(float)
-    for t in transactions:
-        branch = t.supplier.branch if t.supplier and t.supplier.branch else None
-        if branch and branch.name != "Филиал 1" and branch.name != "Наши ИП":
-            branch_debts[branch.name] += float(getattr(t, 'supplier_debt', 0))
+    snapshot = build_balance_snapshot(branch_ids)
 
     branch_debts_list = [
-        {"branch": branch['name'], "debt": branch_debts.get(branch['name'], 0)}
-        for branch in branches
-    ]
-
-    total_branch_debts = sum(
-        branch['debt'] for branch in branch_debts_list if branch['branch'] != "Филиал 1" and branch['branch'] != "Наши ИП"
-    )
-
-    dt_client = Client.objects.filter(name__iexact="ДТ").first()
-    dt_client_id = dt_client.id if dt_client else None
-
-    total_bonuses = sum(float(t.bonus_debt) for t in transactions)
-    total_remaining = sum(
-        float(t.client_debt_paid)
-        for t in transactions
-        if not t.client or t.client_id != dt_client_id
-    )
-    total_profit = sum(float(t.profit) for t in transactions if float(t.paid_amount) - float(t.amount) == 0)
-
-    transactionsInvestors = [
-        t for t in Transaction.objects.filter(paid_amount__gt=0)
-        if getattr(t, 'bonus_debt', 0) == 0
-        and getattr(t, 'client_debt', 0) == 0
-        and getattr(t, 'profit', 0) > 0
+        {
+            "branch": line.name,
+            "debt": float(line.debt) if line.counted else 0,
+        }
+        for line in snapshot.branches
     ]
 
-    cashflows = CashFlow.objects.filter(
-        purpose__operation_type=PaymentPurpose.INCOME
-    ).exclude(purpose__name__in=["Оплата", "Внесение инвестора", "Возврат от поставщиков", "Возврат от поставщиков", "Корректировка баланса"])
+    total_branch_debts = float(snapshot.total_branch_debts)
 
-    total_profit = sum(float(t.profit - t.returned_to_investor) for t in transactionsInvestors) + sum(float(cf.amount - (cf.returned_to_investor or 0)) for cf in cashflows)
-
-    dt_client = Client.objects.filter(name__iexact="ДТ").first()
-    dt_client_id = dt_client.id if dt_client else None
-
-    dt_total = sum(
-        float(t.client_debt_paid)
-        for t in transactions
-        if t.client and t.client_id == dt_client_id
-    )
+    total_bonuses = float(snapshot.bonus_debt)
+    total_remaining = float(snapshot.client_debt_paid_without_dt)
+    total_profit = float(snapshot.investor_debt)
 
     summary = [
         {"name": "Бонусы", "amount": total_bonuses},
@@ -3485,8 +3289,7 @@ def balance(request):
     is_supplier = hasattr(user, 'user_type') and user.user_type.name in ['Поставщик', 'Филиал']
     is_other_user = not is_admin and not is_supplier
 
-    branches = list(Branch.objects.all().values('id', 'name'))
-
+    branch_ids = None
     if is_supplier:
         branch = None
         if hasattr(user, 'branch') and user.branch:
@@ -3496,41 +3299,24 @@ def balance(request):
             if supplier:
                 branch = supplier.branch
         if branch:
-            branches = [b for b in branches if b['id'] == branch.id]
+            branch_ids = [branch.id]
 
-    transactions = Transaction.objects.select_related('supplier__branch').filter(paid_amount__gt=0).all()
-
-    branch_debts = defaultdict(float)
-    for t in transactions:
-        branch = t.supplier.branch if t.supplier and t.supplier.branch else None
-        if branch and branch.name not in ["Филиал 1", "Наши ИП"]:
-            branch_debts[branch.name] += float(getattr(t, 'supplier_debt', 0))
+    snapshot = build_balance_snapshot(branch_ids)
 
     branch_debts_list = [
-        {"id": branch['id'], "branch": branch['name'], "debt": branch_debts.get(branch['name'], 0)}
-        for branch in branches
-    ]
-
-    total_branch_debts = sum(
-        branch['debt'] for branch in branch_debts_list if branch['branch'] not in ["Филиал 1", "Наши ИП"]
-    )
-
-    total_bonuses = sum(float(t.bonus_debt) for t in transactions)
-    total_remaining = sum(float(t.client_debt_paid) for t in transactions)
-
-    transactionsInvestors = [
-        t for t in Transaction.objects.filter(paid_amount__gt=0)
-        if getattr(t, 'bonus_debt', 0) == 0
-        and getattr(t, 'client_debt', 0) == 0
-        and getattr(t, 'profit', 0) > 0
+        {
+            "id": line.id,
+            "branch": line.name,
+            "debt": float(line.debt) if line.counted else 0,
+        }
+        for line in snapshot.branches
     ]
 
-    cashflows = CashFlow.objects.filter(
-        purpose__operation_type=PaymentPurpose.INCOME
-    ).exclude(purpose__name__in=["Оплата", "Внесение инвестора", "Возврат от поставщиков", "Корректировка баланса"])
+    total_branch_debts = float(snapshot.total_branch_debts)
 
-    total_profit = sum(float(t.profit - t.returned_to_investor) for t in transactionsInvestors) + \
-                   sum(float(cf.amount - (cf.returned_to_investor or 0)) for cf in cashflows)
+    total_bonuses = float(snapshot.bonus_debt)
+    total_remaining = float(snapshot.client_debt_paid)
+    total_profit = float(snapshot.investor_debt)
 
     summary = [
         {"name": "Бонусы", "amount": total_bonuses},
@@ -3617,7 +3403,7 @@ def settle_supplier_debt(request, pk: int):
                     paid_amount__gt=0
                 ).order_by('created_at')
 
-                branch_total_debt = sum(Decimal(str(getattr(t, 'supplier_debt', 0) or 0)) for t in branch_transactions)
+                branch_total_debt = (BranchDebt.by_branch([branch.id]).get(branch.id) or Decimal(0)) if branch else Decimal(0)
 
                 if amount_value > branch_total_debt:
                     return JsonResponse({"status": "error", "message": "Сумма не может превышать долг филиала"}, status=400)
@@ -3644,7 +3430,7 @@ def settle_supplier_debt(request, pk: int):
                     row.supplier = str(t.supplier) if t.supplier else ""
                     row.supplier_percentage = t.supplier_percentage
                     paid = Decimal(str(t.paid_amount or 0))
-                    supplier_fee = Decimal(math.floor(float(Decimal(str(t.amount or 0)) * Decimal(str(t.supplier_percentage or 0)) / Decimal('100'))))
+                    supplier_fee = money.floor_percent(t.amount, t.supplier_percentage)
                     row.supplier_debt = paid - supplier_fee - Decimal(str(t.returned_by_supplier or 0))
                     row.amount = t.amount
 
@@ -3659,7 +3445,7 @@ def settle_supplier_debt(request, pk: int):
                     changed_html_rows.append(render_to_string("components/table_row.html", {"item": row, "fields": fields}))
                     changed_ids.append(t.id)
 
-                branch_total_debt = sum(float(getattr(t, 'supplier_debt', 0) or 0) for t in branch_transactions)
+                branch_total_debt = float(BranchDebt.by_branch([branch.id]).get(branch.id) or 0) if branch else 0
 
                 cash_account = Account.objects.filter(name__iexact="Наличные").first()
                 if cash_account:
@@ -3717,8 +3503,9 @@ def settle_supplier_debt(request, pk: int):
                         ]
                     }))
 
-                transactions_all = Transaction.objects.filter(paid_amount__gt=0).exclude(supplier__branch__name="Филиал 1").exclude(supplier__branch__name="Наши ИП")
-                all_branches_total_debt = sum(float(getattr(t, 'supplier_debt', 0) or 0) for t in transactions_all)
+                all_branches_total_debt = float(sum(
+                    BranchDebt.objects.exclude(branch__name__in=["Филиал 1", "Наши ИП"]).values_list("debt", flat=True)
+                ))
 
                 return JsonResponse({
                     "html_debt_repayments": html_debt_repayments,
@@ -3787,24 +3574,11 @@ def settle_supplier_debt(request, pk: int):
                 ]
                 html = render_to_string("components/table_row.html", {"item": row, "fields": fields})
 
-                total_debt = sum(float(getattr(t, 'bonus_debt', 0) or 0) for t in Transaction.objects.filter(paid_amount__gt=0))
-
-                transactions_all = Transaction.objects.filter(paid_amount__gt=0)
-                total_bonuses = sum(float(getattr(t, 'bonus_debt', 0) or 0) for t in transactions_all)
-                total_remaining = sum(float(getattr(t, 'client_debt_paid', 0) or 0) for t in transactions_all)
-
-                transactionsInvestors = [
-                    t for t in Transaction.objects.filter(paid_amount__gt=0)
-                    if getattr(t, 'bonus_debt', 0) == 0
-                    and getattr(t, 'client_debt', 0) == 0
-                    and getattr(t, 'profit', 0) > 0
-                ]
-
-                cashflows = CashFlow.objects.filter(
-                    purpose__operation_type=PaymentPurpose.INCOME
-                ).exclude(purpose__name__in=["Оплата", "Внесение инвестора", "Возврат от поставщиков", "Корректировка баланса"])
-
-                total_profit = sum(float(getattr(t, 'profit', 0) - getattr(t, 'returned_to_investor', 0)) for t in transactionsInvestors) + sum(float(cf.amount - (cf.returned_to_investor or 0)) for cf in cashflows)
+                ledger = LedgerSummary.current()
+                total_debt = float(ledger.bonus_debt)
+                total_bonuses = float(ledger.bonus_debt)
+                total_remaining = float(ledger.client_debt_paid)
+                total_profit = float(ledger.investor_debt)
 
                 is_admin = request.user.user_type.name == 'Администратор' if hasattr(request.user, 'user_type') else False
 
@@ -3907,24 +3681,11 @@ def settle_supplier_debt(request, pk: int):
                     ]
                 })
 
-                total_debt = sum(float(getattr(t, 'client_debt_paid', 0) or 0) for t in Transaction.objects.filter(paid_amount__gt=0))
-
-                transactions_all = Transaction.objects.filter(paid_amount__gt=0)
-                total_bonuses = sum(float(getattr(t, 'bonus_debt', 0) or 0) for t in transactions_all)
-                total_remaining = sum(float(getattr(t, 'client_debt_paid', 0) or 0) for t in transactions_all)
-
-                transactionsInvestors = [
-                    t for t in Transaction.objects.filter(paid_amount__gt=0)
-                    if getattr(t, 'bonus_debt', 0) == 0
-                    and getattr(t, 'client_debt', 0) == 0
-                    and getattr(t, 'profit', 0) > 0
-                ]
-
-                cashflows = CashFlow.objects.filter(
-                    purpose__operation_type=PaymentPurpose.INCOME
-                ).exclude(purpose__name__in=["Оплата", "Внесение инвестора", "Возврат от поставщиков", "Корректировка баланса"])
-
-                total_profit = sum(float(getattr(t, 'profit', 0) - getattr(t, 'returned_to_investor', 0)) for t in transactionsInvestors) + sum(float(cf.amount - (cf.returned_to_investor or 0)) for cf in cashflows)
+                ledger = LedgerSummary.current()
+                total_debt = float(ledger.client_debt_paid)
+                total_bonuses = float(ledger.bonus_debt)
+                total_remaining = float(ledger.client_debt_paid)
+                total_profit = float(ledger.investor_debt)
 
                 summary = [
                     {"name": "Бонусы", "amount": total_bonuses},
@@ -3988,18 +3749,10 @@ def settle_supplier_debt(request, pk: int):
                 ]
                 html = render_to_string("components/table_row.html", {"item": row, "fields": fields})
 
-                transactions_all = Transaction.objects.filter(paid_amount__gt=0)
-
-                total_bonuses = sum(float(getattr(t, 'bonus_debt', 0) or 0) for t in transactions_all)
-                total_remaining = sum(float(getattr(t, 'client_debt_paid', 0) or 0) for t in transactions_all)
-                transactionsInvestors = [
-                    t for t in Transaction.objects.filter(paid_amount__gt=0)
-                    if getattr(t, 'bonus_debt', 0) == 0
-                    and getattr(t, 'client_debt', 0) == 0
-                    and getattr(t, 'profit', 0) > 0
-                ]
-
-                total_profit = sum(float(getattr(t, 'profit', 0)) for t in transactionsInvestors)
+                ledger = LedgerSummary.current()
+                total_bonuses = float(ledger.bonus_debt)
+                total_remaining = float(ledger.client_debt_paid)
+                total_profit = float(ledger.investor_debt)
 
                 investorDebtOperation.created_at = timezone.localtime(investorDebtOperation.created_at).strftime("%d.%m.%Y %H:%M") if investorDebtOperation.created_at else ""
                 investorDebtOperation.operation_type = (
@@ -4050,15 +3803,14 @@ def settle_supplier_debt(request, pk: int):
                 credit = BalanceData.objects.filter(name="Кредит").aggregate(total=Sum("amount"))["total"] or Decimal(0)
                 short_term = BalanceData.objects.filter(name="Краткосрочные обязательства").aggregate(total=Sum("amount"))["total"] or Decimal(0)
 
+                branch_debts = BranchDebt.by_branch()
+
                 debtors = []
                 total_debtors = Decimal(0)
                 for branch in Supplier.objects.exclude(branch=None).values_list("branch__id", "branch__name").distinct():
                     branch_id, branch_name = branch
                     if branch_name != "Филиал 1" and branch_name != "Наши ИП":
-                        branch_debt = sum(
-                            (t.supplier_debt or Decimal(0))
-                            for t in Transaction.objects.filter(supplier__branch_id=branch_id, paid_amount__gt=0)
-                        )
+                        branch_debt = branch_debts.get(branch_id) or Decimal(0)
                         debtors.append({"branch": branch_name, "amount": branch_debt})
                         total_debtors += branch_debt
 
@@ -4071,21 +3823,10 @@ def settle_supplier_debt(request, pk: int):
 
                 safe_amount += cash_balance
 
-                bonuses = sum((t.bonus_debt or Decimal(0)) for t in Transaction.objects.filter(paid_amount__gt=0))
-                client_debts = sum((t.client_debt or Decimal(0)) for t in Transaction.objects.filter(paid_amount__gt=0).all())
-
-                transactionsInvestors = [
-                    t for t in Transaction.objects.filter(paid_amount__gt=0)
-                    if getattr(t, 'bonus_debt', 0) == 0
-                    and getattr(t, 'client_debt', 0) == 0
-                    and getattr(t, 'profit', 0) > 0
-                ]
-
-                cashflows = CashFlow.objects.filter(
-                    purpose__operation_type=PaymentPurpose.INCOME
-                ).exclude(purpose__name__in=["Оплата", "Внесение инвестора", "Возврат от поставщиков", "Корректировка баланса"])
-
-                total_profit = sum(float(getattr(t, 'profit', 0) - getattr(t, 'returned_to_investor', 0)) for t in transactionsInvestors) + sum(float(cf.amount - (cf.returned_to_investor or 0)) for cf in cashflows)
+                ledger = LedgerSummary.current()
+                bonuses = ledger.bonus_debt
+                client_debts = ledger.client_debt
+                total_profit = float(ledger.investor_debt)
 
                 assets_total = equipment + Decimal(0) + total_debtors + safe_amount
                 liabilities_total = credit + client_debts + short_term + bonuses + Decimal(total_profit)
@@ -4206,22 +3947,10 @@ def settle_supplier_debt(request, pk: int):
                     ]
                 })
 
-                transactions_all = Transaction.objects.filter(paid_amount__gt=0)
-                total_bonuses = sum(float(getattr(t, 'bonus_debt', 0) or 0) for t in transactions_all)
-                total_remaining = sum(float(getattr(t, 'client_debt_paid', 0) or 0) for t in transactions_all)
-
-                transactionsInvestors = [
-                    t for t in Transaction.objects.filter(paid_amount__gt=0)
-                    if getattr(t, 'bonus_debt', 0) == 0
-                    and getattr(t, 'client_debt', 0) == 0
-                    and getattr(t, 'profit', 0) > 0
-                ]
-
-                cashflows = CashFlow.objects.filter(
-                    purpose__operation_type=PaymentPurpose.INCOME
-                ).exclude(purpose__name__in=["Оплата", "Внесение инвестора", "Возврат от поставщиков", "Корректировка баланса"])
-
-                total_debt = sum(float(Decimal(str(t.profit or 0)) - Decimal(str(t.returned_to_investor or 0))) for t in transactionsInvestors) + sum(float(Decimal(str(cf.amount or 0)) - Decimal(str(cf.returned_to_investor or 0))) for cf in cashflows)
+                ledger = LedgerSummary.current()
+                total_bonuses = float(ledger.bonus_debt)
+                total_remaining = float(ledger.client_debt_paid)
+                total_debt = float(ledger.investor_debt)
                 total_profit = total_debt
 
                 is_admin = request.user.user_type.name == 'Администратор' if hasattr(request.user, 'user_type') else False
@@ -4312,21 +4041,8 @@ def debtor_detail(request, type, pk):
         except (ValueError, TypeError):
             pk_int = None
         if pk_int == -1:
-            transactions = [
-                t for t in Transaction.objects.filter(paid_amount__gt=0)
-                if getattr(t, 'bonus_debt', 0) == 0
-                and getattr(t, 'client_debt', 0) == 0
-                and getattr(t, 'profit', 0) > 0
-                and (getattr(t, 'profit', 0) - getattr(t, 'returned_to_investor', 0)) > 0
-            ]
-            total_investor_debt = sum(float(getattr(t, 'profit', 0) - getattr(t, 'returned_to_investor', 0)) for t in transactions)
-
-            cashflows = CashFlow.objects.filter(
-                purpose__operation_type=PaymentPurpose.INCOME
-            ).exclude(purpose__name__in=["Оплата", "Внесение инвестора", "Возврат от поставщиков", "Корректировка баланса"])
-            total_cashflow_income = sum(float(Decimal(str(cf.amount or 0)) - Decimal(str(cf.returned_to_investor or 0))) for cf in cashflows if cf.amount > 0)
             data = {}
-            data["amount"] = total_investor_debt + total_cashflow_income
+            data["amount"] = float(debtor_lists.investor_debt_total())
             return JsonResponse({"data": data})
         transaction = get_object_or_404(Transaction, id=pk)
         data = model_to_dict(transaction)
@@ -4348,21 +4064,42 @@ def debtor_detail(request, type, pk):
 
     return JsonResponse({"data": data})
 
+PROFIT_DISTRIBUTION_PER_PAGE = 100
+
+
 @forbid_supplier
 @login_required
 def profit_distribution(request):
-    transactions = Transaction.objects.select_related('client', 'supplier').all().order_by('created_at')
+    date_from = request.GET.get('date_from', '').strip()
+    date_to = request.GET.get('date_to', '').strip()
 
-    class ProfitRow:
-        def __init__(self, t):
-            self.created_at = timezone.localtime(t.created_at).strftime("%d.%m.%Y") if t.created_at else ""
-            self.client = str(t.client) if t.client else ""
-            self.supplier = str(t.supplier) if t.supplier else ""
-            self.amount = t.amount
-            self.supplier_percentage = t.supplier_percentage
-            self.profit = getattr(t, 'profit', None) if hasattr(t, 'profit') else None
+    # Прибыль считается в БД тем же выражением, что и Transaction.profit
+    transactions = filter_by_period(
+        Transaction.objects.select_related('client', 'supplier'), 'created_at', date_from, date_to
+    )
+    profit = transactions.debt_expressions()["profit"]
+    totals = transactions.aggregate(
+        total_count=models.Count('id'),
+        total_amount=Sum('amount'),
+        total_profit=Sum(profit),
+    )
 
-    rows = [ProfitRow(t) for t in transactions]
+    paginator, page = paginate(
+        request, transactions.annotate(profit_value=profit),
+        [('created_at', False), ('id', False)], PROFIT_DISTRIBUTION_PER_PAGE,
+        count=lambda: totals["total_count"],
+    )
+    rows = [
+        SimpleNamespace(
+            created_at=timezone.localtime(t.created_at).strftime("%d.%m.%Y") if t.created_at else "",
+            client=str(t.client) if t.client else "",
+            supplier=str(t.supplier) if t.supplier else "",
+            amount=t.amount,
+            supplier_percentage=t.supplier_percentage,
+            profit=Decimal(t.profit_value).quantize(Decimal(1)),
+        )
+        for t in page.object_list
+    ]
 
     is_admin = request.user.user_type.name == 'Администратор' if hasattr(request.user, 'user_type') else False
 
@@ -4375,20 +4112,85 @@ def profit_distribution(request):
         {"name": "profit", "verbose_name": "Прибыль", "is_amount": True},
     ]
 
+    query = request.GET.copy()
+    query.pop('page', None)
+    query.pop('cursor', None)
+
     context = {
         "fields": fields,
         "data": rows,
-        "data_ids": [t.id for t in transactions],
+        "data_ids": [t.id for t in page.object_list],
         "is_admin": is_admin,
+        "current_page": page.number,
+        "total_pages": paginator.num_pages,
+        "page": page,
+        "query": query.urlencode(),
+        "date_from": date_from,
+        "date_to": date_to,
+        "total_count": totals["total_count"],
+        "total_amount": totals["total_amount"] or Decimal(0),
+        "total_profit": totals["total_profit"] or Decimal(0),
     }
     return render(request, "main/profit_distribution.html", context)
 
 
 from django.views.decorators.http import require_GET
 
+CLIENT_REPAYMENT_FIELDS = [
+    {"name": "created_at", "verbose_name": "Дата", "is_date": True},
+    {"name": "client", "verbose_name": "Клиент"},
+    {"name": "amount", "verbose_name": "Сумма", "is_amount": True},
+    {"name": "comment", "verbose_name": "Комментарий"}
+]
+
+
+def client_debt_repayments_context(request, client_debt_qs):
+    """Страница истории выдач клиентам (параметры cdr_page, cdr_per_page)"""
+    try:
+        per_page = int(request.GET.get('cdr_per_page', 25))
+        if per_page <= 0:
+            per_page = 25
+    except Exception:
+        per_page = 25
+    page_number = request.GET.get('cdr_page', 1)
+    paginator = Paginator(client_debt_qs.select_related('client'), per_page)
+    page = paginator.get_page(page_number)
+    client_debt_repayments = page.object_list
+
+    repayment_data = [debtor_lists.repayment_row(cdr, with_client=True) for cdr in client_debt_repayments]
+    html_client_debt_repayments = render_to_string(
+        "components/table.html",
+        {"id": "client-debt-repayments-table", "fields": CLIENT_REPAYMENT_FIELDS, "data": repayment_data}
+    )
+    return {
+        "html_client_debt_repayments": html_client_debt_repayments,
+        "client_debt_repayments_page": page.number,
+        "client_debt_repayments_total_pages": paginator.num_pages,
+        "client_debt_repayment_ids": [r.id for r in client_debt_repayments],
+    }
+
+
+def debtor_list_response(request, rows, ordering, table_id, fields, item, row_id=lambda row: row.id):
+    """Порция списка панели должника: html (html_rows или columns), data_ids, page, total_pages"""
+    paginator, page = debtor_lists.chunk(request, rows, ordering)
+    return page, {
+        **debtor_lists.render_chunk(page, table_id, fields, item, as_columns=wants_columns(request)),
+        "table_id": table_id,
+        "data_ids": [row_id(row) for row in page.object_list],
+        "page": page.number,
+        "total_pages": paginator.num_pages,
+    }
+
+
 @login_required
 @require_GET
 def debtor_details(request):
+    """
+    Списки панели должников. Каждый список отдаётся порциями по per_page
+    строк (параметр page, у выданного филиалу — rep_page, от новых выдач к
+    старым); доп. таблицы (история выдач, инвесторы, операции) и итог долга
+    филиала supplier_debt_total — только вместе с первой порцией.
+    """
     type_ = request.GET.get("type")
     value = request.GET.get("value")
 
@@ -4400,336 +4202,116 @@ def debtor_details(request):
         safe_branch = "".join([c if c.isalnum() else "_" for c in value])
         transactions_table_id = f"branch-transactions-{safe_branch}"
         repayments_table_id = f"branch-repayments-{safe_branch}"
-
-        suppliers = Supplier.objects.filter(branch=branch)
-        supplier_ids = suppliers.values_list('id', flat=True)
-        transactions = (
-            Transaction.objects
-            .filter(supplier_id__in=supplier_ids, paid_amount__gt=0)
-            .select_related('supplier').order_by('created_at')
-        )
-
-        transaction_fields = [
-            {"name": "created_at", "verbose_name": "Дата", "is_date": True},
-            {"name": "supplier", "verbose_name": "Поставщик"},
-            {"name": "amount", "verbose_name": "Сумма сделки", "is_amount": True},
-            {"name": "supplier_percentage", "verbose_name": "%", "is_percent": True},
-            {"name": "supplier_debt", "verbose_name": "Сумма", "is_amount": True},
-        ]
-        transaction_data = []
-        for t in transactions:
-            transaction_data.append(type("Row", (), {
-                "created_at": timezone.localtime(t.created_at).strftime("%d.%m.%Y") if t.created_at else "",
-                "supplier": str(t.supplier) if t.supplier else "",
-                "amount": t.amount,
-                "supplier_percentage": t.supplier_percentage,
-                "supplier_debt": t.supplier_debt,
-            })())
-
-        repayments = SupplierDebtRepayment.objects.filter(supplier_id__in=supplier_ids)
-        repayment_fields = [
-            {"name": "created_at", "verbose_name": "Дата", "is_date": True},
-            {"name": "amount", "verbose_name": "Сумма", "is_amount": True},
-            {"name": "comment", "verbose_name": "Комментарий"}
-        ]
-        repayment_data = []
-        for r in repayments:
-            repayment_data.append(type("Row", (), {
-                "created_at": timezone.localtime(r.created_at).strftime("%d.%m.%Y %H:%M") if r.created_at else "",
-                "amount": r.amount,
-                "comment": r.comment or "",
-            })())
-
-        html_transactions = render_to_string(
-            "components/table.html",
-            {"id": transactions_table_id, "fields": transaction_fields, "data": transaction_data}
-        )
-        html_repayments = render_to_string(
-            "components/table.html",
-            {"id": repayments_table_id, "fields": repayment_fields, "data": repayment_data}
-        )
-        return JsonResponse({
-            "html_transactions": html_transactions,
-            "html_repayments": html_repayments,
-            "data_ids": [t.id for t in transactions],
-            "repayment_ids": [r.id for r in repayments],
+        response = {
             "transactions_table_id": transactions_table_id,
-            "repayments_table_id": repayments_table_id
-        })
-
-    elif type_ == "summary":
-        if value == "Выдачи клиентам":
-            transactions = [
-                t for t in Transaction.objects.filter(paid_amount__gt=0)
-                if getattr(t, 'client_debt_paid', 0) != 0 and (not t.client or str(t.client) != "ДТ")
-            ]
-            fields = [
-                {"name": "created_at", "verbose_name": "Дата", "is_date": True},
-                {"name": "client", "verbose_name": "Клиент", "is_relation": True},
-                {"name": "amount", "verbose_name": "Сумма сделки", "is_amount": True},
-                {"name": "client_debt_paid", "verbose_name": "Выдать", "is_amount": True},
-            ]
-            data = []
-            for t in transactions:
-                data.append(type("Row", (), {
-                    "created_at": timezone.localtime(t.created_at).strftime("%d.%m.%Y") if t.created_at else "",
-                    "client": str(t.client) if t.client else "",
-                    "amount": t.amount,
-                    "client_debt_paid": t.client_debt_paid,
-                })())
-            table_id = "summary-remaining"
-            data_ids = [t.id for t in transactions]
-
-            html = render_to_string(
-                "components/table.html",
-                {"id": table_id, "fields": fields, "data": data}
-            )
-
-            dt_client = Client.objects.filter(name__iexact="ДТ").first()
-            dt_client_id = dt_client.id if dt_client else None
-
-            client_debt_qs = ClientDebtRepayment.objects.order_by('-created_at')
-            if dt_client_id:
-                client_debt_qs = client_debt_qs.exclude(client_id=dt_client_id)
+            "repayments_table_id": repayments_table_id,
+        }
 
-            try:
-                per_page = int(request.GET.get('cdr_per_page', 25))
-                if per_page <= 0:
-                    per_page = 25
-            except Exception:
-                per_page = 25
-            page_number = request.GET.get('cdr_page', 1)
-            paginator = Paginator(client_debt_qs, per_page)
-            page = paginator.get_page(page_number)
-            client_debt_repayments = page.object_list
-
-            repayment_fields = [
-                {"name": "created_at", "verbose_name": "Дата", "is_date": True},
-                {"name": "client", "verbose_name": "Клиент"},
-                {"name": "amount", "verbose_name": "Сумма", "is_amount": True},
-                {"name": "comment", "verbose_name": "Комментарий"}
-            ]
-            
-            repayment_data = []
-            for cdr in client_debt_repayments:
-                repayment_data.append(type("Row", (), {
-                    "created_at": timezone.localtime(cdr.created_at).strftime("%d.%m.%Y %H:%M") if cdr.created_at else "",
-                    "client": str(cdr.client) if cdr.client else "",
-                    "amount": cdr.amount,
-                    "comment": cdr.comment or "",
-                })())
-
-            html_client_debt_repayments = render_to_string(
-                "components/table.html",
-                {"id": "client-debt-repayments-table", "fields": repayment_fields, "data": repayment_data}
+        # Порция одного списка запрашивается своим параметром, без параметров — обе первые
+        if "rep_page" not in request.GET or "page" in request.GET:
+            paginator, page = debtor_lists.chunk(
+                request, debtor_lists.branch_transactions(branch), [('created_at', False), ('id', False)]
             )
-
-            return JsonResponse({
-                "html": html,
-                "table_id": table_id,
-                "data_ids": data_ids,
-                "html_client_debt_repayments": html_client_debt_repayments,
-                "client_debt_repayments_page": page.number,
-                "client_debt_repayments_total_pages": paginator.num_pages,
-                "client_debt_repayment_ids": [r.id for r in client_debt_repayments],
+            response.update(debtor_lists.render_chunk(
+                page, transactions_table_id, debtor_lists.BRANCH_TRANSACTION_FIELDS,
+                debtor_lists.branch_transaction_row, key="html_transactions",
+                as_columns=wants_columns(request),
+            ))
+            response.update({
+                "data_ids": [t.id for t in page.object_list],
+                "page": page.number,
+                "total_pages": paginator.num_pages,
             })
-        elif value == "Бонусы":
-            transactions = Transaction.objects.filter(paid_amount__gt=0)
-            fields = [
-                {"name": "created_at", "verbose_name": "Дата", "is_date": True},
-                {"name": "client", "verbose_name": "Клиент"},
-                {"name": "bonus_percentage", "verbose_name": "%", "is_percent": True},
-                {"name": "bonus_debt", "verbose_name": "Бонус", "is_amount": True},
-            ]
-            data = []
-            for t in transactions:
-                data.append(type("Row", (), {
-                    "created_at": timezone.localtime(t.created_at).strftime("%d.%m.%Y") if t.created_at else "",
-                    "client": str(t.client) if t.client else "",
-                    "bonus_percentage": t.bonus_percentage,
-                    "bonus_debt": t.bonus_debt,
-                })())
-            table_id = "summary-bonus"
-            data_ids = [t.id for t in transactions]
-
-            html = render_to_string(
-                "components/table.html",
-                {"id": table_id, "fields": fields, "data": data}
+            if page.number == 1:
+                response["supplier_debt_total"] = float(debtor_lists.branch_debt_total(branch))
+        if "page" not in request.GET or "rep_page" in request.GET:
+            paginator, page = debtor_lists.chunk(
+                request, debtor_lists.branch_repayments(branch), debtor_lists.BRANCH_REPAYMENT_ORDERING,
+                param="rep_page", reverse=True,
             )
+            response.update(debtor_lists.render_chunk(
+                page, repayments_table_id, debtor_lists.BRANCH_REPAYMENT_FIELDS,
+                debtor_lists.repayment_row, key="html_repayments",
+                as_columns=wants_columns(request),
+            ))
+            response.update({
+                "repayment_ids": [r.id for r in page.object_list],
+                "repayments_page": page.number,
+                "repayments_total_pages": paginator.num_pages,
+            })
+        return JsonResponse(response)
 
-            return JsonResponse({"html": html, "table_id": table_id, "data_ids": data_ids})
-        elif value == "Инвесторам":
-            transactions = [
-                t for t in Transaction.objects.filter(paid_amount__gt=0)
-                if getattr(t, 'bonus_debt', 0) == 0
-                and getattr(t, 'client_debt', 0) == 0
-                and getattr(t, 'profit', 0) > 0
-                and (getattr(t, 'profit', 0) - getattr(t, 'returned_to_investor', 0)) > 0
-            ]
-
-            cashflows = CashFlow.objects.filter(
-                purpose__operation_type=PaymentPurpose.INCOME,
-            ).exclude(purpose__name__in=["Оплата", "Внесение инвестора", "Возврат от поставщиков", "Корректировка баланса"])
-
-            cashflows = [cf for cf in cashflows if (cf.amount - (cf.returned_to_investor or 0)) > 0]
-
-            class TransactionRow:
-                def __init__(self, created_at, client, amount, profit, id, returned_to_investor=0):
-                    self.created_at = created_at
-                    self.client = client
-                    self.amount = amount
-                    self.profit = profit
-                    self.id = id
-                    self.returned_to_investor = returned_to_investor 
-
-            for cf in cashflows:
-                transactions.append(TransactionRow(
-                    created_at=cf.created_at,
-                    client=cf.purpose.name if cf.purpose else "",
-                    amount=cf.amount,
-                    profit=cf.amount,
-                    id=f"cf-{cf.id}",
-                    returned_to_investor=cf.returned_to_investor if cf.returned_to_investor is not None else 0
-                ))
-
-            fields = [
-                {"name": "created_at", "verbose_name": "Дата", "is_date": True},
-                {"name": "client", "verbose_name": "Клиент"},
-                {"name": "amount", "verbose_name": "Сумма", "is_amount": True},
-                {"name": "profit", "verbose_name": "Прибыль", "is_amount": True},
-            ]
-            data = []
-            for t in transactions:
-                data.append(type("Row", (), {
-                    "created_at": timezone.localtime(t.created_at).strftime("%d.%m.%Y") if t.created_at else "",
-                    "client": str(t.client) if t.client else "",
-                    "amount": t.amount,
-                    "profit": t.profit - t.returned_to_investor,
-                })())
-            table_id = "summary-profit"
-            data_ids = [t.id for t in transactions]
-
-            investor_fields = [
-                {"name": "name", "verbose_name": "Инвестор"},
-                {"name": "balance", "verbose_name": "Фактические инвест", "is_amount": True},
-            ]
-            investors = Investor.objects.all()
-            investor_data = []
-            for inv in investors:
-                investor_data.append(type("InvestorRow", (), {
-                    "name": inv.name,
-                    "balance": inv.balance,
-                })())
-            investor_ids = [inv.id for inv in investors]
-            html_investors = render_to_string(
-                "components/table.html",
-                {"id": "investors-table", "fields": investor_fields, "data": investor_data}
+    elif type_ == "summary":
+        if value == "Выдачи клиентам":
+            page, response = debtor_list_response(
+                request, debtor_lists.client_payout_transactions(), [('id', False)],
+                "summary-remaining", debtor_lists.CLIENT_PAYOUT_FIELDS, debtor_lists.client_payout_row,
             )
-
-            investor_operations = InvestorDebtOperation.objects.all()
-            operation_fields = [
-                {"name": "created_at", "verbose_name": "Дата", "is_date": True},
-                {"name": "investor", "verbose_name": "Инвестор"},
-                {"name": "operation_type", "verbose_name": "Тип операции"},
-                {"name": "amount", "verbose_name": "Сумма", "is_amount": True},
-            ]
-            operation_data = []
-            for op in investor_operations:
-                operation_data.append(type("OperationRow", (), {
-                    "created_at": timezone.localtime(op.created_at).strftime("%d.%m.%Y %H:%M") if op.created_at else "",
-                    "investor": str(op.investor) if op.investor else "",
-                    "amount": op.amount,
-                    "operation_type": dict(InvestorDebtOperation.OPERATION_TYPES).get(op.operation_type, ""),
-                })())
-            operation_table_id = "investor-operations-table"
-            html_operations = render_to_string(
-                "components/table.html",
-                {"id": operation_table_id, "fields": operation_fields, "data": operation_data}
+            if page.number == 1:
+                dt_client = Client.objects.filter(name__iexact="ДТ").first()
+                client_debt_qs = ClientDebtRepayment.objects.order_by('-created_at')
+                if dt_client:
+                    client_debt_qs = client_debt_qs.exclude(client_id=dt_client.id)
+                response.update(client_debt_repayments_context(request, client_debt_qs))
+            return JsonResponse(response)
+        elif value == "Бонусы":
+            page, response = debtor_list_response(
+                request, debtor_lists.bonus_transactions(), [('id', False)],
+                "summary-bonus", debtor_lists.BONUS_FIELDS, debtor_lists.bonus_row,
             )
-
-            html = render_to_string(
-                "components/table.html",
-                {"id": table_id, "fields": fields, "data": data}
+            return JsonResponse(response)
+        elif value == "Инвесторам":
+            page, response = debtor_list_response(
+                request, debtor_lists.investor_profit_rows(), debtor_lists.INVESTOR_PROFIT_ORDERING,
+                "summary-profit", debtor_lists.INVESTOR_PROFIT_FIELDS, debtor_lists.investor_profit_row,
+                row_id=debtor_lists.investor_profit_id,
             )
+            if page.number == 1:
+                investor_fields = [
+                    {"name": "name", "verbose_name": "Инвестор"},
+                    {"name": "balance", "verbose_name": "Фактические инвест", "is_amount": True},
+                ]
+                investors = Investor.objects.all()
+                investor_data = [SimpleNamespace(name=inv.name, balance=inv.balance) for inv in investors]
+                response["investor_ids"] = [inv.id for inv in investors]
+                response["html_investors"] = render_to_string(
+                    "components/table.html",
+                    {"id": "investors-table", "fields": investor_fields, "data": investor_data}
+                )
 
-            return JsonResponse({
-                "html": html,
-                "table_id": table_id,
-                "data_ids": data_ids,
-                "html_investors": html_investors,
-                "investor_ids": investor_ids,
-                "html_operations": html_operations,
-            })
+                investor_operations = InvestorDebtOperation.objects.select_related('investor')
+                operation_fields = [
+                    {"name": "created_at", "verbose_name": "Дата", "is_date": True},
+                    {"name": "investor", "verbose_name": "Инвестор"},
+                    {"name": "operation_type", "verbose_name": "Тип операции"},
+                    {"name": "amount", "verbose_name": "Сумма", "is_amount": True},
+                ]
+                operation_types = dict(InvestorDebtOperation.OPERATION_TYPES)
+                operation_data = [
+                    SimpleNamespace(
+                        created_at=timezone.localtime(op.created_at).strftime("%d.%m.%Y %H:%M") if op.created_at else "",
+                        investor=str(op.investor) if op.investor else "",
+                        amount=op.amount,
+                        operation_type=operation_types.get(op.operation_type, ""),
+                    )
+                    for op in investor_operations
+                ]
+                response["html_operations"] = render_to_string(
+                    "components/table.html",
+                    {"id": "investor-operations-table", "fields": operation_fields, "data": operation_data}
+                )
+            return JsonResponse(response)
         elif value == "ДТ":
-            dt_client = Client.objects.filter(name__iexact="ДТ").first()
-            dt_client_id = dt_client.id if dt_client else None
-            transactions = [
-                t for t in Transaction.objects.filter(paid_amount__gt=0)
-                if t.client and t.client_id == dt_client_id and getattr(t, 'client_debt_paid', 0) != 0
-            ]
-            fields = [
-                {"name": "created_at", "verbose_name": "Дата", "is_date": True},
-                {"name": "client", "verbose_name": "Клиент", "is_relation": True},
-                {"name": "amount", "verbose_name": "Сумма сделки", "is_amount": True},
-                {"name": "client_debt_paid", "verbose_name": "Выдать", "is_amount": True},
-            ]
-            data = []
-            for t in transactions:
-                data.append(type("Row", (), {
-                    "created_at": timezone.localtime(t.created_at).strftime("%d.%m.%Y") if t.created_at else "",
-                    "client": str(t.client) if t.client else "",
-                    "amount": t.amount,
-                    "client_debt_paid": t.client_debt_paid,
-                })())
-            table_id = "summary-dt"
-            data_ids = [t.id for t in transactions]
-
-            html = render_to_string(
-                "components/table.html",
-                {"id": table_id, "fields": fields, "data": data}
+            page, response = debtor_list_response(
+                request, debtor_lists.dt_transactions(), [('id', False)],
+                "summary-dt", debtor_lists.CLIENT_PAYOUT_FIELDS, debtor_lists.client_payout_row,
             )
-
-            client_debt_qs = ClientDebtRepayment.objects.filter(client_id=dt_client_id).order_by('-created_at')
-            try:
-                per_page = int(request.GET.get('cdr_per_page', 25))
-                if per_page <= 0:
-                    per_page = 25
-            except Exception:
-                per_page = 25
-            page_number = request.GET.get('cdr_page', 1)
-            paginator = Paginator(client_debt_qs, per_page)
-            page = paginator.get_page(page_number)
-            client_debt_repayments = page.object_list
-
-            repayment_fields = [
-                {"name": "created_at", "verbose_name": "Дата", "is_date": True},
-                {"name": "client", "verbose_name": "Клиент"},
-                {"name": "amount", "verbose_name": "Сумма", "is_amount": True},
-                {"name": "comment", "verbose_name": "Комментарий"}
-            ]
-            repayment_data = []
-            for cdr in client_debt_repayments:
-                repayment_data.append(type("Row", (), {
-                    "created_at": timezone.localtime(cdr.created_at).strftime("%d.%m.%Y %H:%M") if cdr.created_at else "",
-                    "client": str(cdr.client) if cdr.client else "",
-                    "amount": cdr.amount,
-                    "comment": cdr.comment or "",
-                })())
-
-            html_client_debt_repayments = render_to_string(
-                "components/table.html",
-                {"id": "client-debt-repayments-table", "fields": repayment_fields, "data": repayment_data}
-            )
-
-            return JsonResponse({
-                "html": html,
-                "table_id": table_id,
-                "data_ids": data_ids,
-                "html_client_debt_repayments": html_client_debt_repayments,
-                "client_debt_repayments_page": page.number,
-                "client_debt_repayments_total_pages": paginator.num_pages,
-                "client_debt_repayment_ids": [r.id for r in client_debt_repayments],
-            })
+            if page.number == 1:
+                dt_client = Client.objects.filter(name__iexact="ДТ").first()
+                dt_client_id = dt_client.id if dt_client else None
+                client_debt_qs = ClientDebtRepayment.objects.filter(client_id=dt_client_id).order_by('-created_at')
+                response.update(client_debt_repayments_context(request, client_debt_qs))
+            return JsonResponse(response)
 
     return JsonResponse({"html": "<div>Нет данных</div>"})
 
@@ -4747,11 +4329,11 @@ def cash_flow_payment_stats(request, supplier_id):
     stats = {month: 0 for month in months}
     for cf in cashflows:
         if cf.created_at:
-            stats[cf.created_at.month] += float(Decimal(str(cf.amount or 0)))
+            stats[cf.created_at.month] += money.to_kopecks(cf.amount)
 
     return JsonResponse({
         "months": [datetime(current_year, m, 1).strftime('%b') for m in months],
-        "values": [stats[m] for m in months]
+        "values": [float(money.from_kopecks(stats[m])) if stats[m] else 0 for m in months]
     })
 
 
@@ -4759,41 +4341,40 @@ def cash_flow_payment_stats(request, supplier_id):
 @login_required
 @require_GET
 def company_balance_stats(request):
-    equipment = BalanceData.objects.filter(name="Оборудование").aggregate(total=Sum("amount"))["total"] or Decimal(0)
+    snapshot = build_balance_snapshot(with_sheet=True)
+
+    equipment = snapshot.equipment
 
-    credits_qs = Credit.objects.all().order_by('name')
     credit_rows = [
         type("Row", (), {
             "name": getattr(c, "name", str(c)),
             "amount": getattr(c, "amount", Decimal(0))
         })()
-        for c in credits_qs
+        for c in snapshot.credits
     ]
-    credit_total = sum((getattr(c, "amount", Decimal(0)) or Decimal(0)) for c in credits_qs) if credits_qs else Decimal(0)
+    credit_total = snapshot.credit_total
     credit_fields = [
         {"name": "name", "verbose_name": "Наименование"},
         {"name": "amount", "verbose_name": "Сумма", "is_amount": True},
     ]
     credit_html = render_to_string("components/table.html", {"id": "credits-table", "fields": credit_fields, "data": credit_rows})
 
-    short_qs = ShortTermLiability.objects.all().order_by('name')
     short_rows = [
         type("Row", (), {
             "name": getattr(s, "name", str(s)),
             "amount": getattr(s, "amount", Decimal(0))
         })()
-        for s in short_qs
+        for s in snapshot.short_term
     ]
-    short_total = sum((getattr(s, "amount", Decimal(0)) or Decimal(0)) for s in short_qs) if short_qs else Decimal(0)
+    short_total = snapshot.short_total
     short_fields = [
         {"name": "name", "verbose_name": "Наименование"},
         {"name": "amount", "verbose_name": "Сумма", "is_amount": True},
     ]
     short_html = render_to_string("components/table.html", {"id": "short-term-table", "fields": short_fields, "data": short_rows})
 
-    inventory_qs = InventoryItem.objects.all().order_by('name')
     inventory_rows = []
-    for it in inventory_qs:
+    for it in snapshot.inventory:
         qty = getattr(it, "quantity", Decimal(0)) or Decimal(0)
         if isinstance(qty, Decimal):
             try:
@@ -4817,7 +4398,7 @@ def company_balance_stats(request):
                 "amount": getattr(it, "total", getattr(it, "amount", Decimal(0)))
             })()
         )
-    inventory_total = sum((getattr(it, "total", getattr(it, "amount", Decimal(0))) or Decimal(0)) for it in inventory_qs) if inventory_qs else Decimal(0)
+    inventory_total = snapshot.inventory_total
     inventory_fields = [
         {"name": "name", "verbose_name": "Наименование"},
         {"name": "quantity", "verbose_name": "Количество"},
@@ -4826,67 +4407,25 @@ def company_balance_stats(request):
     ]
     inventory_html = render_to_string("components/table.html", {"id": "inventory-table", "fields": inventory_fields, "data": inventory_rows})
 
-    debtors = []
-    total_debtors = Decimal(0)
-    for branch in Supplier.objects.exclude(branch=None).values_list("branch__id", "branch__name").distinct():
-        branch_id, branch_name = branch
-        if branch_name != "Филиал 1" and branch_name != "Наши ИП":
-            branch_debt = sum(
-                (t.supplier_debt or Decimal(0))
-                for t in Transaction.objects.filter(supplier__branch_id=branch_id, paid_amount__gt=0)
-            )
-            debtors.append({"branch": branch_name, "amount": branch_debt})
-            total_debtors += branch_debt
-
-    safe_amount = SupplierAccount.objects.filter(
-        supplier__visible_in_summary=True
-    ).exclude(account__name__iexact="Наличные").aggregate(total=Sum("balance"))["total"] or Decimal(0)
-
-    cash_account = Account.objects.filter(name__iexact="Наличные").first()
-    cash_balance = Decimal(cash_account.balance) if cash_account and cash_account.balance is not None else Decimal(0)
-
-    safe_amount = Decimal(safe_amount) + cash_balance
+    debtors = [{"branch": line.name, "amount": line.debt} for line in snapshot.debtors]
+    total_debtors = snapshot.total_branch_debts
 
-    bonuses = sum((t.bonus_debt or Decimal(0)) for t in Transaction.objects.filter(paid_amount__gt=0))
-    dt_client = Client.objects.filter(name__iexact="ДТ").first()
-    dt_client_id = dt_client.id if dt_client else None
-    total_remaining = sum(
-        (t.client_debt_paid or Decimal(0))
-        for t in Transaction.objects.filter(paid_amount__gt=0)
-        if t.client_id is None or t.client_id != dt_client_id
-    )
-    
-    transactionsInvestors = [
-        t for t in Transaction.objects.filter(paid_amount__gt=0)
-        if getattr(t, 'bonus_debt', 0) == 0
-        and getattr(t, 'client_debt', 0) == 0
-        and getattr(t, 'profit', 0) > 0
-    ]
-    cashflows = CashFlow.objects.filter(
-        purpose__operation_type=PaymentPurpose.INCOME
-    ).exclude(purpose__name__in=["Оплата", "Внесение инвестора", "Возврат от поставщиков", "Корректировка баланса"])
-
-    total_profit_decimal = sum(
-        (Decimal(str(getattr(t, 'profit', 0) or 0)) - Decimal(str(getattr(t, 'returned_to_investor', 0) or 0)))
-        for t in transactionsInvestors
-    ) + sum(
-        (Decimal(str(cf.amount or 0)) - Decimal(str(cf.returned_to_investor or 0)))
-        for cf in cashflows
-    )
+    safe_amount = snapshot.safe_amount
 
-    total_summary_debts = (bonuses or Decimal(0)) + (total_remaining or Decimal(0)) + (total_profit_decimal or Decimal(0))
+    bonuses = snapshot.bonus_debt
+    total_remaining = snapshot.client_debt_paid_without_dt
+    total_profit_decimal = snapshot.investor_debt
 
-    client_debts = sum((t.client_debt or Decimal(0)) for t in Transaction.objects.filter(paid_amount__gt=0).all())
+    total_summary_debts = snapshot.creditors_total
 
-    investors_qs = Investor.objects.all().order_by('name')
     investors_rows = [
         type("Row", (), {
             "name": inv.name,
             "amount": inv.balance or Decimal(0)
         })()
-        for inv in investors_qs
+        for inv in snapshot.investors
     ]
-    investors_total = sum((inv.balance or Decimal(0)) for inv in investors_qs) if investors_qs else Decimal(0)
+    investors_total = snapshot.investors_total
     investor_fields = [
         {"name": "name", "verbose_name": "Инвестор"},
         {"name": "amount", "verbose_name": "Баланс", "is_amount": True},
@@ -4895,16 +4434,15 @@ def company_balance_stats(request):
 
     undistributed_profit = Decimal(0)
 
-    assets_total = equipment + inventory_total + total_debtors + safe_amount
+    assets_total = snapshot.assets
 
-    provisional_liabilities = credit_total + short_total + total_summary_debts + investors_total + undistributed_profit
+    provisional_liabilities = snapshot.liabilities + undistributed_profit
 
     current_capital = assets_total - provisional_liabilities
 
     liabilities_total = provisional_liabilities + current_capital
 
     current_year = datetime.now().year
-    capitals = []
 
     MONTHS_RU = [
         "январь", "февраль", "март", "апрель", "май", "июнь",
@@ -4912,9 +4450,7 @@ def company_balance_stats(request):
     ]
     months = [MONTHS_RU[month-1] for month in range(1, 13)]
 
-    for month in range(1, 13):
-        capital = float(get_monthly_capital(current_year, month))
-        capitals.append(capital)
+    capitals = get_yearly_capital(current_year)
 
     if capitals:
         total_capital = round(sum(capitals) / len(capitals), 1)
@@ -4950,7 +4486,7 @@ def company_balance_stats(request):
                 {
                     "name": "Вложения инвесторов",
                     "amount": investors_total,
-                    "items": [{"name": inv.name, "amount": inv.balance or Decimal(0)} for inv in investors_qs],
+                    "items": [{"name": inv.name, "amount": inv.balance or Decimal(0)} for inv in snapshot.investors],
                     "html": investors_html
                 },
                 {"name": "Нераспределенная прибыль", "amount": undistributed_profit},
@@ -4963,9 +4499,9 @@ def company_balance_stats(request):
             "total": total_capital
         },
         "ids":{
-            "credit_ids": [c.id for c in credits_qs],
-            "short_ids": [s.id for s in short_qs],
-            "inventory_ids": [i.id for i in inventory_qs],
+            "credit_ids": [c.id for c in snapshot.credits],
+            "short_ids": [s.id for s in snapshot.short_term],
+            "inventory_ids": [i.id for i in snapshot.inventory],
         }
     }
     return JsonResponse(data, safe=False)
@@ -4978,14 +4514,18 @@ def company_balance_stats(request):
 def company_balance_stats_by_month(request):
     current_year = datetime.now().year
     current_month = datetime.now().month
+    current_percent = get_yearly_capital(current_year)[current_month - 1]
+    stored = {
+        mc.month: mc.capital
+        for mc in MonthlyCapital.objects.filter(year=current_year)
+    }
     capitals = []
     months = []
     for month in range(1, 13):
         if month == current_month:
-            capital = float(get_monthly_capital(current_year, month))
+            capital = float(current_percent)
         else:
-            mc = MonthlyCapital.objects.filter(year=current_year, month=month).first()
-            capital = float(mc.capital) if mc else 0
+            capital = float(stored[month]) if month in stored else 0
         capitals.append(capital)
         months.append(datetime(current_year, month, 1).strftime('%B'))
     return JsonResponse({"months": months, "capitals": capitals})
@@ -5047,6 +4587,75 @@ def get_monthly_capital(year, month):
 
     return round(capital_percent, 1)
 
+
+def get_yearly_capital(year):
+    """
+    То же, что get_monthly_capital, сразу за все 12 месяцев года:
+    - все MonthlyCapital года (и декабря прошлого) берутся одним запросом;
+    - прибыль по месяцам считается одним GROUP BY по месяцу в БД;
+    - для месяцев без MonthlyCapital капитал считается по инвесторам, загруженным один раз.
+    Возвращает список из 12 процентов (округлены до 1 знака).
+    """
+    month_ends = {}
+    for y, m in [(year - 1, 12)] + [(year, month) for month in range(1, 13)]:
+        month_ends[(y, m)] = timezone.make_aware(datetime(y, m, monthrange(y, m)[1], 23, 59, 59))
+
+    stored = {
+        (mc.year, mc.month): Decimal(mc.capital)
+        for mc in MonthlyCapital.objects.filter(
+            models.Q(year=year) | models.Q(year=year - 1, month=12)
+        )
+        if mc.capital is not None
+    }
+
+    investors = None
+    capitals = {}
+    for key, dt_end in month_ends.items():
+        if key in stored:
+            capitals[key] = stored[key]
+            continue
+        if investors is None:
+            investors = list(Investor.objects.values_list('created_at', 'balance'))
+        capitals[key] = sum(
+            (Decimal(balance or 0) for created_at, balance in investors if created_at <= dt_end),
+            Decimal(0)
+        )
+
+    # Номер месяца диапазоном дат, чтобы не зависеть от часовых поясов в БД
+    month_of = models.Case(
+        *[
+            models.When(
+                created_at__range=(timezone.make_aware(datetime(year, month, 1, 0, 0, 0)), month_ends[(year, month)]),
+                then=Value(month),
+            )
+            for month in range(1, 13)
+        ],
+        output_field=IntegerField(),
+    )
+    profits = dict(
+        Transaction.objects.with_debts()
+        .annotate(month=month_of)
+        .filter(month__isnull=False)
+        .order_by()
+        .values_list('month')
+        .annotate(total=Sum('profit'))
+    )
+
+    percents = []
+    for month in range(1, 13):
+        prev_key = (year - 1, 12) if month == 1 else (year, month - 1)
+        avg_cap = (capitals[prev_key] + capitals[(year, month)]) / Decimal(2)
+        profit_total = profits.get(month) or Decimal(0)
+
+        if avg_cap > 0 and profit_total != 0:
+            capital_percent = float(profit_total) / float(avg_cap) * 100.0
+        else:
+            capital_percent = 0.0
+        percents.append(round(capital_percent, 1))
+
+    return percents
+
+
 def calculate_and_save_monthly_capital(year, month):
     last_day = monthrange(year, month)[1]
     dt_end = timezone.make_aware(datetime(year, month, last_day, 23, 59, 59))
@@ -5080,30 +4689,7 @@ def users(request):
 
 
 def get_user_fields():
-    excluded = [
-        "id",
-        "data_joined",
-        "supplier",
-        "password",
-        "last_login",
-        "is_superuser",
-        "is_staff",
-        "email",
-        "branch",
-    ]
-    fields = get_model_fields(
-        User,
-        excluded_fields=excluded,
-    )
-
-    insertions = [
-        (0, {"name": "email", "verbose_name": "Почта", }),
-    ]
-
-    for pos, field in insertions:
-        fields.insert(pos, field)
-
-    return fields
+    return schemas.get(schemas.USERS)
 
 
 @forbid_supplier
@@ -5471,187 +5057,143 @@ def money_logs(request):
         "current_page": page.number,
     })
 
-@forbid_supplier
-@login_required
-def money_logs_list(request):
-    from decimal import Decimal
-
-    fields = [
-        {"name": "date", "verbose_name": "Дата", "is_date": True},
-        {"name": "type", "verbose_name": "Тип", "is_relation": True},
-        {"name": "info", "verbose_name": "Инфо"},
-        {"name": "amount", "verbose_name": "Сумма", "is_amount": True},
-        {"name": "comment", "verbose_name": "Комментарий"},
-        {"name": "created_by", "verbose_name": "Создал", "is_relation": True},
-    ]
-
-    # Получаем фильтры
-    filter_date = request.GET.get('date', '').strip()
-    filter_type = request.GET.get('type', '').strip().lower()
-    filter_info = request.GET.get('info', '').strip().lower()
-    filter_amount = request.GET.get('amount', '').strip().replace(',', '.').replace(' ', '')
-    filter_comment = request.GET.get('comment', '').strip().lower()
-    filter_created_by = request.GET.get('created_by', '').strip().lower()
-
-    # Собираем все логи: CashFlow и InvestorDebtOperation
-    cash_flows = CashFlow.objects.select_related('account', 'supplier', 'purpose', 'created_by').all()
-    investor_ops = InvestorDebtOperation.objects.select_related('investor', 'created_by').filter(operation_type="profit")
-
-    # Собираем строки
-    rows = []
-    for cf in cash_flows:
-        purpose_name = cf.purpose.name if cf.purpose else ""
-        # Определяем type_id и type_label
-        if purpose_name == "Погашение долга поставщика" or purpose_name == "Возврат от поставщиков":
-            type_label = "Погашение долга поставщика"
-            type_id = "dr"
-            info = f"Поставщик: {cf.supplier.name if cf.supplier else ''}, Счет: {cf.account.name if cf.account else ''}"
-        elif purpose_name == "Погашение долга клиента":
-            type_label = "Погашение долга клиента"
-            type_id = "cdr"
-            client_name = ""
-            try:
-                cdr = ClientDebtRepayment.objects.filter(cash_flow=cf).first()
-                if cdr and cdr.client:
-                    client_name = cdr.client.name
-            except Exception:
-                pass
-            info = f"Клиент: {client_name}, Счет: {cf.account.name if cf.account else ''}"
-        elif purpose_name == "Забор инвестора":
-            type_label = "Инвестор: Забор"
-            type_id = "io-withdrawal"
-            info = f"Счет: {cf.account.name if cf.account else ''}"
-            if cf.supplier:
-                info += f", Поставщик: {cf.supplier.name}"
-        elif purpose_name == "Внесение инвестора":
-            type_label = "Инвестор: Внесение"
-            type_id = "io-deposit"
-            info = f"Счет: {cf.account.name if cf.account else ''}"
-            if cf.supplier:
-                info += f", Поставщик: {cf.supplier.name}"
-        elif purpose_name == "Выдача бонусов":
-            type_label = "Выдача бонусов"
-            type_id = "bonus"
-            parts = []
-            if cf.account:
-                parts.append(f"Счет: {cf.account.name}")
-            info = ", ".join(parts)
-        elif purpose_name == "ДТ":
-            type_label = "Выдача клиенту ДТ"
-            type_id = "dt"
-            parts = []
-            if cf.account:
-                parts.append(f"Счет: {cf.account.name}")
-            info = ", ".join(parts)
-        else:
-            type_label = "Движение ДС"
-            type_id = "cf"
-            parts = []
-            if cf.account:
-                parts.append(f"Счет: {cf.account.name}")
-            if cf.supplier:
-                parts.append(f"Поставщик: {cf.supplier.name}")
-            if purpose_name:
-                parts.append(f"Назначение: {purpose_name}")
-            info = ", ".join(parts)
-
-        obj = type("LogRow", (), {})()
-        obj.id = f"cf-{cf.id}"
-        obj.dt = cf.created_at
-        obj.date = timezone.localtime(cf.created_at).strftime("%d.%m.%Y %H:%M") if cf.created_at else ""
-        obj.type = type_label
-        obj.type_id = type_id
-        obj.info = info
-        obj.amount = cf.amount
-        obj.comment = cf.comment or ""
-        obj.created_by = cf.created_by.username if cf.created_by else ""
-        obj.created_by_id = str(cf.created_by.id) if cf.created_by else ""
-        rows.append(obj)
+MONEY_LOG_FIELDS = [
+    {"name": "date", "verbose_name": "Дата", "is_date": True},
+    {"name": "type", "verbose_name": "Тип", "is_relation": True},
+    {"name": "info", "verbose_name": "Инфо"},
+    {"name": "amount", "verbose_name": "Сумма", "is_amount": True},
+    {"name": "comment", "verbose_name": "Комментарий"},
+    {"name": "created_by", "verbose_name": "Создал", "is_relation": True},
+]
+
+
+def money_log_list_rows(request):
+    """Отфильтрованный журнал денежных операций и порядок сортировки: (UnionAll, ordering)"""
+    # Движения ДС и прибыль инвесторов одним запросом UNION ALL с фильтрами в БД
+    rows = money_log_rows(
+        date=request.GET.get('date', '').strip(),
+        type_id=request.GET.get('type', '').strip().lower(),
+        info=request.GET.get('info', '').strip().lower(),
+        amount=request.GET.get('amount', '').strip().replace(',', '.').replace(' ', ''),
+        comment=request.GET.get('comment', '').strip().lower(),
+        created_by=request.GET.get('created_by', '').strip().lower(),
+        hidden=hidden_rows.hidden_ids(request, hidden_rows.MONEY_LOGS),
+    )
 
-    for io in investor_ops:
-        type_label = "Инвестор: Прибыль"
-        type_id = "io-profit"
-        info = f"Инвестор: {io.investor.name if io.investor else ''}"
-        obj = type("LogRow", (), {})()
-        obj.id = f"io-{io.id}"
-        obj.dt = io.created_at
-        obj.date = timezone.localtime(io.created_at).strftime("%d.%m.%Y %H:%M") if io.created_at else ""
-        obj.type = type_label
-        obj.type_id = type_id
-        obj.info = info
-        obj.amount = io.amount
-        obj.comment = ""
-        obj.created_by = io.created_by.username if io.created_by else ""
-        obj.created_by_id = str(io.created_by.id) if io.created_by else ""
-        rows.append(obj)
-
-    # --- Фильтрация ---
-    def contains(val, query):
-        return query in str(val).lower() if query else True
-
-    filtered = []
-    for row in rows:
-        if filter_date and filter_date not in row.date:
-            continue
-        if filter_type:
-            # Фильтрация по type_id (точное совпадение)
-            if filter_type != str(getattr(row, 'type_id', '')).lower():
-                continue
-        if filter_info and filter_info not in str(row.info).lower():
-            continue
-        if filter_amount and filter_amount not in str(row.amount):
-            continue
-        if filter_comment and filter_comment not in str(row.comment).lower():
-            continue
-        if filter_created_by:
-            # Фильтрация по username или по id
-            if filter_created_by not in str(row.created_by).lower() and filter_created_by != str(getattr(row, 'created_by_id', '')):
-                continue
-        filtered.append(row)
-    rows = filtered
-
-    # --- Сортировка ---
+    # Сортировка; при равных значениях — движения ДС, затем операции инвесторов, по id
     sort = request.GET.get('sort')
     order = request.GET.get('order', 'desc')
-    allowed_sort_fields = {
-        'date': lambda r: r.dt,
-        'type': lambda r: r.type,
-        'info': lambda r: r.info,
-        'amount': lambda r: r.amount,
-        'comment': lambda r: r.comment,
-        'created_by': lambda r: r.created_by,
-    }
-    if sort in allowed_sort_fields:
-        reverse = (order == 'desc')
-        rows = sorted(rows, key=allowed_sort_fields[sort], reverse=reverse)
+    if sort in MONEY_LOG_SORT_COLUMNS:
+        ordering = [(MONEY_LOG_SORT_COLUMNS[sort], order == 'desc')]
     else:
-        rows = sorted(rows, key=lambda r: r.dt or timezone.make_aware(datetime.min), reverse=True)
+        ordering = [('dt', True)]
+    return rows, ordering + [('source', False), ('row_pk', False)]
 
-    # Пагинация
-    paginator = Paginator(rows, 200)
-    page_number = request.GET.get('page', 1)
-    try:
-        page_number = int(page_number)
-    except Exception:
-        page_number = 1
-    page = paginator.get_page(page_number)
 
-    html = "".join(
-        render_to_string("components/table_row.html", {"item": row, "fields": fields})
-        for row in page.object_list
+@forbid_supplier
+@login_required
+def money_logs_list(request):
+    rows, ordering = money_log_list_rows(request)
+
+    # Пагинация: по номеру страницы или по курсору (параметр cursor)
+    paginator, page = paginate(
+        request, rows, ordering, 200,
+        count=lambda: cached_count(
+            'money_logs', rows,
+            filter_signature(request.GET) + hidden_rows.hidden_signature(request, hidden_rows.MONEY_LOGS),
+            versions=(TableVersion.TRANSACTIONS, TableVersion.MONEY_LOGS),
+        ),
     )
-    money_log_ids = [row.id for row in page.object_list]
+    log_rows = [MoneyLogRow(row) for row in page.object_list]
+
+    money_log_ids = [row.id for row in log_rows]
 
     return JsonResponse({
-        "html": html,
+        **page_rows(request, MONEY_LOG_FIELDS, log_rows),
         "context": {
             "total_pages": paginator.num_pages,
             "current_page": page.number,
             "money_log_ids": money_log_ids,
+            **cursor_context(page),
         },
     })
 
 
+# Таблицы с окнами строк для виртуальной прокрутки (main.windows)
+windows.register("transactions", windows.WindowTable(
+    rows=transaction_list_rows,
+    fields=transaction_fields_for,
+    context=transaction_rows_context,
+    hidden_table=hidden_rows.TRANSACTIONS,
+))
+windows.register("cash_flow", windows.WindowTable(
+    rows=cash_flow_list_rows,
+    fields=lambda request: get_cash_flow_fields(),
+    count_name="cash_flows",
+    hidden_table=hidden_rows.CASH_FLOW,
+))
+windows.register("money_logs", windows.WindowTable(
+    rows=money_log_list_rows,
+    fields=lambda request: MONEY_LOG_FIELDS,
+    versions=(TableVersion.TRANSACTIONS, TableVersion.MONEY_LOGS),
+    item=MoneyLogRow,
+    row_id=money_log_id,
+    hidden_table=hidden_rows.MONEY_LOGS,
+))
+windows.register("client_payouts", windows.WindowTable(
+    rows=lambda request: (debtor_lists.client_payout_transactions(), [('id', False)]),
+    fields=lambda request: debtor_lists.CLIENT_PAYOUT_FIELDS,
+    item=debtor_lists.client_payout_row,
+    suppliers_allowed=True,
+))
+windows.register("bonuses", windows.WindowTable(
+    rows=lambda request: (debtor_lists.bonus_transactions(), [('id', False)]),
+    fields=lambda request: debtor_lists.BONUS_FIELDS,
+    item=debtor_lists.bonus_row,
+    suppliers_allowed=True,
+))
+windows.register("investor_profit", windows.WindowTable(
+    rows=lambda request: (debtor_lists.investor_profit_rows(), debtor_lists.INVESTOR_PROFIT_ORDERING),
+    fields=lambda request: debtor_lists.INVESTOR_PROFIT_FIELDS,
+    item=debtor_lists.investor_profit_row,
+    row_id=debtor_lists.investor_profit_id,
+    suppliers_allowed=True,
+))
+windows.register("dt", windows.WindowTable(
+    rows=lambda request: (debtor_lists.dt_transactions(), [('id', False)]),
+    fields=lambda request: debtor_lists.CLIENT_PAYOUT_FIELDS,
+    item=debtor_lists.client_payout_row,
+    suppliers_allowed=True,
+))
+
+
+@login_required
+@require_GET
+def table_window(request, name):
+    """Окно строк (start, limit) таблицы name с токеном снимка для виртуальной прокрутки"""
+    table = windows.TABLES.get(name)
+    if table is None:
+        raise Http404("Таблица не найдена")
+    user_type = getattr(getattr(request.user, 'user_type', None), 'name', None)
+    if not table.suppliers_allowed and user_type in ('Поставщик', 'Филиал'):
+        return redirect('main:debtors')
+    return JsonResponse(windows.window(request, name))
+
+
+@forbid_supplier
+@login_required
+@require_GET
+def global_search(request):
+    """Поиск по всем таблицам: q — текст, type — типы документов (можно несколько)"""
+    query = request.GET.get('q', '').strip()
+    kinds = [kind for kind in request.GET.getlist('type') if kind in search.DOCUMENTS]
+    try:
+        limit = min(max(int(request.GET.get('limit', search.DEFAULT_LIMIT)), 1), search.MAX_LIMIT)
+    except ValueError:
+        limit = search.DEFAULT_LIMIT
+    return JsonResponse({"query": query, "results": search.search(query, kinds, limit, user=request.user)})
+
+
 @forbid_supplier
 @login_required
 def close_investor_debt(request, pk):
@@ -6604,12 +6146,12 @@ def money_logs_types(request):
 @login_required
 @require_GET
 def investor_debt_problems(request):
-    transactionsInvestors = [
-        t for t in Transaction.objects.filter(paid_amount__gt=0)
-        if getattr(t, 'bonus_debt', 0) == 0
-        and getattr(t, 'client_debt', 0) == 0
-        and getattr(t, 'profit', 0) > 0
-    ]
+    transactionsInvestors = (
+        debtor_lists.investor_transactions()
+        .filter(stored_investor_debt__lt=0)
+        .select_related("client")
+        .order_by("id")
+    )
     problem_transactions = [
         {
             "id": t.id,
@@ -6624,9 +6166,12 @@ def investor_debt_problems(request):
         if float(getattr(t, 'profit', 0)) - float(getattr(t, 'returned_to_investor', 0)) < 0
     ]
 
-    cashflows = CashFlow.objects.filter(
-        purpose__operation_type=PaymentPurpose.INCOME
-    ).exclude(purpose__name__in=["Оплата", "Внесение инвестора", "Возврат от поставщиков", "Корректировка баланса"])
+    cashflows = (
+        debtor_lists.investor_cashflows()
+        .filter(investor_debt__lt=0)
+        .select_related("purpose")
+        .order_by("id")
+    )
 
     problem_cashflows = [
         {
@@ -7061,9 +6606,7 @@ def cash_flow_report(request):
         if supplier_id not in cost_rows_dict:
             continue
 
-        paid_amount = Decimal(str(t.paid_amount or 0))
-        supplier_percentage = Decimal(str(t.supplier_percentage or 0))
-        supplier_cost = Decimal(math.floor((paid_amount * supplier_percentage) / Decimal("100")))
+        supplier_cost = money.floor_percent(t.paid_amount, t.supplier_percentage)
 
         month_attr = f"month_{month_num}"
         current_value = getattr(cost_rows_dict[supplier_id], month_attr)
@@ -0,0 +1,132 @@
+"""
+Окна строк таблиц для виртуальной прокрутки.
+
+Клиент запрашивает произвольный диапазон строк (start, limit) таблицы из
+реестра TABLES и получает вместе с ним токен снимка — хеш версий данных
+TableVersion и параметров фильтра и сортировки. Пока токен не изменился,
+строки под любым индексом те же, поэтому окна кэшируются по токену; после
+записи в таблицы токен меняется, и ответ с флагом stale сообщает клиенту,
+что загруженные ранее окна нужно перечитать. В токен входит и версия
+TableVersion.ROW_LABELS: окно содержит HTML строк с названиями клиентов,
+поставщиков и счетов, который после переименования устаревает.
+"""
+import hashlib
+from dataclasses import dataclass
+from operator import attrgetter
+from typing import Callable, Optional
+
+from django.core.cache import cache
+from django.db.models import QuerySet
+
+from .counts import COUNT_TIMEOUT, NON_FILTER_PARAMS, cached_count, filter_signature
+from .hidden_rows import hidden_signature
+from .models import TableVersion
+from .pagination import UnionAll, order_expression
+from .row_cache import rendered_rows, request_role
+
+DEFAULT_LIMIT = 100
+MAX_LIMIT = 500
+
+# Параметры окна, не влияющие на набор и порядок строк
+WINDOW_PARAMS = ("start", "limit", "snapshot")
+
+
+@dataclass(frozen=True)
+class WindowTable:
+    """
+    rows(request) -> (строки, ordering): QuerySet или UnionAll с порядком
+    в формате pagination.paginate либо уже упорядоченный список и None.
+    fields(request) — колонки для components/table_row.html, item — строка
+    выборки -> объект для шаблона, row_id — id строки выборки,
+    context(items) — доп. ключи ответа, hidden_table — id таблицы в
+    HiddenRows, если rows учитывает respect_hidden=1.
+    """
+    rows: Callable
+    fields: Callable
+    versions: tuple = (TableVersion.TRANSACTIONS,)
+    item: Optional[Callable] = None
+    row_id: Callable = attrgetter("id")
+    context: Optional[Callable] = None
+    count_name: Optional[str] = None
+    suppliers_allowed: bool = False
+    hidden_table: Optional[str] = None
+
+
+TABLES = {}
+
+
+def register(name, table):
+    TABLES[name] = table
+    return table
+
+
+def _int(value, default):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return default
+
+
+def snapshot_token(table, name, signature):
+    versions = (*table.versions, TableVersion.ROW_LABELS)
+    version = ".".join(str(TableVersion.current(version_name)) for version_name in versions)
+    return hashlib.sha1(f"{name}:{version}:{signature}".encode()).hexdigest()[:16]
+
+
+def _signature(request, table, exclude):
+    signature = filter_signature(request.GET, exclude=exclude)
+    if table.hidden_table:
+        signature += hidden_signature(request, table.hidden_table)
+    return signature
+
+
+def _build(request, table, name, start, limit):
+    rows, ordering = table.rows(request)
+    if isinstance(rows, (QuerySet, UnionAll)):
+        if ordering:
+            rows = rows.order_by(*[order_expression(key, descending) for key, descending in ordering])
+        count_signature = _signature(request, table, NON_FILTER_PARAMS + WINDOW_PARAMS)
+        total = cached_count(
+            table.count_name or name, rows, count_signature,
+            versions=table.versions,
+        )
+        window_rows = list(rows[start:start + limit]) if start < total else []
+    else:
+        rows = list(rows)
+        total = len(rows)
+        window_rows = rows[start:start + limit]
+
+    items = [table.item(row) for row in window_rows] if table.item else window_rows
+    response = {
+        "start": start,
+        "total": total,
+        "ids": [table.row_id(row) for row in window_rows],
+        "rows": rendered_rows(request, table.fields(request), items),
+    }
+    if table.context:
+        response.update(table.context(items))
+    return response
+
+
+def window(request, name):
+    """
+    Ответ окна строк таблицы name: {snapshot, stale, start, total, ids, rows, ...}.
+    rows — HTML строк в порядке ids; stale — токен snapshot клиента устарел.
+    """
+    table = TABLES[name]
+    start = max(_int(request.GET.get("start"), 0), 0)
+    limit = min(max(_int(request.GET.get("limit"), DEFAULT_LIMIT), 1), MAX_LIMIT)
+
+    token = snapshot_token(table, name, _signature(request, table, WINDOW_PARAMS))
+    key = f"window:{name}:{token}:{request_role(request)}:{start}:{limit}"
+    response = cache.get(key)
+    if response is None:
+        response = _build(request, table, name, start, limit)
+        cache.set(key, response, COUNT_TIMEOUT)
+
+    client_token = request.GET.get("snapshot")
+    return {
+        "snapshot": token,
+        "stale": bool(client_token) and client_token != token,
+        **response,
+    }
@@ -49,6 +49,85 @@ const CookieUtils = {
 	},
 }
 
+// Строки из колоночного JSON списков (format=columns, main/columns.py)
+// с той же разметкой, что у components/table_row.html
+const ColumnRows = {
+	escape(value) {
+		return String(value)
+			.replace(/&/g, '&amp;')
+			.replace(/</g, '&lt;')
+			.replace(/>/g, '&gt;')
+			.replace(/"/g, '&quot;')
+			.replace(/'/g, '&#x27;')
+	},
+
+	// Число как в шаблоне: places знаков, десятичная запятая
+	number(value, places) {
+		if (value === null || value === undefined) return ''
+		if (typeof value !== 'number') return this.escape(value)
+		const text = places ? value.toFixed(places) : String(value)
+		return text.replace('.', ',')
+	},
+
+	checkbox(checked) {
+		const label = checked ? 'Да' : 'Нет'
+		return `<div class="checkbox">
+    <input type="checkbox" id="" class="checkbox__input" name="" ${checked ? 'checked' : ''} disabled>
+    <label for="" class="checkbox__label">
+        <span class="checkbox__box" ></span>
+        <span class="checkbox__text">${label}</span>
+    </label>
+</div>`
+	},
+
+	cell(field, value) {
+		switch (field.kind) {
+			case 'date':
+			case 'enum':
+				return `<td class="table__cell">${this.escape(value ?? '')}</td>`
+			case 'sign':
+				return `<td class="table__cell table__cell-sign">${this.escape(value ?? '')}</td>`
+			case 'boolean':
+				return `<td class="table__cell">${this.checkbox(value)}</td>`
+		}
+
+		let className = 'table__cell'
+		if (['float', 'integer', 'number'].includes(field.kind)) {
+			className += ' table__cell-number'
+		}
+		if (field.kind === 'currency') {
+			if (value > 0) className += ' text-green'
+			else if (value < 0) className += ' text-red'
+		}
+		// value|default:"0" у процентов
+		const text =
+			field.kind === 'percent' && !value ? '0' : this.number(value, field.places)
+		return `<td class="${className}">${text}</td>`
+	},
+
+	build(payload) {
+		if (!payload || !Array.isArray(payload.fields)) return ''
+		const { fields, columns, count } = payload
+		const signColumns = fields
+			.map((field, index) => (field.kind === 'sign' ? columns[index] : null))
+			.filter(Boolean)
+
+		const rows = []
+		for (let row = 0; row < count; row++) {
+			const rowClass = signColumns
+				.map(values =>
+					values[row] === '-' ? 'text-red' : values[row] === '+' ? 'text-green' : '',
+				)
+				.join('')
+			const cells = fields
+				.map((field, index) => this.cell(field, columns[index][row]))
+				.join('')
+			rows.push(`<tr class="table__row ${rowClass}">${cells}</tr>`)
+		}
+		return rows.join('')
+	},
+}
+
 class ColumnSizeCalculator {
 	static CONFIG = {
 		select: { min: 150, max: 200 },
@@ -2105,6 +2184,11 @@ export const TableManager = {
 		document.getElementById('last-page').disabled = currentPage >= totalPages
 	},
 
+	// HTML строк по колоночному JSON списка (format=columns)
+	buildRowsHTML(payload) {
+		return ColumnRows.build(payload)
+	},
+
 	async refreshTableFromServer(url, tableId, summaryOptions = null) {
 		const table = document.getElementById(tableId)
 		if (!table) return
@@ -2113,13 +2197,18 @@ export const TableManager = {
 		document.body.appendChild(loader)
 
 		try {
-			const response = await fetch(url, {
+			// Строки приходят колонками и собираются здесь, без HTML с сервера
+			const columnsUrl = `${url}${url.includes('?') ? '&' : '?'}format=columns`
+			const response = await fetch(columnsUrl, {
 				headers: { 'X-Requested-With': 'XMLHttpRequest' },
 			})
 			if (!response.ok)
 				throw new Error(`HTTP error! status: ${response.status}`)
 			const data = await response.json()
-			this.replaceTableContent(data.html, tableId)
+			this.replaceTableContent(
+				data.columns ? this.buildRowsHTML(data.columns) : data.html,
+				tableId,
+			)
 			this.reinitializeTable(tableId)
 			this.setInitialCellSelection()
 			this.attachGlobalCellClickHandler()
@@ -2332,6 +2421,31 @@ export const TableManager = {
 		}
 	},
 
+	// Строка итогов с готовыми суммами summaryData ({column: value}), например
+	// посчитанными сервером по всему списку, а не только по загруженным строкам
+	showTableSummary(tableId, summaryData, className = null) {
+		const table = document.getElementById(tableId)
+		if (!table) return
+
+		const tbody = table.querySelector('tbody')
+		if (!tbody) return
+
+		tbody.querySelectorAll('.table__row--summary').forEach(row => row.remove())
+
+		const headers = Array.from(table.querySelectorAll('thead th'))
+		const columnNames = headers.map(header => header.dataset.name)
+		const summaryRow = this.createSummaryRow(
+			headers,
+			columnNames,
+			summaryData,
+			className,
+		)
+
+		this.applyColumnWidthsForRow(tableId, summaryRow)
+
+		tbody.appendChild(summaryRow)
+	},
+
 	calculateSums(rows, columnsToSum, columnNames) {
 		const summaryData = {}
 
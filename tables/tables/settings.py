@@ -154,6 +154,9 @@ LOGOUT_REDIRECT_URL = "login"
 
 SESSION_COOKIE_AGE = 2592000
 
+# Число строк таблиц без фильтров брать из оценки СУБД, точное считать в фоне (main.counts)
+APPROXIMATE_TABLE_COUNTS = False
+
 LOG_DIR = BASE_DIR / "logs"
 LOG_DIR.mkdir(exist_ok=True)
 
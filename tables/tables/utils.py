@@ -45,12 +45,7 @@ def get_model_fields(
                 }
             )
     if field_order:
-        fields.sort(
-            key=lambda f: (
-                field_order.index(f["name"])
-                if f["name"] in field_order
-                else len(field_order)
-            )
-        )
+        positions = {name: index for index, name in enumerate(field_order)}
+        fields.sort(key=lambda f: positions.get(f["name"], len(field_order)))
 
     return fields